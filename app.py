@@ -1,17 +1,53 @@
 """
-Flask API para el analizador de anuncios de empleo.
+API asíncrona (Quart) para el analizador de anuncios de empleo.
 ARCHIVO: app.py (SEPARADO de main.py)
 """
 
-from flask import Flask, request, jsonify
-from werkzeug.utils import secure_filename
+from quart import Quart, Response, request
+from quart.formparser import FormDataParser
+from quart.wrappers import Request
+from werkzeug.exceptions import RequestEntityTooLarge
+from multipart import MultipartError
+from urllib.parse import unquote
+import asyncio
+import concurrent.futures
+import functools
+import gzip
+import hashlib
+import logging
+import multiprocessing
 import os
-import tempfile
-import json
+import re
+import threading
+import uuid
+import orjson
 from datetime import datetime
+from io import BytesIO
 
 # Importar la clase desde main.py
 from main import JobAnalyzerFirebase
+from components.firebase_manager import close_async_db
+from components.image_converter import ImageConverter
+from components.multipart_stream import parse_multipart_stream
+
+# Nivel de log configurable (LOG_LEVEL); por defecto solo avisos y errores.
+# basicConfig no hace nada si el servidor ya configuró el logging
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'WARNING').upper(), format='%(message)s')
+log = logging.getLogger(__name__)
+
+def fast_json(obj, status=200):
+    """Serializa a JSON con orjson y construye la respuesta."""
+    return Response(orjson.dumps(obj), status=status, mimetype='application/json')
+
+async def read_json():
+    """Lee el cuerpo de la petición como JSON con orjson (None si está vacío o es inválido)."""
+    body = await request.get_data()
+    if not body:
+        return None
+    try:
+        return orjson.loads(body)
+    except orjson.JSONDecodeError:
+        return None
 
 def serialize_result(data):
     """Convierte el resultado a un formato JSON serializable."""
@@ -31,35 +67,56 @@ def serialize_result(data):
     
     return serialized
 
-app = Flask(__name__)
+def memory_stream_factory(total_content_length, content_type, filename, content_length=None):
+    """
+    Destino de cada archivo subido: un BytesIO en lugar del SpooledTemporaryFile
+    de werkzeug, para que upload_to_buffer lo reutilice sin copiarlo. Las
+    subidas ya están limitadas por MAX_CONTENT_LENGTH.
+    """
+    return BytesIO()
+
+class MemoryFormDataParser(FormDataParser):
+    """Parser de formularios que guarda los archivos en memoria (ver memory_stream_factory)."""
+    
+    def __init__(self, **kwargs):
+        kwargs.setdefault('stream_factory', memory_stream_factory)
+        super().__init__(**kwargs)
+
+class UploadRequest(Request):
+    form_data_parser_class = MemoryFormDataParser
+
+app = Quart(__name__)
+app.request_class = UploadRequest
 
 # Configuración
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp', 'gif'}
+ALLOWED_SUFFIXES = frozenset({'.png', '.jpg', '.jpeg', '.webp', '.gif'})
+BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', '100'))  # Textos por petición en /analyze/batch
+TASKS_COLLECTION = 'tasks'  # Estado de los análisis en segundo plano (/analyze/image/async)
 
 # Función para preparar las credenciales de Firebase
 def setup_firebase_credentials():
-    """Configura las credenciales de Firebase desde variable de entorno o archivo."""
+    """
+    Configura las credenciales de Firebase desde variable de entorno o archivo.
+    
+    Returns:
+        Diccionario con las credenciales (variable de entorno) o ruta al archivo local
+    """
     firebase_creds = os.environ.get('FIREBASE_CREDENTIALS')
     
     if firebase_creds:
-        # Si hay credenciales en variable de entorno, crear archivo temporal
-        temp_creds_path = '/tmp/serviceAccountKey.json'
+        # Si hay credenciales en variable de entorno, usarlas directamente como diccionario
         try:
-            # Intentar parsear como JSON primero para validar
-            creds_dict = json.loads(firebase_creds)
-            # Escribir el JSON formateado
-            with open(temp_creds_path, 'w') as f:
-                json.dump(creds_dict, f)
-            print(f"✅ Credenciales Firebase cargadas desde variable de entorno")
-            return temp_creds_path
-        except json.JSONDecodeError as e:
-            print(f"❌ Error parseando FIREBASE_CREDENTIALS: {e}")
+            creds_dict = orjson.loads(firebase_creds)
+            log.info("✅ Credenciales Firebase cargadas desde variable de entorno")
+            return creds_dict
+        except orjson.JSONDecodeError as e:
+            log.error("❌ Error parseando FIREBASE_CREDENTIALS: %s", e)
             raise
     else:
         # Usar archivo local (para desarrollo)
         if os.path.exists('serviceAccountKey.json'):
-            print("✅ Usando archivo serviceAccountKey.json local")
+            log.info("✅ Usando archivo serviceAccountKey.json local")
             return 'serviceAccountKey.json'
         else:
             raise FileNotFoundError(
@@ -67,23 +124,195 @@ def setup_firebase_credentials():
                 "Por favor configura FIREBASE_CREDENTIALS en Railway."
             )
 
-# Inicializar el analizador con las credenciales correctas
-try:
-    service_account_path = setup_firebase_credentials()
-    analyzer = JobAnalyzerFirebase(service_account_path)
-    print("✅ Analyzer inicializado correctamente")
-except Exception as e:
-    print(f"❌ Error inicializando analyzer: {e}")
-    analyzer = None
+# Inicialización perezosa del analizador: se crea en la primera petición
+# (o al importar si PRELOAD_ANALYZER está definida)
+_analyzer_lock = threading.Lock()
+
+@functools.cache
+def _create_analyzer():
+    """Crea el analizador con las credenciales correctas (una sola vez por proceso)."""
+    analyzer = JobAnalyzerFirebase(setup_firebase_credentials())
+    log.info("✅ Analyzer inicializado correctamente")
+    return analyzer
+
+def get_analyzer():
+    """Devuelve el analizador del proceso, creándolo si aún no existe."""
+    with _analyzer_lock:
+        return _create_analyzer()
+
+def _call_analyzer(method_name, kwargs):
+    """Ejecuta un método del analyzer (en un hilo o en un proceso del pool)."""
+    return getattr(get_analyzer(), method_name)(**kwargs)
+
+# Pool de procesos opcional para el análisis (ANALYZER_PROCESSES > 0).
+# Por defecto (0) el análisis corre en hilos con asyncio.to_thread.
+ANALYZER_PROCESSES = int(os.environ.get('ANALYZER_PROCESSES', '0'))
+# Hilos para las llamadas bloqueantes al analyzer (modo hilos)
+ANALYZER_THREADS = int(os.environ.get('ANALYZER_THREADS', '32'))
+_process_pool = None
+
+def get_process_pool():
+    """
+    Crea el pool de procesos de forma perezosa (tras el fork de gunicorn).
+    Usa 'spawn' para no heredar conexiones de Firebase/gRPC del proceso padre.
+    """
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=ANALYZER_PROCESSES,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=get_analyzer
+        )
+    return _process_pool
+
+async def run_analyzer(method_name, **kwargs):
+    """
+    Ejecuta un método del analyzer sin bloquear el event loop.
+    
+    Args:
+        method_name: Nombre del método de JobAnalyzerFirebase (p. ej. 'process_job_image')
+        **kwargs: Argumentos del método
+    
+    Returns:
+        Resultado del método
+    """
+    if ANALYZER_PROCESSES > 0:
+        future = get_process_pool().submit(_call_analyzer, method_name, kwargs)
+        return await asyncio.wrap_future(future)
+    
+    return await asyncio.to_thread(_call_analyzer, method_name, kwargs)
+
+async def run_pipeline(method_name, **kwargs):
+    """
+    Ejecuta la versión asíncrona de un método del analyzer (`<método>_async`).
+    
+    La IA corre en un hilo, pero la subida a Storage y la escritura en
+    Firestore se esperan en el bucle de eventos y se solapan entre sí. Con
+    el pool de procesos activo se usa el método síncrono en el pool.
+    
+    Args:
+        method_name: Nombre del método síncrono (p. ej. 'process_job_image')
+        **kwargs: Argumentos del método
+    
+    Returns:
+        Resultado del método
+    """
+    if ANALYZER_PROCESSES > 0:
+        return await run_analyzer(method_name, **kwargs)
+    
+    # La primera creación del analyzer conecta con Firebase: fuera del bucle
+    analyzer = await asyncio.to_thread(get_analyzer)
+    return await getattr(analyzer, f'{method_name}_async')(**kwargs)
+
+# Tareas en segundo plano del proceso: asyncio solo guarda referencias débiles,
+# así que se retienen aquí hasta que terminan
+_background_tasks = set()
+TASK_ID_RE = re.compile(r'[0-9a-f]{32}')
+
+async def _run_task(task_id, method_name, kwargs):
+    """Ejecuta el pipeline de una tarea y guarda su resultado (o error) en Firestore."""
+    try:
+        result = await run_pipeline(method_name, **kwargs)
+        estado = {"status": "done", "result": serialize_result(result)}
+    except Exception as e:
+        log.exception("❌ Error en la tarea %s: %s", task_id, e)
+        estado = {"status": "error", "error": str(e)}
+    
+    analyzer = await asyncio.to_thread(get_analyzer)
+    await analyzer.firebase_manager.upload_to_firestore_async(
+        estado, collection=TASKS_COLLECTION, doc_id=task_id
+    )
+
+@app.after_serving
+async def wait_background_tasks():
+    """Deja terminar los análisis en segundo plano antes de cerrar el worker."""
+    if _background_tasks:
+        await asyncio.wait(_background_tasks, timeout=60)
+
+async def start_task(method_name, **kwargs):
+    """
+    Lanza un método del analyzer en segundo plano y devuelve el ID de la tarea.
+    
+    El estado se guarda en Firestore (colección TASKS_COLLECTION) y no en
+    memoria, para que cualquier worker pueda responder a la consulta.
+    
+    Args:
+        method_name: Nombre del método síncrono (p. ej. 'process_job_image_buffer')
+        **kwargs: Argumentos del método
+    
+    Returns:
+        ID de la tarea
+    """
+    task_id = uuid.uuid4().hex
+    analyzer = await asyncio.to_thread(get_analyzer)
+    # El estado existe antes de responder: la primera consulta nunca da 404
+    await analyzer.firebase_manager.upload_to_firestore_async(
+        {"status": "pending"}, collection=TASKS_COLLECTION, doc_id=task_id
+    )
+    
+    task = asyncio.create_task(_run_task(task_id, method_name, kwargs))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task_id
+
+if os.environ.get('PRELOAD_ANALYZER'):
+    try:
+        get_analyzer()
+    except Exception as e:
+        log.error("❌ Error inicializando analyzer: %s", e)
+
+@app.before_serving
+async def setup_thread_pool():
+    """Ajusta el pool de hilos por defecto que usa asyncio.to_thread."""
+    asyncio.get_running_loop().set_default_executor(
+        concurrent.futures.ThreadPoolExecutor(max_workers=ANALYZER_THREADS)
+    )
+
+@app.after_serving
+async def shutdown_process_pool():
+    """Cierra el pool de procesos al detener el servidor."""
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+
+@app.after_serving
+async def close_async_clients():
+    """Cierra los clientes asíncronos ligados al bucle del servidor antes de que termine."""
+    if _create_analyzer.cache_info().currsize:
+        await get_analyzer().ollama_analyzer.aclose()
+    await close_async_db()
 
 def allowed_file(filename):
-    """Verifica si la extensión del archivo es permitida."""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    """Verifica si la extensión del nombre de archivo es permitida (un solo splitext)."""
+    return os.path.splitext(filename)[1].lower() in ALLOWED_SUFFIXES
 
-@app.route('/', methods=['GET'])
-def home():
-    """Interfaz web para analizar anuncios."""
-    return '''
+def is_supported_image(image_buffer):
+    """Verifica por la firma de los 12 primeros bytes que sea PNG, JPEG, GIF o WebP."""
+    with image_buffer.getbuffer() as view:
+        header = bytes(view[:12])
+    return ImageConverter.sniff_format(header) is not None
+
+def upload_to_buffer(file):
+    """
+    BytesIO con el contenido de un archivo subido (FileStorage).
+    
+    El parser de formularios de la app (MemoryFormDataParser) guarda cada
+    subida en un BytesIO, que se devuelve tal cual sin copiarlo. Cualquier
+    otro stream se lee de una sola vez.
+    """
+    stream = file.stream
+    stream.seek(0)
+    if isinstance(stream, BytesIO):
+        return stream
+    return BytesIO(stream.read())
+
+def open_upload_buffer(filename):
+    """Buffer en memoria para una subida (None si la extensión no está permitida)."""
+    if not allowed_file(filename):
+        return None
+    return BytesIO()
+
+# HTML de la interfaz web (se precomputa una sola vez al importar)
+HOME_HTML = '''
 <!DOCTYPE html>
 <html lang="es">
 <head>
@@ -340,9 +569,14 @@ def home():
         <div class="api-info">
             <h4>📡 API Endpoints</h4>
             <div class="endpoint">GET /health - Health check</div>
+            <div class="endpoint">GET /warmup - Abrir conexiones (sonda de arranque)</div>
             <div class="endpoint">POST /analyze/text - Analizar solo texto</div>
             <div class="endpoint">POST /analyze/image - Analizar solo imagen</div>
+            <div class="endpoint">POST /analyze/image/stream - Analizar imagen (cuerpo crudo)</div>
+            <div class="endpoint">POST /analyze/image/async - Analizar imagen en segundo plano (202 + task_id)</div>
+            <div class="endpoint">GET /analyze/status/&lt;task_id&gt; - Estado de un análisis en segundo plano</div>
             <div class="endpoint">POST /analyze - Analizar texto y/o imagen</div>
+            <div class="endpoint">POST /analyze/batch - Analizar varios textos</div>
         </div>
     </div>
     
@@ -397,12 +631,14 @@ def home():
                         body: formData
                     });
                 } else if (file) {
-                    // Solo imagen
-                    const formData = new FormData();
-                    formData.append('file', file);
-                    response = await fetch('/analyze/image', {
+                    // Solo imagen: se envía el archivo crudo, sin multipart
+                    response = await fetch('/analyze/image/stream', {
                         method: 'POST',
-                        body: formData
+                        headers: {
+                            'Content-Type': 'application/octet-stream',
+                            'X-Filename': encodeURIComponent(file.name)
+                        },
+                        body: file
                     });
                 } else {
                     // Solo texto
@@ -474,13 +710,50 @@ def home():
 </html>
     '''
 
+HOME_HTML_BYTES = HOME_HTML.encode('utf-8')
+HOME_HTML_GZIP = gzip.compress(HOME_HTML_BYTES, 9)
+HOME_ETAG = f'"{hashlib.md5(HOME_HTML_BYTES).hexdigest()}"'
+HOME_HEADERS = {
+    'Content-Type': 'text/html; charset=utf-8',
+    'ETag': HOME_ETAG,
+    'Cache-Control': 'public, max-age=3600',
+    'Vary': 'Accept-Encoding',
+}
+
+@app.route('/', methods=['GET'])
+async def home():
+    """Interfaz web para analizar anuncios."""
+    if request.headers.get('If-None-Match') == HOME_ETAG:
+        return Response(b'', status=304, headers={'ETag': HOME_ETAG})
+    
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        return Response(HOME_HTML_GZIP, headers={**HOME_HEADERS, 'Content-Encoding': 'gzip'})
+    
+    return Response(HOME_HTML_BYTES, headers=HOME_HEADERS)
+
 @app.route('/health', methods=['GET'])
-def health():
+async def health():
     """Health check endpoint."""
-    return jsonify({"status": "healthy"}), 200
+    return fast_json({"status": "healthy"}, 200)
+
+@app.route('/warmup', methods=['GET'])
+async def warmup():
+    """
+    Crea el analyzer y abre sus conexiones (Firestore, Storage, Ollama).
+    
+    Pensado como sonda de arranque: responde 503 hasta que todo contesta.
+    """
+    try:
+        estado = await run_analyzer('warmup')
+    except Exception as e:
+        log.exception("❌ Error en warmup")
+        return fast_json({"status": "error", "error": str(e)}, 503)
+    
+    status = 200 if all(estado.values()) else 503
+    return fast_json({"status": "warm" if status == 200 else "degraded", **estado}, status)
 
 @app.route('/analyze/image', methods=['POST'])
-def analyze_image():
+async def analyze_image():
     """
     Analiza una imagen de anuncio de empleo.
     
@@ -489,50 +762,175 @@ def analyze_image():
     - additional_text: texto adicional opcional (form field)
     """
     try:
+        files = await request.files
+        form = await request.form
+        
         # Verificar que hay un archivo
-        if 'file' not in request.files:
-            return jsonify({"error": "No se proporcionó ningún archivo"}), 400
+        file = files.get('file')
+        if file is None:
+            return fast_json({"error": "No se proporcionó ningún archivo"}, 400)
+        
+        filename = file.filename
+        if not filename:
+            return fast_json({"error": "Nombre de archivo vacío"}, 400)
+        
+        if not allowed_file(filename):
+            return fast_json({"error": "Tipo de archivo no permitido"}, 400)
+        
+        # Obtener texto adicional si existe
+        additional_text = form.get('additional_text', None)
+        
+        # La imagen se pasa en memoria al conversor, sin escribirla a disco
+        image_buffer = upload_to_buffer(file)
+        if not is_supported_image(image_buffer):
+            return fast_json({"error": "El archivo no es una imagen válida (PNG, JPEG, GIF o WebP)"}, 400)
+        
+        # Analizar y subir sin bloquear el event loop
+        result = await run_pipeline(
+            'process_job_image_buffer',
+            image_buffer=image_buffer,
+            additional_text=additional_text,
+            upload_to_storage=True,
+            upload_to_firestore=True
+        )
+        
+        return fast_json(serialize_result(result), 200)
+    
+    except Exception as e:
+        log.exception("❌ Error en analyze_image: %s", e)
+        return fast_json({"error": f"Error al procesar: {str(e)}"}, 500)
+
+@app.route('/analyze/image/async', methods=['POST'])
+async def analyze_image_async():
+    """
+    Como /analyze/image, pero responde 202 con un task_id sin esperar al
+    análisis. El resultado se consulta en GET /analyze/status/<task_id>.
+    """
+    try:
+        files = await request.files
+        form = await request.form
+        
+        file = files.get('file')
+        if file is None:
+            return fast_json({"error": "No se proporcionó ningún archivo"}, 400)
+        
+        filename = file.filename
+        if not filename:
+            return fast_json({"error": "Nombre de archivo vacío"}, 400)
+        
+        if not allowed_file(filename):
+            return fast_json({"error": "Tipo de archivo no permitido"}, 400)
         
-        file = request.files['file']
+        image_buffer = upload_to_buffer(file)
+        if not is_supported_image(image_buffer):
+            return fast_json({"error": "El archivo no es una imagen válida (PNG, JPEG, GIF o WebP)"}, 400)
+        
+        # Copia propia: los archivos del formulario se cierran al terminar la petición
+        task_id = await start_task(
+            'process_job_image_buffer',
+            image_buffer=BytesIO(image_buffer.getvalue()),
+            additional_text=form.get('additional_text', None),
+            upload_to_storage=True,
+            upload_to_firestore=True
+        )
+        
+        status_url = f"/analyze/status/{task_id}"
+        response = fast_json({"task_id": task_id, "status": "pending", "status_url": status_url}, 202)
+        response.headers['Location'] = status_url
+        return response
+    
+    except Exception as e:
+        log.exception("❌ Error en analyze_image_async: %s", e)
+        return fast_json({"error": f"Error al procesar: {str(e)}"}, 500)
+
+@app.route('/analyze/status/<task_id>', methods=['GET'])
+async def analyze_status(task_id):
+    """Estado de una tarea de /analyze/image/async (pending, done o error)."""
+    if not TASK_ID_RE.fullmatch(task_id):
+        return fast_json({"error": "Tarea no encontrada"}, 404)
+    
+    try:
+        analyzer = await asyncio.to_thread(get_analyzer)
+        doc = await asyncio.to_thread(
+            analyzer.firebase_manager.get_firestore_document, task_id, TASKS_COLLECTION
+        )
+    except Exception as e:
+        log.exception("❌ Error en analyze_status: %s", e)
+        return fast_json({"error": f"Error al consultar: {str(e)}"}, 500)
+    
+    if doc is None:
+        return fast_json({"error": "Tarea no encontrada"}, 404)
+    
+    estado = {"task_id": task_id, "status": doc.get("status")}
+    for key in ("result", "error"):
+        if key in doc:
+            estado[key] = doc[key]
+    return fast_json(estado, 200)
+
+@app.route('/analyze/image/stream', methods=['POST'])
+async def analyze_image_stream():
+    """
+    Analiza una imagen enviada como cuerpo crudo (sin multipart).
+    
+    El cuerpo se acumula en memoria por bloques a medida que llega, sin pasar
+    por el parser multipart.
+    
+    Espera:
+    - Cuerpo: bytes de la imagen (application/octet-stream)
+    - X-Filename: nombre original del archivo (URL-encoded)
+    - X-Additional-Text: texto adicional opcional (URL-encoded)
+    """
+    try:
+        filename = unquote(request.headers.get('X-Filename', ''))
         
-        if file.filename == '':
-            return jsonify({"error": "Nombre de archivo vacío"}), 400
+        if filename == '':
+            return fast_json({"error": "Nombre de archivo vacío"}, 400)
         
-        if not allowed_file(file.filename):
-            return jsonify({"error": "Tipo de archivo no permitido"}), 400
+        if not allowed_file(filename):
+            return fast_json({"error": "Tipo de archivo no permitido"}, 400)
         
         # Obtener texto adicional si existe
-        additional_text = request.form.get('additional_text', None)
+        additional_text = request.headers.get('X-Additional-Text')
+        if additional_text:
+            additional_text = unquote(additional_text)
         
-        # Guardar temporalmente el archivo
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as temp_file:
-            file.save(temp_file.name)
-            temp_path = temp_file.name
+        # Acumular el cuerpo en memoria por bloques
+        max_size = app.config['MAX_CONTENT_LENGTH']
+        received = 0
+        image_buffer = BytesIO()
+        async for chunk in request.body:
+            received += len(chunk)
+            if received > max_size:
+                raise RequestEntityTooLarge()
+            image_buffer.write(chunk)
         
-        try:
-            # Procesar la imagen
-            result = analyzer.process_job_image(
-                image_path=temp_path,
-                additional_text=additional_text,
-                upload_to_storage=True,
-                upload_to_firestore=True
-            )
-            
-            return jsonify(serialize_result(result)), 200
+        if received == 0:
+            return fast_json({"error": "No se proporcionó ningún archivo"}, 400)
+        
+        image_buffer.seek(0)
+        if not is_supported_image(image_buffer):
+            return fast_json({"error": "El archivo no es una imagen válida (PNG, JPEG, GIF o WebP)"}, 400)
+        
+        # Analizar y subir sin bloquear el event loop
+        result = await run_pipeline(
+            'process_job_image_buffer',
+            image_buffer=image_buffer,
+            additional_text=additional_text,
+            upload_to_storage=True,
+            upload_to_firestore=True
+        )
         
-        finally:
-            # Limpiar archivo temporal
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+        return fast_json(serialize_result(result), 200)
+    
+    except RequestEntityTooLarge:
+        raise
     
     except Exception as e:
-        print(f"Error en analyze_image: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({"error": f"Error al procesar: {str(e)}"}), 500
+        log.exception("❌ Error en analyze_image_stream: %s", e)
+        return fast_json({"error": f"Error al procesar: {str(e)}"}, 500)
 
 @app.route('/analyze/text', methods=['POST'])
-def analyze_text():
+async def analyze_text():
     """
     Analiza un anuncio de empleo desde texto.
     
@@ -542,32 +940,135 @@ def analyze_text():
     }
     """
     try:
-        data = request.get_json()
+        data = await read_json()
         
         if not data or 'text' not in data:
-            return jsonify({"error": "Se requiere el campo 'text'"}), 400
+            return fast_json({"error": "Se requiere el campo 'text'"}, 400)
         
         text = data['text']
         
         if not text or not text.strip():
-            return jsonify({"error": "El texto no puede estar vacío"}), 400
+            return fast_json({"error": "El texto no puede estar vacío"}, 400)
         
         # Procesar el texto
-        result = analyzer.process_job_text(
+        result = await run_pipeline(
+            'process_job_text',
             text=text,
             upload_to_firestore=True
         )
         
-        return jsonify(serialize_result(result)), 200
+        return fast_json(serialize_result(result), 200)
     
     except Exception as e:
-        print(f"Error en analyze_text: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({"error": f"Error al procesar: {str(e)}"}), 500
+        log.exception("❌ Error en analyze_text: %s", e)
+        return fast_json({"error": f"Error al procesar: {str(e)}"}, 500)
+
+@app.route('/analyze/batch', methods=['POST'])
+async def analyze_batch():
+    """
+    Analiza varios anuncios de texto en una sola petición.
+    
+    Los análisis corren en paralelo y los anuncios detectados se guardan en
+    Firestore con una sola escritura agrupada.
+    
+    Espera JSON: una lista de textos o de objetos {"text": "..."}
+    [
+        "texto del anuncio 1",
+        {"text": "texto del anuncio 2"}
+    ]
+    """
+    try:
+        data = await read_json()
+        
+        if not isinstance(data, list) or not data:
+            return fast_json({"error": "Se requiere una lista de textos"}, 400)
+        
+        if len(data) > BATCH_MAX_ITEMS:
+            return fast_json({"error": f"Máximo {BATCH_MAX_ITEMS} textos por petición"}, 400)
+        
+        texts = [item.get('text') if isinstance(item, dict) else item for item in data]
+        if not all(isinstance(text, str) and text.strip() for text in texts):
+            return fast_json({"error": "Todos los textos deben ser cadenas no vacías"}, 400)
+        
+        results = await run_pipeline(
+            'process_job_batch',
+            texts=texts,
+            upload_to_firestore=True
+        )
+        
+        return fast_json({"results": [serialize_result(r) for r in results]}, 200)
+    
+    except Exception as e:
+        log.exception("❌ Error en analyze_batch: %s", e)
+        return fast_json({"error": f"Error al procesar: {str(e)}"}, 500)
+
+async def _analyze_multipart():
+    """Imagen y/o texto en multipart/form-data (parseo por bloques, sin formparser)."""
+    try:
+        image_buffer, filename, fields = await parse_multipart_stream(
+            request.body,
+            request.mimetype_params.get('boundary'),
+            open_upload_buffer,
+            app.config['MAX_CONTENT_LENGTH'],
+            text_fields=('text',)
+        )
+    except MultipartError as e:
+        return fast_json({"error": f"Cuerpo multipart inválido: {str(e)}"}, 400)
+    
+    text = fields.get('text')
+    has_file = bool(filename)
+    has_text = bool(text and text.strip())
+    
+    if not has_file and not has_text:
+        return fast_json({"error": "Debe proporcionar al menos una imagen o texto"}, 400)
+    
+    if has_file and image_buffer is None:
+        return fast_json({"error": "Tipo de archivo no permitido"}, 400)
+    
+    if has_file and not is_supported_image(image_buffer):
+        return fast_json({"error": "El archivo no es una imagen válida (PNG, JPEG, GIF o WebP)"}, 400)
+    
+    # Procesar: imagen (con el texto como complemento) o solo texto
+    if has_file:
+        result = await run_pipeline(
+            'process_job_image_buffer',
+            image_buffer=image_buffer,
+            additional_text=text if has_text else None,
+            upload_to_storage=True,
+            upload_to_firestore=True
+        )
+    else:
+        result = await run_pipeline(
+            'process_job_text',
+            text=text,
+            upload_to_firestore=True
+        )
+    
+    return fast_json(serialize_result(result), 200)
+
+async def _analyze_json():
+    """Solo texto en application/json."""
+    data = await read_json()
+    
+    if not data or 'text' not in data:
+        return fast_json({"error": "Se requiere el campo 'text'"}, 400)
+    
+    result = await run_pipeline(
+        'process_job_text',
+        text=data['text'],
+        upload_to_firestore=True
+    )
+    
+    return fast_json(serialize_result(result), 200)
+
+# Manejador de /analyze según el mimetype del Content-Type
+ANALYZE_HANDLERS = {
+    'multipart/form-data': _analyze_multipart,
+    'application/json': _analyze_json,
+}
 
 @app.route('/analyze', methods=['POST'])
-def analyze():
+async def analyze():
     """
     Analiza un anuncio de empleo (imagen, texto o ambos).
     
@@ -577,82 +1078,35 @@ def analyze():
     - Imagen + texto (multipart/form-data con 'file' y 'text')
     """
     try:
-        # Determinar el tipo de contenido
-        content_type = request.content_type
+        # Determinar el manejador según el tipo de contenido
+        handler = ANALYZE_HANDLERS.get(request.mimetype)
         
-        if 'multipart/form-data' in content_type:
-            # Puede tener imagen y/o texto
-            has_file = 'file' in request.files and request.files['file'].filename != ''
-            has_text = 'text' in request.form and request.form['text'].strip()
-            
-            if not has_file and not has_text:
-                return jsonify({"error": "Debe proporcionar al menos una imagen o texto"}), 400
-            
-            temp_path = None
-            
-            try:
-                if has_file:
-                    file = request.files['file']
-                    
-                    if not allowed_file(file.filename):
-                        return jsonify({"error": "Tipo de archivo no permitido"}), 400
-                    
-                    # Guardar temporalmente el archivo
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as temp_file:
-                        file.save(temp_file.name)
-                        temp_path = temp_file.name
-                
-                text = request.form.get('text', None) if has_text else None
-                
-                # Procesar
-                result = analyzer.process_job(
-                    image_path=temp_path if has_file else None,
-                    text=text,
-                    upload_to_storage=has_file,
-                    upload_to_firestore=True
-                )
-                
-                return jsonify(serialize_result(result)), 200
-            
-            finally:
-                # Limpiar archivo temporal
-                if temp_path and os.path.exists(temp_path):
-                    os.unlink(temp_path)
-        
-        elif 'application/json' in content_type:
-            # Solo texto
-            data = request.get_json()
-            
-            if not data or 'text' not in data:
-                return jsonify({"error": "Se requiere el campo 'text'"}), 400
-            
-            result = analyzer.process_job_text(
-                text=data['text'],
-                upload_to_firestore=True
-            )
-            
-            return jsonify(serialize_result(result)), 200
+        if handler is None:
+            return fast_json({"error": "Content-Type no soportado"}, 400)
         
-        else:
-            return jsonify({"error": "Content-Type no soportado"}), 400
+        return await handler()
+    
+    except RequestEntityTooLarge:
+        raise
     
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        log.exception("❌ Error en analyze: %s", e)
+        return fast_json({"error": str(e)}, 500)
 
 @app.errorhandler(413)
-def request_entity_too_large(error):
+async def request_entity_too_large(error):
     """Maneja archivos demasiado grandes."""
-    return jsonify({"error": "Archivo demasiado grande (máximo 16MB)"}), 413
+    return fast_json({"error": "Archivo demasiado grande (máximo 16MB)"}, 413)
 
 @app.errorhandler(404)
-def not_found(error):
+async def not_found(error):
     """Maneja rutas no encontradas."""
-    return jsonify({"error": "Endpoint no encontrado"}), 404
+    return fast_json({"error": "Endpoint no encontrado"}, 404)
 
 @app.errorhandler(500)
-def internal_error(error):
+async def internal_error(error):
     """Maneja errores internos."""
-    return jsonify({"error": "Error interno del servidor"}), 500
+    return fast_json({"error": "Error interno del servidor"}, 500)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=8080, debug=False)
\ No newline at end of file
@@ -4,15 +4,24 @@ Procesa IMÁGENES y ARCHIVOS DE TEXTO desde una carpeta.
 """
 
 import os
+import re
+import sys
 import time
+import logging
+import mmap
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
 from datetime import datetime
-from queue import Queue
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import partial
+from collections import deque
 from threading import Lock
-import json
 
-from main import JobAnalyzerFirebase
+import orjson
+
+log = logging.getLogger(__name__)
+
+MMAP_THRESHOLD = 64 * 1024  # Archivos de texto más grandes se leen con mmap
 
 
 class BatchMultiFormatProcessor:
@@ -24,6 +33,17 @@ class BatchMultiFormatProcessor:
     # Extensiones soportadas
     IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.webp', '.bmp', '.gif']
     TEXT_EXTENSIONS = ['.txt', '.md', '.text']
+    _IMAGE_EXT_SET = frozenset(IMAGE_EXTENSIONS)
+    _TEXT_EXT_SET = frozenset(TEXT_EXTENSIONS)
+    
+    # Clasifica un nombre de archivo por su extensión en una sola búsqueda
+    _EXT_RE = re.compile(
+        r'\.(?:(?P<image>%s)|(?P<text>%s))$' % (
+            '|'.join(re.escape(ext[1:]) for ext in IMAGE_EXTENSIONS),
+            '|'.join(re.escape(ext[1:]) for ext in TEXT_EXTENSIONS)
+        ),
+        re.IGNORECASE
+    )
     
     def __init__(
         self,
@@ -37,24 +57,37 @@ class BatchMultiFormatProcessor:
         Args:
             service_account_path: Ruta al archivo de credenciales de Firebase
             output_folder: Carpeta donde guardar los resultados
-            auto_save_results: Si True, guarda automáticamente los resultados en JSON
+            auto_save_results: Si True, guarda los resultados en un archivo NDJSON a medida que terminan
         """
-        self.analyzer = JobAnalyzerFirebase(service_account_path)
+        # Import diferido: main arrastra el SDK de Firebase (grpc, google-cloud)
+        from main import JobAnalyzerFirebase
+        from components.ollama_analyzer import HTTP2_AVAILABLE
+        import httpx
+        
+        # Un solo cliente HTTP con pool para todos los workers: evita un
+        # handshake TLS por archivo (y con HTTP/2 multiplexa en una conexión)
+        self._http = httpx.Client(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=40, max_keepalive_connections=20)
+        )
+        
+        self.analyzer = JobAnalyzerFirebase(service_account_path, http_client=self._http)
         self.output_folder = output_folder
         self.auto_save_results = auto_save_results
         
         # Cola de procesamiento con información del tipo
-        self.queue = Queue()
+        self.queue = deque()
         
         # Resultados y estadísticas
         self.results = []
+        self._results_fp = None
+        self._results_path = None
         self.stats = {
             'total': 0,
             'procesados': 0,
             'exitosos': 0,
             'fallidos': 0,
             'no_anuncios': 0,
-            'en_cola': 0,
             'imagenes': 0,
             'textos': 0
         }
@@ -62,14 +95,16 @@ class BatchMultiFormatProcessor:
         # Control de estado
         self.is_processing = False
         self.is_paused = False
-        self.lock = Lock()
+        self.lock = Lock()  # Solo serializa a los productores (add_file/_enqueue)
         
         # Parámetros de configuración
         self.config = {
             'quality': 95,
             'upload_to_storage': True,
             'upload_to_firestore': True,
-            'timeout_ia': 30
+            'timeout_ia': 30,
+            'workers': 20,
+            'firestore_batch_size': 50
         }
         
         # Crear carpeta de resultados
@@ -107,32 +142,28 @@ class BatchMultiFormatProcessor:
         
         conteo = {'imagenes': 0, 'textos': 0}
         
-        # Función para procesar archivos
-        def procesar_archivos(directorio):
-            # Procesar imágenes
-            if include_images:
-                for ext in self.IMAGE_EXTENSIONS:
-                    for file_path in directorio.glob(f"*{ext}"):
-                        if file_path.is_file():
-                            self.add_file(str(file_path), file_type='image')
-                            conteo['imagenes'] += 1
+        # Tipos aceptados según los filtros
+        tipos = set()
+        if include_images:
+            tipos.add('image')
+        if include_texts:
+            tipos.add('text')
+        
+        # Recorrer el árbol con os.walk (basado en scandir, sin seguir symlinks)
+        match_ext = self._EXT_RE.search
+        join = os.path.join
+        
+        for root, dirs, files in os.walk(folder_path, followlinks=False):
+            if not recursive:
+                dirs[:] = []
             
-            # Procesar textos
-            if include_texts:
-                for ext in self.TEXT_EXTENSIONS:
-                    for file_path in directorio.glob(f"*{ext}"):
-                        if file_path.is_file():
-                            self.add_file(str(file_path), file_type='text')
-                            conteo['textos'] += 1
-        
-        # Procesar carpeta principal
-        procesar_archivos(folder)
-        
-        # Procesar subcarpetas si es recursivo
-        if recursive:
-            for subfolder in folder.rglob('*'):
-                if subfolder.is_dir():
-                    procesar_archivos(subfolder)
+            for name in files:
+                m = match_ext(name)
+                if m is None or m.lastgroup not in tipos:
+                    continue
+                tipo = m.lastgroup
+                self._enqueue(join(root, name), name, tipo)
+                conteo['imagenes' if tipo == 'image' else 'textos'] += 1
         
         total = conteo['imagenes'] + conteo['textos']
         print(f"\n✅ Se agregaron {total} archivos a la cola desde: {folder_path}")
@@ -152,39 +183,49 @@ class BatchMultiFormatProcessor:
         Returns:
             True si se agregó correctamente
         """
-        path = Path(file_path)
+        name = os.path.basename(file_path)
         
-        if not path.exists():
+        if not os.path.exists(file_path):
             print(f"❌ Archivo no encontrado: {file_path}")
             return False
         
         # Detectar tipo si no se especificó
         if file_type is None:
-            ext = path.suffix.lower()
-            if ext in self.IMAGE_EXTENSIONS:
+            ext = os.path.splitext(name)[1].lower()
+            if ext in self._IMAGE_EXT_SET:
                 file_type = 'image'
-            elif ext in self.TEXT_EXTENSIONS:
+            elif ext in self._TEXT_EXT_SET:
                 file_type = 'text'
             else:
                 print(f"⚠️  Extensión no soportada: {ext}")
                 return False
         
+        self._enqueue(file_path, name, file_type)
+        return True
+    
+    def _enqueue(self, file_path: str, name: str, file_type: str):
+        """
+        Agrega a la cola un archivo ya validado, sin volver a consultar el disco.
+        
+        Args:
+            file_path: Ruta del archivo
+            name: Nombre del archivo
+            file_type: 'image' o 'text'
+        """
         with self.lock:
-            self.queue.put({
+            self.queue.append({
                 'path': file_path,
                 'type': file_type,
-                'name': path.name
+                'name': name
             })
             self.stats['total'] += 1
-            self.stats['en_cola'] += 1
             if file_type == 'image':
                 self.stats['imagenes'] += 1
             else:
                 self.stats['textos'] += 1
         
         emoji = "📸" if file_type == 'image' else "📄"
-        print(f"➕ {emoji} Archivo agregado: {path.name}")
-        return True
+        log.debug("➕ %s Archivo agregado: %s", emoji, name)
     
     def _print_banner(self):
         """Imprime el banner inicial."""
@@ -198,19 +239,16 @@ class BatchMultiFormatProcessor:
         print("="*80 + "\n")
     
     def _print_progress(self, current: int, total: int, file_info: Dict):
-        """Imprime el progreso actual."""
+        """Registra el progreso actual en una sola línea."""
         porcentaje = (current / total * 100) if total > 0 else 0
         emoji = "📸" if file_info['type'] == 'image' else "📄"
-        tipo = "Imagen" if file_info['type'] == 'image' else "Texto"
         
-        print(f"\n{'='*80}")
-        print(f"📊 PROGRESO: {current}/{total} ({porcentaje:.1f}%)")
-        print(f"   {emoji} Archivo actual: {file_info['name']} ({tipo})")
-        print(f"   ✅ Exitosos: {self.stats['exitosos']}")
-        print(f"   ⚠️  No anuncios: {self.stats['no_anuncios']}")
-        print(f"   ❌ Fallidos: {self.stats['fallidos']}")
-        print(f"   📥 En cola: {self.stats['en_cola']}")
-        print("="*80)
+        log.info(
+            "📊 %d/%d (%.1f%%) %s %s | exitosos=%d no_anuncios=%d fallidos=%d en_cola=%d",
+            current, total, porcentaje, emoji, file_info['name'],
+            self.stats['exitosos'], self.stats['no_anuncios'],
+            self.stats['fallidos'], total - current
+        )
     
     def _print_summary(self, tiempo_total: float):
         """Imprime el resumen final."""
@@ -228,71 +266,118 @@ class BatchMultiFormatProcessor:
             print(f"   Tiempo promedio: {tiempo_total/self.stats['procesados']:.2f}s por archivo")
         print("="*80 + "\n")
     
-    def _clean_for_json(self, obj):
-        """Limpia un objeto para que sea serializable a JSON."""
-        if obj is None:
-            return None
-        elif isinstance(obj, (str, int, float, bool)):
-            return obj
-        elif isinstance(obj, dict):
-            return {k: self._clean_for_json(v) for k, v in obj.items()}
-        elif isinstance(obj, (list, tuple)):
-            return [self._clean_for_json(item) for item in obj]
-        elif isinstance(obj, datetime):
-            return obj.isoformat()
-        else:
-            try:
-                return str(obj)
-            except:
-                return None
-    
-    def _save_results(self):
-        """Guarda los resultados en un archivo JSON."""
+    def _open_results(self):
+        """Abre el archivo NDJSON donde se irán agregando los resultados."""
+        self._results_fp = None
         if not self.auto_save_results:
             return
         
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"resultados_multiformat_{timestamp}.json"
-        filepath = os.path.join(self.output_folder, filename)
+        filename = f"resultados_multiformat_{timestamp}.ndjson"
+        self._results_path = os.path.join(self.output_folder, filename)
         
-        data = {
-            'fecha': datetime.now().isoformat(),
-            'estadisticas': self._clean_for_json(self.stats),
-            'resultados': self._clean_for_json(self.results)
-        }
+        try:
+            self._results_fp = open(self._results_path, 'ab')
+        except OSError as e:
+            print(f"❌ No se pudo abrir el archivo de resultados: {str(e)}")
+    
+    def _write_result(self, data: Dict[str, Any]):
+        """Agrega una línea al archivo de resultados (solo desde el hilo consumidor)."""
+        if self._results_fp is None:
+            return
         
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            print(f"💾 Resultados guardados en: {filepath}")
+            self._results_fp.write(orjson.dumps(data, default=str) + b'\n')
         except Exception as e:
-            print(f"❌ Error al guardar resultados: {str(e)}")
-            try:
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False, default=str)
-                print(f"💾 Resultados guardados (modo seguro) en: {filepath}")
-            except Exception as e2:
-                print(f"❌ No se pudieron guardar los resultados: {str(e2)}")
+            print(f"❌ Error al guardar resultado: {str(e)}")
+    
+    def _save_results(self):
+        """Cierra el archivo de resultados agregando las estadísticas como última línea."""
+        if self._results_fp is None:
+            return
+        
+        self._write_result({
+            'fecha': datetime.now(),
+            'estadisticas': self.get_stats()
+        })
+        self._results_fp.close()
+        self._results_fp = None
+        
+        print(f"💾 Resultados guardados en: {self._results_path}")
     
     def _read_text_file(self, file_path: str) -> str:
         """Lee el contenido de un archivo de texto."""
+        # Lectura única sin buffer; el fallback decodifica desde memoria
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            fd = os.open(file_path, os.O_RDONLY)
+            try:
+                size = os.fstat(fd).st_size
+                if size > MMAP_THRESHOLD:
+                    # Archivos grandes: decodificar directo desde el mapeo,
+                    # sin copia intermedia a bytes
+                    with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as data:
+                        try:
+                            return str(data, 'utf-8')
+                        except UnicodeDecodeError:
+                            return str(data, 'latin-1', 'replace')
+                data = os.read(fd, size)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            raise Exception(f"Error al leer archivo: {str(e)}")
+        
+        try:
+            return data.decode('utf-8')
         except UnicodeDecodeError:
             # Intentar con otra codificación
-            try:
-                with open(file_path, 'r', encoding='latin-1') as f:
-                    return f.read()
-            except Exception as e:
-                raise Exception(f"Error al leer archivo: {str(e)}")
+            return data.decode('latin-1', errors='replace')
+    
+    def _build_handlers(
+        self,
+        prefetched: Optional[Dict[str, Future]] = None
+    ) -> Dict[str, Callable[[str], Dict[str, Any]]]:
+        """
+        Prepara, con la configuración actual, la función que procesa cada tipo.
+        
+        Args:
+            prefetched: Lecturas de texto ya encargadas (ruta → Future con el texto);
+                las rutas que no estén se leen en el momento
+        
+        Returns:
+            Diccionario tipo → función que recibe la ruta y devuelve los datos
+        """
+        analyzer = self.analyzer
+        timeout_ia = self.config['timeout_ia']
+        read_text = self._read_text_file
+        
+        # Firestore se escribe en lote desde process_queue
+        process_image = partial(
+            analyzer.process_job_image,
+            quality=self.config['quality'],
+            upload_to_storage=self.config['upload_to_storage'],
+            upload_to_firestore=False,
+            timeout_ia=timeout_ia
+        )
+        
+        text_call = partial(
+            analyzer.process_job_text,
+            upload_to_firestore=False,
+            timeout_ia=timeout_ia
+        )
+        
+        def process_text(file_path):
+            future = prefetched.pop(file_path, None) if prefetched else None
+            return text_call(future.result() if future is not None else read_text(file_path))
+        
+        return {'image': process_image, 'text': process_text}
     
-    def _process_single_file(self, file_info: Dict) -> Dict[str, Any]:
+    def _process_single_file(self, file_info: Dict, handlers: Optional[Dict[str, Callable]] = None) -> Dict[str, Any]:
         """
         Procesa un archivo individual (imagen o texto).
         
         Args:
             file_info: Diccionario con información del archivo
+            handlers: Funciones por tipo (ver _build_handlers); si None, se crean
         
         Returns:
             Diccionario con el resultado del procesamiento
@@ -311,65 +396,104 @@ class BatchMultiFormatProcessor:
             'error': None
         }
         
+        if handlers is None:
+            handlers = self._build_handlers()
+        
         try:
             # Procesar según el tipo
-            if file_type == 'image':
-                datos = self.analyzer.process_job_image(
-                    file_path,
-                    quality=self.config['quality'],
-                    upload_to_storage=self.config['upload_to_storage'],
-                    upload_to_firestore=self.config['upload_to_firestore'],
-                    timeout_ia=self.config['timeout_ia']
-                )
-            else:  # text
-                text_content = self._read_text_file(file_path)
-                datos = self.analyzer.process_job_text(
-                    text_content,
-                    upload_to_firestore=self.config['upload_to_firestore'],
-                    timeout_ia=self.config['timeout_ia']
-                )
+            datos = handlers[file_type](file_path)
             
             resultado['datos'] = datos
             resultado['exito'] = True
             resultado['es_anuncio'] = datos.get('es_anuncio_empleo', False)
             
             if resultado['es_anuncio']:
-                self.stats['exitosos'] += 1
-                print(f"   ✅ Anuncio detectado: {datos.get('position', 'N/A')}")
+                log.debug("✅ %s: anuncio detectado: %s", file_info['name'], datos.get('position', 'N/A'))
             else:
-                self.stats['no_anuncios'] += 1
-                print(f"   ⚠️  No es anuncio: {datos.get('razon', 'N/A')}")
+                log.debug("⚠️  %s: no es anuncio: %s", file_info['name'], datos.get('razon', 'N/A'))
                 
         except Exception as e:
             resultado['error'] = str(e)
-            self.stats['fallidos'] += 1
-            print(f"   ❌ Error: {str(e)}")
+            log.warning("❌ %s: error: %s", file_info['name'], str(e))
         
         return resultado
     
+    def _mark_firestore_failed(self, resultado: Dict[str, Any], error: str):
+        """Pasa a fallido un resultado cuyo documento no llegó a Firestore."""
+        resultado['exito'] = False
+        resultado['error'] = f"Firestore: {error}"
+        self.stats['exitosos'] -= 1
+        self.stats['fallidos'] += 1
+    
+    def _flush_firestore(self, pendientes: List[Dict[str, Any]]):
+        """
+        Escribe en Firestore, en una sola tanda, los anuncios acumulados.
+        
+        Args:
+            pendientes: Resultados exitosos cuyos datos aún no se guardaron
+        """
+        if not pendientes:
+            return
+        
+        from components.firebase_manager import FirestoreWriteError
+        
+        try:
+            doc_ids = self.analyzer.firebase_manager.upload_many_to_firestore(
+                [resultado['datos'] for resultado in pendientes],
+                collection='jobs',
+                auto_timestamps=True
+            )
+            for resultado, doc_id in zip(pendientes, doc_ids):
+                resultado['datos']['firestoreDocId'] = doc_id
+        except FirestoreWriteError as e:
+            # Solo fallaron algunos documentos: el resto sí quedó guardado
+            print(f"❌ Error al guardar lote en Firestore: {str(e)}")
+            for resultado, doc_id in zip(pendientes, e.doc_ids):
+                if doc_id in e.failed:
+                    self._mark_firestore_failed(resultado, e.failed[doc_id])
+                else:
+                    resultado['datos']['firestoreDocId'] = doc_id
+        except Exception as e:
+            print(f"❌ Error al guardar lote en Firestore: {str(e)}")
+            for resultado in pendientes:
+                self._mark_firestore_failed(resultado, str(e))
+        
+        # Los resultados ya son definitivos: persistirlos
+        for resultado in pendientes:
+            self._write_result(resultado)
+        
+        pendientes.clear()
+    
     def process_queue(
         self,
         quality: int = 95,
         upload_to_storage: bool = True,
         upload_to_firestore: bool = True,
         timeout_ia: int = 30,
-        pause_between: float = 0.5
+        pause_between: float = 0.5,
+        workers: int = 20
     ):
         """
-        Procesa todos los archivos en la cola.
+        Procesa todos los archivos en la cola en paralelo.
+        
+        Cada archivo pasa la mayor parte del tiempo esperando a la IA, a Storage
+        y a Firestore, así que se procesan varios a la vez en un pool de hilos.
+        Los archivos agregados con add_file durante el procesamiento se
+        incorporan a la misma ejecución.
         
         Args:
             quality: Calidad de conversión WebP para imágenes (0-100)
             upload_to_storage: Si True, sube imágenes a Firebase Storage
             upload_to_firestore: Si True, guarda datos en Firestore
             timeout_ia: Timeout para las llamadas a la IA en segundos
-            pause_between: Segundos de pausa entre cada archivo
+            pause_between: Segundos de pausa de cada worker entre archivos
+            workers: Número de archivos procesados en paralelo
         """
         if self.is_processing:
             print("⚠️  Ya hay un procesamiento en curso")
             return
         
-        if self.queue.empty():
+        if not self.queue:
             print("⚠️  La cola está vacía. Agrega archivos primero.")
             return
         
@@ -381,37 +505,94 @@ class BatchMultiFormatProcessor:
             'quality': quality,
             'upload_to_storage': upload_to_storage,
             'upload_to_firestore': upload_to_firestore,
-            'timeout_ia': timeout_ia
+            'timeout_ia': timeout_ia,
+            'workers': workers
         })
         
         self._print_banner()
+        self._open_results()
         
-        # Procesar cola
-        while not self.queue.empty():
+        # Etapa de lectura: los textos se cargan en memoria por adelantado para
+        # que los workers del analizador solo esperen a la red
+        read_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="BatchReader")
+        prefetched = {}
+        
+        handlers = self._build_handlers(prefetched)
+        
+        def procesar(file_info):
             # Verificar si está pausado
             while self.is_paused:
                 time.sleep(0.5)
             
-            file_info = self.queue.get()
+            resultado = self._process_single_file(file_info, handlers)
             
-            with self.lock:
-                self.stats['en_cola'] -= 1
-                self.stats['procesados'] += 1
+            # Pausa entre archivos
+            if pause_between > 0:
+                time.sleep(pause_between)
             
-            # Mostrar progreso
-            self._print_progress(
-                self.stats['procesados'],
-                self.stats['total'],
-                file_info
-            )
+            return resultado
+        
+        # Anuncios pendientes de escribir en Firestore
+        pendientes = []
+        
+        stats = self.stats
+        
+        # Procesar cola
+        executor = ThreadPoolExecutor(max_workers=max(1, self.config['workers']))
+        futures = {}
+        
+        def tomar_nuevos():
+            # Vaciar la cola (incluye archivos agregados durante el procesamiento)
+            with self.lock:
+                nuevos = list(self.queue)
+                self.queue.clear()
             
-            # Procesar archivo
-            resultado = self._process_single_file(file_info)
-            self.results.append(resultado)
+            for file_info in nuevos:
+                path = file_info['path']
+                if file_info['type'] == 'text' and path not in prefetched:
+                    prefetched[path] = read_pool.submit(self._read_text_file, path)
+                futures[executor.submit(procesar, file_info)] = file_info
+        
+        try:
+            tomar_nuevos()
             
-            # Pausa entre archivos
-            if pause_between > 0 and not self.queue.empty():
-                time.sleep(pause_between)
+            while futures:
+                terminados, _ = wait(futures, return_when=FIRST_COMPLETED)
+                
+                for future in terminados:
+                    file_info = futures.pop(future)
+                    resultado = future.result()
+                    
+                    # Este hilo es el único que escribe estos contadores: sin lock
+                    stats['procesados'] += 1
+                    if resultado['error']:
+                        stats['fallidos'] += 1
+                    elif resultado['es_anuncio']:
+                        stats['exitosos'] += 1
+                    else:
+                        stats['no_anuncios'] += 1
+                    self.results.append(resultado)
+                    
+                    # Acumular escrituras y confirmarlas por lotes
+                    if self.config['upload_to_firestore'] and resultado['es_anuncio'] and not resultado['error']:
+                        pendientes.append(resultado)
+                        if len(pendientes) >= self.config['firestore_batch_size']:
+                            self._flush_firestore(pendientes)
+                    else:
+                        self._write_result(resultado)
+                    
+                    # Mostrar progreso cada ~1% del total actual (puede crecer)
+                    total = stats['total']
+                    if stats['procesados'] % max(1, total // 100) == 0 or stats['procesados'] == total:
+                        self._print_progress(stats['procesados'], total, file_info)
+                        sys.stdout.flush()
+                
+                tomar_nuevos()
+        finally:
+            executor.shutdown()
+        
+        read_pool.shutdown()
+        self._flush_firestore(pendientes)
         
         # Resumen final
         tiempo_total = time.time() - tiempo_inicio
@@ -434,20 +615,20 @@ class BatchMultiFormatProcessor:
     
     def get_stats(self) -> Dict[str, int]:
         """Retorna las estadísticas actuales."""
-        return self.stats.copy()
+        stats = self.stats.copy()
+        stats['en_cola'] = stats['total'] - stats['procesados']
+        return stats
     
     def clear_queue(self):
         """Limpia la cola de procesamiento."""
         with self.lock:
-            while not self.queue.empty():
-                self.queue.get()
+            self.queue.clear()
             self.stats = {
                 'total': 0,
                 'procesados': 0,
                 'exitosos': 0,
                 'fallidos': 0,
                 'no_anuncios': 0,
-                'en_cola': 0,
                 'imagenes': 0,
                 'textos': 0
             }
@@ -494,6 +675,8 @@ def procesar_carpeta_completa(
 
 # Ejemplo de uso
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
     print("\n" + "="*80)
     print("EJEMPLO 1: Procesar carpeta con imágenes y textos")
     print("="*80 + "\n")
@@ -525,7 +708,7 @@ if __name__ == "__main__":
     # Ver estadísticas finales
     print("\n📊 Estadísticas finales:")
     stats = processor.get_stats()
-    print(json.dumps(stats, indent=2))
+    print(orjson.dumps(stats, option=orjson.OPT_INDENT_2).decode())
     
     print("\n" + "="*80)
     print("EJEMPLO 2: Uso simplificado con función helper")
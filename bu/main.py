@@ -1,136 +1,207 @@
-import json
-import firebase_admin
-from firebase_admin import credentials, firestore, storage
-from datetime import datetime
+import orjson
+import os
+import asyncio
+import logging
+import sys
 import requests
+from requests.adapters import HTTPAdapter
+import httpx
 import base64
-import re
 from PIL import Image
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, List, Union
 from io import BytesIO
+import queue
+from concurrent.futures import ThreadPoolExecutor
 import time
+import random
+
+# Permitir ejecutar este script directamente (python bu/main.py) usando los
+# componentes compartidos de la raíz del proyecto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from components.firebase_manager import FirestoreWriteError, get_firebase_manager
+from components.ollama_analyzer import iter_json_objects
+
+log = logging.getLogger(__name__)
+
+# Peticiones simultáneas al servidor Ollama. Debe coincidir con OLLAMA_NUM_PARALLEL
+# del servidor (se recomienda OLLAMA_NUM_PARALLEL=8 y OLLAMA_MAX_LOADED_MODELS=1)
+OLLAMA_NUM_PARALLEL = int(os.getenv('OLLAMA_NUM_PARALLEL', '8'))
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Reintentos ante errores transitorios de la IA
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504, 529})
+MAX_INTENTOS_IA = 5
+
+# Las entradas que ya son WebP y no superan este tamaño se usan tal cual
+WEBP_PASSTHROUGH_MAX_BYTES = 1 * 1024 * 1024
+
+# Lado mayor máximo antes de codificar; más resolución no aporta nada al modelo
+WEBP_MAX_SIDE = 2048
+
+# Buffers WebP reutilizables que se conservan entre conversiones
+BUFFER_POOL_SIZE = 16
+
+# Marcador que ocupa el lugar de la imagen en el JSON preserializado
+_IMAGE_PLACEHOLDER = "__IMAGEN_BASE64__"
 
 
 class JobAnalyzerFirebase:
     """Sistema completo para analizar anuncios de empleo y subirlos a Firebase (sin archivos locales)."""
     
+    JOB_PROMPT = """Analiza la imagen adjunta y determina si es un anuncio de empleo.
+
+Si NO es un anuncio de empleo, responde ÚNICAMENTE:
+{
+  "es_anuncio_empleo": false,
+  "razon": "Explicación breve de por qué no es un anuncio de empleo"
+}
+
+Si SÍ es un anuncio de empleo, responde en el siguiente formato JSON (si algún dato no está presente, deja el campo vacío ""):
+{
+  "source": "aiGenerated",
+  "es_anuncio_empleo": true,
+  "position": "nombre del puesto",
+  "title": "título completo incluyendo el puesto",
+  "description": "descripción breve sintetizando todos los datos disponibles del anuncio",
+  "city": "ciudad",
+  "direction": "dirección completa",
+  "company": "nombre de la empresa",
+  "vacancies": "número de vacantes",
+  "requeriments": "requisitos del puesto",
+  "salary_range": "rango salarial",
+  "phoneNumber": "teléfono de contacto",
+  "email": "correo electrónico",
+  "website": "sitio web",
+  "workingHours": "horario de trabajo"
+}
+
+Responde SOLO con el JSON, sin texto adicional."""
+    
+    # Pool de BytesIO: reutilizar la memoria ya reservada evita realocar
+    # buffers de varios MB en cada conversión
+    _buffer_pool: "queue.SimpleQueue[BytesIO]" = queue.SimpleQueue()
+    
     def __init__(self, service_account_path: str = 'serviceAccountKey.json'):
         """
         Inicializa la conexión con Firebase.
         
+        Storage y Firestore se delegan en FirebaseManager.
+        
         Args:
             service_account_path: Ruta al archivo de credenciales de Firebase
         """
-        if not firebase_admin._apps:
-            cred = credentials.Certificate(service_account_path)
-            firebase_admin.initialize_app(cred, {
-                'storageBucket': 'jomach-f6258.firebasestorage.app'
-            })
-        
-        self.db = firestore.client()
-        self.bucket = storage.bucket()
-        print("✅ Firebase inicializado correctamente")
+        os.environ.setdefault('FIREBASE_STORAGE_BUCKET', 'jomach-f6258.firebasestorage.app')
+        self.fb = get_firebase_manager(service_account_path)
+        
+        # Sesión HTTP persistente: reutiliza conexiones con Ollama entre
+        # llamadas y reintentos (los reintentos los gestiona este módulo)
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=0)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+    
+    @classmethod
+    def _acquire_buffer(cls) -> BytesIO:
+        """Toma un buffer del pool o crea uno nuevo."""
+        try:
+            return cls._buffer_pool.get_nowait()
+        except queue.Empty:
+            return BytesIO()
+    
+    @classmethod
+    def _release_buffer(cls, buffer: BytesIO):
+        """Devuelve un buffer al pool (sin truncar: se conserva su capacidad)."""
+        if cls._buffer_pool.qsize() < BUFFER_POOL_SIZE:
+            buffer.seek(0)
+            cls._buffer_pool.put(buffer)
     
     def convert_to_webp_memory(
         self,
         image_data: Union[str, bytes, BytesIO],
-        quality: int = 95
+        quality: int = 80,
+        method: int = 4
     ) -> BytesIO:
         """
         Convierte una imagen a formato WebP en memoria (sin guardar archivo).
         
+        Si la entrada ya es WebP y no supera WEBP_PASSTHROUGH_MAX_BYTES se
+        devuelve sin recodificar (se ignoran `quality` y `method`). Las imágenes
+        con un lado mayor que WEBP_MAX_SIDE se reducen antes de codificar.
+        
         Args:
             image_data: Ruta del archivo, bytes o BytesIO de la imagen
             quality: Calidad de conversión (0-100)
+            method: Esfuerzo del codificador WebP (0-6). 4 da casi el mismo tamaño
+                que 6 en una fracción del tiempo; usar 6 solo para archivar
         
         Returns:
-            BytesIO con la imagen WebP
+            BytesIO con la imagen WebP (del pool; devolver con _release_buffer)
         """
-        # Cargar imagen según el tipo de entrada
-        if isinstance(image_data, str):
+        # Reducir cualquier entrada a un único bytes y abrirlo una sola vez
+        if isinstance(image_data, bytes):
+            data = image_data
+        elif isinstance(image_data, str):
             with open(image_data, 'rb') as f:
-                img = Image.open(f)
-                img.load()  # Cargar completamente antes de cerrar el archivo
-        elif isinstance(image_data, bytes):
-            img = Image.open(BytesIO(image_data))
+                data = f.read()
         else:
-            img = Image.open(image_data)
-        
-        # Convertir modo de color si es necesario
-        if img.mode in ('RGBA', 'LA', 'P'):
-            if img.mode == 'P':
-                img = img.convert('RGBA')
-        elif img.mode not in ('RGB', 'RGBA'):
+            data = image_data.getvalue()
+        original_size = len(data)
+        
+        # Ya es WebP (cabecera RIFF....WEBP) y pequeña: evitar decodificar y recodificar
+        if data[8:12] == b'WEBP' and data[:4] == b'RIFF' and original_size <= WEBP_PASSTHROUGH_MAX_BYTES:
+            log.debug("✓ Imagen ya en WebP (%.2f KB), se usa sin recodificar", original_size / 1024)
+            return BytesIO(data)
+        
+        img = Image.open(BytesIO(data))
+        original_dims = img.size
+        
+        # En JPEG, decodificar ya a escala reducida (1/2, 1/4, 1/8) si sobra resolución
+        if max(img.size) > WEBP_MAX_SIDE:
+            img.draft(img.mode, (WEBP_MAX_SIDE, WEBP_MAX_SIDE))
+        
+        # Convertir modo de color si es necesario (WebP admite RGB, RGBA y LA).
+        # Las paletas sin transparencia pasan a RGB: un canal alfa vacío solo
+        # añade trabajo al codificador
+        if img.mode == 'P':
+            img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+        elif img.mode not in ('RGB', 'RGBA', 'LA'):
             img = img.convert('RGB')
         
-        # Guardar en memoria
-        output = BytesIO()
-        img.save(output, format='WEBP', quality=quality, method=6, lossless=False)
+        # Reducir imágenes demasiado grandes (conserva la proporción)
+        if max(img.size) > WEBP_MAX_SIDE:
+            img.thumbnail((WEBP_MAX_SIDE, WEBP_MAX_SIDE), Image.Resampling.LANCZOS)
+        
+        # Guardar en memoria sobre un buffer reutilizado, recortando lo que
+        # quedara de una imagen anterior más grande
+        output = self._acquire_buffer()
+        img.save(output, format='WEBP', quality=quality, method=method, lossless=False)
+        compressed_size = output.tell()
+        output.truncate()
         output.seek(0)
         
-        # Calcular tamaños (si viene de archivo)
-        if isinstance(image_data, str):
-            import os
-            original_size = os.path.getsize(image_data)
-            compressed_size = len(output.getvalue())
+        if log.isEnabledFor(logging.DEBUG):
             compression_ratio = (1 - compressed_size / original_size) * 100
-            
-            print(f"✓ Imagen convertida a WebP en memoria:")
-            print(f"  Original: {original_size / 1024:.2f} KB → WebP: {compressed_size / 1024:.2f} KB")
-            print(f"  Reducción: {compression_ratio:.2f}%")
-        else:
-            print(f"✓ Imagen convertida a WebP en memoria")
+            log.debug(
+                "✓ Imagen convertida a WebP en memoria: %dx%d %.2f KB → %dx%d %.2f KB (reducción %.2f%%)",
+                original_dims[0], original_dims[1], original_size / 1024,
+                img.size[0], img.size[1], compressed_size / 1024, compression_ratio
+            )
         
         return output
     
-    def upload_image_to_storage_memory(
-        self,
-        image_buffer: BytesIO,
-        filename_prefix: str = "job",
-        folder: str = "jobs"
-    ) -> str:
-        """
-        Sube una imagen a Firebase Storage desde memoria.
-        
-        Args:
-            image_buffer: BytesIO con la imagen
-            filename_prefix: Prefijo para el nombre del archivo
-            folder: Carpeta en Storage
-        
-        Returns:
-            URL pública de la imagen
-        """
-        timestamp = int(datetime.now().timestamp() * 1000)
-        filename = f"{filename_prefix}_{timestamp}.webp"
-        blob_path = f"{folder}/{filename}"
-        
-        # Subir desde memoria
-        blob = self.bucket.blob(blob_path)
-        image_buffer.seek(0)
-        blob.upload_from_file(image_buffer, content_type='image/webp')
-        
-        # Hacer público
-        blob.make_public()
-        public_url = blob.public_url
-        
-        print(f"✓ Imagen subida a Firebase Storage:")
-        print(f"  URL: {public_url}")
-        
-        return public_url
-    
     def countdown_timer(self, seconds: int, mensaje: str = "Reintentando en"):
         """
-        Muestra un contador regresivo en consola.
+        Espera los segundos indicados informando una sola vez en consola.
         
         Args:
             seconds: Segundos a esperar
-            mensaje: Mensaje a mostrar antes del contador
+            mensaje: Mensaje a mostrar antes de la espera
         """
-        print(f"\n⏳ {mensaje}:", end=" ", flush=True)
-        for remaining in range(seconds, 0, -1):
-            print(f"\r⏳ {mensaje}: {remaining} segundos...", end="", flush=True)
-            time.sleep(1)
-        print(f"\r✓ Esperando completado ({seconds}s)          ")
+        log.info("⏳ %s: %s segundos...", mensaje, seconds)
+        time.sleep(seconds)
+        log.debug("✓ Esperando completado (%ss)", seconds)
     
     def analyze_image_with_ollama(
         self,
@@ -147,95 +218,194 @@ class JobAnalyzerFirebase:
             image_data: Ruta, bytes o BytesIO de la imagen
             modelo: Modelo de Ollama a usar
             url_ollama: URL del servidor Ollama
-            max_intentos: Número máximo de intentos
-            tiempo_espera: Segundos a esperar entre reintentos
+            max_intentos: Número máximo de intentos (como mucho MAX_INTENTOS_IA)
+            tiempo_espera: Espera máxima en segundos entre reintentos
         
         Returns:
             Respuesta del modelo
         """
-        prompt = """Analiza la imagen adjunta y determina si es un anuncio de empleo.
-
-Si NO es un anuncio de empleo, responde ÚNICAMENTE:
-{
-  "es_anuncio_empleo": false,
-  "razon": "Explicación breve de por qué no es un anuncio de empleo"
-}
-
-Si SÍ es un anuncio de empleo, responde en el siguiente formato JSON (si algún dato no está presente, deja el campo vacío ""):
-{
-  "source": "aiGenerated",
-  "es_anuncio_empleo": true,
-  "position": "nombre del puesto",
-  "title": "título completo incluyendo el puesto",
-  "description": "descripción breve sintetizando todos los datos disponibles del anuncio",
-  "city": "ciudad",
-  "direction": "dirección completa",
-  "company": "nombre de la empresa",
-  "vacancies": "número de vacantes",
-  "requeriments": "requisitos del puesto",
-  "salary_range": "rango salarial",
-  "phoneNumber": "teléfono de contacto",
-  "email": "correo electrónico",
-  "website": "sitio web",
-  "workingHours": "horario de trabajo"
-}
-
-Responde SOLO con el JSON, sin texto adicional."""
+        body = self._build_ollama_body(image_data, modelo)
+        max_intentos = min(max_intentos, MAX_INTENTOS_IA)
         
-        # Convertir a base64 según el tipo de entrada
+        # Sistema de reintentos con backoff exponencial y jitter
+        for intento in range(1, max_intentos + 1):
+            try:
+                log.debug("🔄 Intento %d/%d - Consultando IA...", intento, max_intentos)
+                
+                response = self._session.post(url_ollama, data=body, headers=JSON_HEADERS, timeout=120)
+                response.raise_for_status()
+                
+                log.debug("✓ Respuesta recibida exitosamente en intento %d", intento)
+                return orjson.loads(response.content)
+            
+            except requests.exceptions.RequestException as e:
+                log.warning("❌ Error en intento %d/%d: %s", intento, max_intentos, e)
+                
+                status = e.response.status_code if e.response is not None else None
+                reintentable = status in RETRYABLE_STATUS if status is not None else isinstance(
+                    e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+                )
+                
+                if reintentable and intento < max_intentos:
+                    espera = self._backoff(intento, tiempo_espera)
+                    log.info("⏳ Reintentando en %.1fs...", espera)
+                    time.sleep(espera)
+                else:
+                    log.error("💥 No se pudo analizar la imagen tras %d intentos", intento)
+                    raise Exception(f"No se pudo analizar la imagen después de {intento} intentos: {str(e)}")
+    
+    @staticmethod
+    def _backoff(intento: int, maximo: float) -> float:
+        """Segundos de espera antes del siguiente intento: crece con el intento, con jitter."""
+        return min(maximo, random.uniform(2, 4) * intento)
+    
+    def _build_ollama_body(
+        self,
+        image_data: Union[str, bytes, BytesIO],
+        modelo: str
+    ) -> bytes:
+        """
+        Construye el cuerpo JSON de /api/chat con la imagen en base64.
+        
+        La API REST de Ollama exige base64, pero la imagen se codifica directo
+        desde su buffer y se inserta como bytes en el JSON: no se crea un str
+        intermedio ni el serializador recorre la cadena base64 para escaparla.
+        """
+        # Obtener los bytes sin copiar el buffer cuando es posible
         if isinstance(image_data, str):
             with open(image_data, "rb") as f:
-                img_base64 = base64.b64encode(f.read()).decode()
-        elif isinstance(image_data, bytes):
-            img_base64 = base64.b64encode(image_data).decode()
+                raw = f.read()
+        elif isinstance(image_data, (bytes, bytearray)):
+            raw = image_data
         else:
-            image_data.seek(0)
-            img_base64 = base64.b64encode(image_data.read()).decode()
+            raw = image_data.getbuffer()
         
         payload = {
             "model": modelo,
             "messages": [
                 {
                     "role": "user",
-                    "content": prompt,
-                    "images": [img_base64]
+                    "content": self.JOB_PROMPT,
+                    "images": [_IMAGE_PLACEHOLDER]
                 }
             ],
             "stream": False
         }
+        antes, despues = orjson.dumps(payload).rsplit(b'"' + _IMAGE_PLACEHOLDER.encode() + b'"', 1)
+        
+        return b''.join((antes, b'"', base64.b64encode(raw), b'"', despues))
+    
+    async def analyze_image_with_ollama_async(
+        self,
+        client: httpx.AsyncClient,
+        image_data: Union[str, bytes, BytesIO],
+        modelo: str = "qwen3-vl:235b-cloud",
+        url_ollama: str = "http://localhost:11434/api/chat",
+        max_intentos: int = 3,
+        tiempo_espera: int = 30,
+        semaforo: Optional[asyncio.Semaphore] = None
+    ) -> Dict[str, Any]:
+        """
+        Versión asíncrona de analyze_image_with_ollama.
+        
+        Args:
+            client: Cliente HTTP asíncrono compartido entre las peticiones del lote
+            image_data: Ruta, bytes o BytesIO de la imagen
+            modelo: Modelo de Ollama a usar
+            url_ollama: URL del servidor Ollama
+            max_intentos: Número máximo de intentos (como mucho MAX_INTENTOS_IA)
+            tiempo_espera: Espera máxima en segundos entre reintentos
+            semaforo: Limita las peticiones en vuelo del lote (por defecto
+                OLLAMA_NUM_PARALLEL solo para esta llamada)
+        
+        Returns:
+            Respuesta del modelo
+        """
+        body = self._build_ollama_body(image_data, modelo)
+        
+        max_intentos = min(max_intentos, MAX_INTENTOS_IA)
+        if semaforo is None:
+            semaforo = asyncio.Semaphore(OLLAMA_NUM_PARALLEL)
         
-        # Sistema de reintentos con contador
         for intento in range(1, max_intentos + 1):
             try:
-                print(f"🔄 Intento {intento}/{max_intentos} - Consultando IA...")
-                
-                response = requests.post(url_ollama, json=payload, timeout=120)
+                # El turno se libera durante la espera entre reintentos, para que
+                # un 429/503 no bloquee a las demás imágenes
+                async with semaforo:
+                    response = await client.post(url_ollama, content=body, headers=JSON_HEADERS, timeout=120)
                 response.raise_for_status()
+                return orjson.loads(response.content)
+            
+            except httpx.HTTPError as e:
+                log.warning("❌ Error en intento %d/%d: %s", intento, max_intentos, e)
                 
-                print(f"✓ Respuesta recibida exitosamente en intento {intento}")
-                return response.json()
-                
-            except requests.exceptions.RequestException as e:
-                print(f"\n❌ Error en intento {intento}/{max_intentos}: {str(e)}")
+                if isinstance(e, httpx.HTTPStatusError):
+                    reintentable = e.response.status_code in RETRYABLE_STATUS
+                else:
+                    reintentable = isinstance(e, httpx.TransportError)
                 
-                if intento < max_intentos:
-                    self.countdown_timer(tiempo_espera, f"Esperando {tiempo_espera}s antes del siguiente intento")
+                if reintentable and intento < max_intentos:
+                    await asyncio.sleep(self._backoff(intento, tiempo_espera))
                 else:
-                    print(f"\n💥 Todos los intentos fallaron después de {max_intentos} intentos")
-                    raise Exception(f"No se pudo analizar la imagen después de {max_intentos} intentos: {str(e)}")
+                    raise Exception(f"No se pudo analizar la imagen después de {intento} intentos: {str(e)}")
+    
+    async def analyze_images_batch(
+        self,
+        image_list: List[Union[str, bytes, BytesIO]],
+        modelo: str = "qwen3-vl:235b-cloud",
+        url_ollama: str = "http://localhost:11434/api/chat",
+        max_intentos: int = 3,
+        tiempo_espera: int = 30
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Analiza varias imágenes con Ollama de forma concurrente.
+        
+        Un semáforo de OLLAMA_NUM_PARALLEL turnos (igual al pool del cliente)
+        limita las peticiones en vuelo a las que el servidor puede atender; el
+        resto espera su turno sin que corra su timeout.
+        
+        Args:
+            image_list: Lista de rutas, bytes o BytesIO de las imágenes
+            modelo: Modelo de Ollama a usar
+            url_ollama: URL del servidor Ollama
+            max_intentos: Número máximo de intentos por imagen
+            tiempo_espera: Espera máxima en segundos entre reintentos
+        
+        Returns:
+            Lista con la respuesta del modelo (o la excepción) de cada imagen, en orden
+        """
+        limits = httpx.Limits(
+            max_connections=OLLAMA_NUM_PARALLEL,
+            max_keepalive_connections=OLLAMA_NUM_PARALLEL
+        )
+        # Timeout None en el pool: las peticiones esperan turno sin fallar
+        timeout = httpx.Timeout(120, pool=None)
+        
+        # Se crea aquí y no en __init__: cada asyncio.run usa un bucle nuevo
+        semaforo = asyncio.Semaphore(OLLAMA_NUM_PARALLEL)
+        
+        async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+            return await asyncio.gather(
+                *[
+                    self.analyze_image_with_ollama_async(
+                        client, image_data, modelo, url_ollama, max_intentos, tiempo_espera, semaforo
+                    )
+                    for image_data in image_list
+                ],
+                return_exceptions=True
+            )
     
     def parse_json_response(self, contenido: str) -> Dict[str, Any]:
         """Extrae y parsea el JSON de la respuesta del modelo."""
         try:
-            return json.loads(contenido)
-        except json.JSONDecodeError:
-            json_pattern = r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}'
-            matches = re.findall(json_pattern, contenido, re.DOTALL)
-            
-            for match in matches:
+            return orjson.loads(contenido)
+        except orjson.JSONDecodeError:
+            # Objetos balanceados del texto en una sola pasada lineal (sin la
+            # regex anidada, que podía disparar backtracking con JSON truncado)
+            for candidato in iter_json_objects(contenido):
                 try:
-                    return json.loads(match)
-                except json.JSONDecodeError:
+                    return orjson.loads(candidato)
+                except orjson.JSONDecodeError:
                     continue
             
             return {
@@ -243,41 +413,6 @@ Responde SOLO con el JSON, sin texto adicional."""
                 "contenido_original": contenido
             }
     
-    def upload_to_firestore(
-        self,
-        data: Dict[str, Any],
-        collection: str = 'jobs',
-        doc_id: Optional[str] = None
-    ) -> str:
-        """
-        Sube datos a Firestore.
-        
-        Args:
-            data: Diccionario con los datos
-            collection: Nombre de la colección
-            doc_id: ID personalizado (opcional)
-        
-        Returns:
-            ID del documento creado
-        """
-        data['createdAt'] = firestore.SERVER_TIMESTAMP
-        data['updatedAt'] = firestore.SERVER_TIMESTAMP
-        
-        if doc_id is None:
-            city = data.get('city', 'unknown').lower().replace(' ', '_')
-            position = data.get('position', 'job').lower().replace(' ', '_')
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            doc_id = f"{position}_{city}_{timestamp}"
-        
-        doc_ref = self.db.collection(collection).document(doc_id)
-        doc_ref.set(data)
-        
-        print(f"✓ Documento creado en Firestore:")
-        print(f"  ID: {doc_id}")
-        print(f"  Colección: {collection}")
-        
-        return doc_id
-    
     def process_job_image(
         self,
         image_path: str,
@@ -285,7 +420,8 @@ Responde SOLO con el JSON, sin texto adicional."""
         upload_to_storage: bool = True,
         upload_to_firestore: bool = True,
         max_intentos_ia: int = 3,
-        tiempo_espera_ia: int = 30
+        tiempo_espera_ia: int = 30,
+        webp_method: int = 4
     ) -> Dict[str, Any]:
         """
         Procesa una imagen de anuncio de empleo completamente en memoria.
@@ -297,21 +433,20 @@ Responde SOLO con el JSON, sin texto adicional."""
             upload_to_storage: Si True, sube la imagen a Firebase Storage
             upload_to_firestore: Si True, guarda los datos en Firestore
             max_intentos_ia: Número máximo de intentos para la IA
-            tiempo_espera_ia: Segundos de espera entre intentos
+            tiempo_espera_ia: Espera máxima en segundos entre intentos
+            webp_method: Esfuerzo del codificador WebP (0-6)
         
         Returns:
             Diccionario con todos los datos procesados
         """
-        print(f"\n{'='*70}")
-        print("🚀 PROCESAMIENTO COMPLETO DE ANUNCIO DE EMPLEO (EN MEMORIA)")
-        print(f"{'='*70}\n")
+        log.info("🚀 PROCESAMIENTO COMPLETO DE ANUNCIO DE EMPLEO (EN MEMORIA)")
         
         # PASO 1: Convertir a WebP en memoria
-        print("📸 PASO 1: Convirtiendo imagen a WebP en memoria...")
-        webp_buffer = self.convert_to_webp_memory(image_path, quality=quality)
+        log.debug("📸 PASO 1: Convirtiendo imagen a WebP en memoria...")
+        webp_buffer = self.convert_to_webp_memory(image_path, quality=quality, method=webp_method)
         
         # PASO 2: Analizar con Ollama (con reintentos)
-        print(f"\n🤖 PASO 2: Analizando imagen con IA (hasta {max_intentos_ia} intentos)...")
+        log.debug("🤖 PASO 2: Analizando imagen con IA (hasta %d intentos)...", max_intentos_ia)
         resultado = self.analyze_image_with_ollama(
             webp_buffer, 
             max_intentos=max_intentos_ia,
@@ -321,34 +456,135 @@ Responde SOLO con el JSON, sin texto adicional."""
         datos = self.parse_json_response(contenido)
         
         if not datos.get("es_anuncio_empleo", False):
-            print("\n⚠️  La imagen NO es un anuncio de empleo")
-            print(f"   Razón: {datos.get('razon', 'No especificada')}")
+            log.info("⚠️  La imagen NO es un anuncio de empleo. Razón: %s", datos.get('razon', 'No especificada'))
+            self._release_buffer(webp_buffer)
             return datos
         
-        print("✓ Anuncio de empleo detectado correctamente")
+        log.info("✓ Anuncio de empleo detectado correctamente")
         
-        # PASO 3: Subir imagen a Firebase Storage
+        # PASO 3: Subir imagen a Firebase Storage en segundo plano. La URL se
+        # conoce de antemano, así que el documento no tiene que esperar a la subida
+        subida = None
+        executor = ThreadPoolExecutor(max_workers=1)
         if upload_to_storage:
-            print("\n☁️  PASO 3: Subiendo imagen a Firebase Storage...")
-            image_url = self.upload_image_to_storage_memory(webp_buffer)
-            datos['url'] = image_url
-        else:
-            print("\n⏭️  PASO 3: Omitiendo subida a Storage")
-        
-        # PASO 4: Subir datos a Firestore
-        if upload_to_firestore:
-            print("\n📝 PASO 4: Guardando datos en Firestore...")
-            doc_id = self.upload_to_firestore(datos)
-            datos['firestoreDocId'] = doc_id
+            log.debug("☁️  PASO 3: Subiendo imagen a Firebase Storage...")
+            blob_path = self.fb.new_blob_path()
+            datos['url'] = self.fb.storage_url(blob_path)
+            subida = executor.submit(self.fb.upload_image_to_storage, webp_buffer, blob_path=blob_path)
         else:
-            print("\n⏭️  PASO 4: Omitiendo subida a Firestore")
+            log.debug("⏭️  PASO 3: Omitiendo subida a Storage")
         
-        print(f"\n{'='*70}")
-        print("✅ PROCESAMIENTO COMPLETADO EXITOSAMENTE")
-        print(f"{'='*70}\n")
+        try:
+            # PASO 4: Subir datos a Firestore (en paralelo con la subida de la imagen)
+            doc_id = None
+            if upload_to_firestore:
+                log.debug("📝 PASO 4: Guardando datos en Firestore...")
+                doc_id = self.fb.upload_to_firestore(datos)
+                datos['firestoreDocId'] = doc_id
+            else:
+                log.debug("⏭️  PASO 4: Omitiendo subida a Firestore")
+            
+            if subida is not None:
+                try:
+                    subida.result()
+                except Exception:
+                    # No dejar un documento apuntando a una imagen que no existe
+                    if doc_id is not None:
+                        self.fb.delete_firestore_document(doc_id)
+                    raise
+        finally:
+            executor.shutdown(wait=True)
+            self._release_buffer(webp_buffer)
+        
+        log.info("✅ PROCESAMIENTO COMPLETADO EXITOSAMENTE")
         
         return datos
-
+    
+    
+    def process_job_images(
+        self,
+        image_paths: List[str],
+        quality: int = 95,
+        upload_to_storage: bool = True,
+        upload_to_firestore: bool = True,
+        max_intentos_ia: int = 3,
+        tiempo_espera_ia: int = 30,
+        webp_method: int = 4
+    ) -> List[Dict[str, Any]]:
+        """
+        Procesa varias imágenes analizándolas con la IA de forma concurrente.
+        
+        Args:
+            image_paths: Rutas de las imágenes originales
+            quality: Calidad de conversión WebP (0-100)
+            upload_to_storage: Si True, sube las imágenes a Firebase Storage
+            upload_to_firestore: Si True, guarda los datos en Firestore
+            max_intentos_ia: Número máximo de intentos para la IA por imagen
+            tiempo_espera_ia: Espera máxima en segundos entre intentos
+            webp_method: Esfuerzo del codificador WebP (0-6)
+        
+        Returns:
+            Lista con los datos procesados de cada imagen, en el mismo orden
+        """
+        log.info("🚀 Procesando %d imágenes (hasta %d en paralelo)...", len(image_paths), OLLAMA_NUM_PARALLEL)
+        
+        # PASO 1: Convertir todas a WebP en memoria. Los buffers vuelven al
+        # pool aunque falle la conversión, el análisis o la subida
+        buffers = []
+        try:
+            for path in image_paths:
+                buffers.append(self.convert_to_webp_memory(path, quality=quality, method=webp_method))
+            
+            # PASO 2: Analizar todas a la vez
+            respuestas = asyncio.run(self.analyze_images_batch(
+                buffers,
+                max_intentos=max_intentos_ia,
+                tiempo_espera=tiempo_espera_ia
+            ))
+            
+            resultados = []
+            anuncios = []  # Anuncios detectados, con su imagen
+            for path, webp_buffer, respuesta in zip(image_paths, buffers, respuestas):
+                if isinstance(respuesta, Exception):
+                    log.warning("❌ %s: %s", path, respuesta)
+                    resultados.append({"es_anuncio_empleo": False, "error": str(respuesta)})
+                    continue
+                
+                contenido = respuesta.get("message", {}).get("content", "No hay respuesta")
+                datos = self.parse_json_response(contenido)
+                
+                if datos.get("es_anuncio_empleo", False):
+                    anuncios.append((datos, webp_buffer))
+                
+                resultados.append(datos)
+            
+            # PASO 3: Subir las imágenes de los anuncios a Firebase Storage en paralelo
+            if upload_to_storage and anuncios:
+                urls = self.fb.upload_images_to_storage([buffer for _, buffer in anuncios])
+                for (datos, _), url in zip(anuncios, urls):
+                    datos['url'] = url
+        finally:
+            for buffer in buffers:
+                self._release_buffer(buffer)
+        
+        # PASO 4: Subir todos los anuncios a Firestore de una vez
+        anuncios = [datos for datos, _ in anuncios] if upload_to_firestore else []
+        if anuncios:
+            try:
+                doc_ids = self.fb.upload_many_to_firestore(anuncios)
+                fallidos = {}
+            except FirestoreWriteError as e:
+                # El resto de la tanda sí se guardó: solo se marcan los que fallaron
+                log.error("❌ %s", e)
+                doc_ids, fallidos = e.doc_ids, e.failed
+            for datos, doc_id in zip(anuncios, doc_ids):
+                if doc_id in fallidos:
+                    datos['error'] = f"Firestore: {fallidos[doc_id]}"
+                else:
+                    datos['firestoreDocId'] = doc_id
+        
+        log.info("✅ %d imágenes procesadas", len(resultados))
+        return resultados
 
 # Función auxiliar para uso rápido
 def procesar_anuncio_simple(image_path: str, service_account: str = 'serviceAccountKey.json'):
@@ -368,6 +604,8 @@ def procesar_anuncio_simple(image_path: str, service_account: str = 'serviceAcco
 
 # Ejemplo de uso
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
     # Uso simple (todo en memoria, sin archivos locales)
     resultado = procesar_anuncio_simple("asa.webp")
     
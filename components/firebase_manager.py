@@ -4,13 +4,26 @@ Maneja la subida de imágenes y almacenamiento de datos.
 Compatible con variables de entorno de Railway.
 """
 
+import asyncio
 import firebase_admin
-from firebase_admin import credentials, firestore, storage
+from firebase_admin import credentials, firestore
+from google.cloud import firestore as gcf, storage as gcs
+from google.cloud.firestore import AsyncClient
 from datetime import datetime
-from typing import Optional, Dict, Any, Union
+from google.api_core.exceptions import Aborted, DeadlineExceeded, PreconditionFailed
+from google.cloud.firestore_v1.base_query import FieldFilter
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Iterator, List, Tuple, Union
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 import os
+import itertools
 import json
+import logging
+from urllib.parse import quote
+import time
+
+from components.image_converter import ImageConverter
 
 # Intentar cargar .env solo si existe (desarrollo local)
 try:
@@ -19,10 +32,164 @@ try:
 except:
     pass  # En producción (Railway) no necesitamos dotenv
 
+log = logging.getLogger(__name__)
+
+# Límite de operaciones por WriteBatch impuesto por Firestore
+FIRESTORE_BATCH_LIMIT = 500
+
+# Subidas simultáneas a Storage en upload_images_to_storage. Ajustable con
+# FIREBASE_UPLOAD_POOL_SIZE según el ancho de banda del servidor
+STORAGE_UPLOAD_WORKERS = max(1, int(os.getenv('FIREBASE_UPLOAD_POOL_SIZE', '8')))
+
+# Si el bucket ya es público por IAM (acceso uniforme), no hace falta un
+# make_public() por blob: la URL pública es predecible
+STORAGE_PUBLIC_BUCKET = os.getenv('STORAGE_PUBLIC_BUCKET', '').lower() in ('1', 'true', 'yes')
+
+# Tamaño de bloque para subidas reanudables; por debajo se sube en una sola petición
+STORAGE_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Consultas ya construidas que se conservan por gestor
+QUERY_CACHE_SIZE = 64
+
+# Centinela de hora del servidor, resuelto una sola vez
+_SERVER_TS = firestore.SERVER_TIMESTAMP
+
+# Normalización de puesto y ciudad para los IDs ('/' separaría la ruta del documento)
+_SLUG_TABLE = str.maketrans({' ': '_', '\t': '_', '/': '-'})
+
+class FirestoreWriteError(Exception):
+    """
+    Escrituras agrupadas que Firestore rechazó tras agotar los reintentos.
+    
+    Attributes:
+        failed: doc_id -> mensaje de error de cada documento no escrito
+        doc_ids: IDs de todos los documentos de la tanda (los demás sí se escribieron)
+    """
+    
+    def __init__(self, failed: Dict[str, str], doc_ids: Optional[List[str]] = None):
+        super().__init__(f"{len(failed)} escrituras fallidas en Firestore: {', '.join(failed)}")
+        self.failed = failed
+        self.doc_ids = doc_ids or []
+
+
+# Clientes compartidos por todo el proceso (se crean al primer uso). Se
+# construyen aquí y no con firestore.client()/storage.bucket(), que los
+# guardan en la app de Firebase, para poder descartarlos tras un fork
+_db = None
+_bucket = None
+
+
+def get_db():
+    """Devuelve el cliente de Firestore compartido, creándolo la primera vez."""
+    global _db
+    if _db is None:
+        app = firebase_admin.get_app()
+        _db = gcf.Client(project=app.project_id, credentials=app.credential.get_credential())
+    return _db
+
+
+def get_bucket():
+    """Devuelve el bucket de Storage compartido, creándolo la primera vez."""
+    global _bucket
+    if _bucket is None:
+        app = firebase_admin.get_app()
+        client = gcs.Client(project=app.project_id, credentials=app.credential.get_credential())
+        _bucket = client.bucket(app.options.get('storageBucket'))
+    return _bucket
+
+
+_async_db = None  # (bucle de eventos, cliente)
+
+
+def get_async_db() -> AsyncClient:
+    """
+    Devuelve el cliente asíncrono de Firestore del bucle de eventos actual.
+    
+    El canal gRPC asíncrono queda ligado al bucle en el que se crea, así que
+    se crea uno nuevo si cambia el bucle (por ejemplo, tras otro asyncio.run)
+    y el anterior se cierra (ver _retire_async_db).
+    """
+    global _async_db
+    loop = asyncio.get_running_loop()
+    if _async_db is None or _async_db[0] is not loop:
+        _retire_async_db()
+        app = firebase_admin.get_app()
+        client = AsyncClient(project=app.project_id, credentials=app.credential.get_credential())
+        _async_db = (loop, client)
+    return _async_db[1]
+
+
+async def _close_async_client(client: AsyncClient):
+    """Cierra el canal gRPC asíncrono del cliente (si llegó a abrirse)."""
+    transport = getattr(client, '_transport', None)  # Se crea con la primera llamada
+    if transport is not None:
+        await transport.close()
+
+
+def _retire_async_db():
+    """
+    Suelta el cliente asíncrono actual y cierra su canal en su propio bucle:
+    si ese bucle sigue corriendo se programa allí; si está parado, se ejecuta
+    en él (salvo que ya haya otro bucle corriendo en este hilo). Con el bucle
+    ya cerrado no se puede: el canal se libera cuando se recolecta el cliente,
+    por eso conviene llamar antes a close_async_db.
+    """
+    global _async_db
+    if _async_db is None:
+        return
+    loop, client = _async_db
+    _async_db = None
+    if loop.is_closed():
+        return
+    if loop.is_running():
+        asyncio.run_coroutine_threadsafe(_close_async_client(client), loop)
+        return
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        loop.run_until_complete(_close_async_client(client))
+
+
+async def close_async_db():
+    """
+    Cierra el cliente asíncrono de Firestore. Llamarlo desde su bucle antes de
+    que este termine (p. ej. al apagar el servidor).
+    """
+    global _async_db
+    if _async_db is not None and _async_db[0] is asyncio.get_running_loop():
+        client = _async_db[1]
+        _async_db = None
+        await _close_async_client(client)
+    else:
+        _retire_async_db()
+
+
+def _reset_clients_after_fork():
+    """
+    Descarta en el proceso hijo los clientes creados antes del fork (p. ej.
+    con preload_app de gunicorn): los canales gRPC no sobreviven a un fork.
+    Las credenciales y la app de Firebase sí se conservan.
+    """
+    global _db, _bucket, _async_db
+    _db = _bucket = _async_db = None
+    if _instance is not None:
+        _instance._collections.clear()
+        _instance._queries.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_clients_after_fork)
+
 
 class FirebaseManager:
     """Gestor centralizado para operaciones de Firebase Storage y Firestore."""
     
+    # Bucket con acceso uniforme y lectura pública: las URLs se arman sin make_public()
+    uniform_public_bucket: bool = STORAGE_PUBLIC_BUCKET
+    
+    # Contador de subidas del proceso (next() sobre count es atómico con el GIL)
+    _upload_counter = itertools.count()
+    
     def __init__(self, service_account_path: Union[str, dict] = 'serviceAccountKey.json'):
         """
         Inicializa la conexión con Firebase.
@@ -43,7 +210,7 @@ class FirebaseManager:
             # Opción 1: Credenciales desde diccionario
             if isinstance(service_account_path, dict):
                 cred = credentials.Certificate(service_account_path)
-                print("✅ Usando credenciales desde diccionario")
+                log.info("✅ Usando credenciales desde diccionario")
             
             # Opción 2: Credenciales desde variable de entorno FIREBASE_CREDENTIALS
             elif isinstance(service_account_path, str):
@@ -54,14 +221,14 @@ class FirebaseManager:
                     try:
                         creds_dict = json.loads(firebase_creds_json)
                         cred = credentials.Certificate(creds_dict)
-                        print("✅ Usando credenciales desde variable FIREBASE_CREDENTIALS")
+                        log.info("✅ Usando credenciales desde variable FIREBASE_CREDENTIALS")
                     except json.JSONDecodeError as e:
                         raise ValueError(f"❌ Error parseando FIREBASE_CREDENTIALS: {e}")
                 
                 # Opción 3: Archivo local (solo para desarrollo)
                 elif os.path.exists(service_account_path):
                     cred = credentials.Certificate(service_account_path)
-                    print(f"✅ Usando credenciales desde archivo: {service_account_path}")
+                    log.info("✅ Usando credenciales desde archivo: %s", service_account_path)
                 
                 else:
                     raise FileNotFoundError(
@@ -79,54 +246,237 @@ class FirebaseManager:
                 'storageBucket': storage_bucket
             })
         
-        self.db = firestore.client()
-        self.bucket = storage.bucket()
+        # Los clientes de Firestore y Storage se crean al primer uso (ver db/bucket)
+        self._bucket_name = storage_bucket
+        self._public_base = f"https://storage.googleapis.com/{storage_bucket}"
+        self._collections: Dict[str, Any] = {}  # nombre -> CollectionReference
+        self._queries: "OrderedDict[tuple, Any]" = OrderedDict()  # LRU de consultas
+        
+        log.info("✅ Firebase inicializado correctamente (Storage Bucket: %s)", storage_bucket)
+    
+    @property
+    def db(self):
+        """Cliente de Firestore del proceso (se crea al primer uso)."""
+        return get_db()
+    
+    @property
+    def bucket(self):
+        """Bucket de Storage del proceso (se crea al primer uso)."""
+        return get_bucket()
+    
+    def _col(self, name: str):
+        """Devuelve la CollectionReference de `name`, reutilizándola entre llamadas."""
+        ref = self._collections.get(name)
+        if ref is None:
+            ref = self._collections[name] = self.db.collection(name)
+        return ref
+    
+    def warmup(self) -> Dict[str, bool]:
+        """
+        Abre las conexiones con Firestore y Storage con dos llamadas triviales,
+        para que la primera petición real no pague el establecimiento del canal.
         
-        print("✅ Firebase inicializado correctamente")
-        print(f"   Storage Bucket: {storage_bucket}")
+        Returns:
+            Diccionario con el resultado de cada servicio (True si respondió)
+        """
+        estado = {}
+        try:
+            self._col('jobs').limit(1).get()
+            estado['firestore'] = True
+        except Exception as e:
+            log.warning("⚠️  Warmup de Firestore fallido: %s", e)
+            estado['firestore'] = False
+        try:
+            self.bucket.reload()  # Solo metadatos del bucket
+            estado['storage'] = True
+        except Exception as e:
+            log.warning("⚠️  Warmup de Storage fallido: %s", e)
+            estado['storage'] = False
+        return estado
+    
+    @classmethod
+    def new_blob_path(cls, filename_prefix: str = "job", folder: str = "jobs") -> str:
+        """
+        Genera una ruta única (timestamp + contador) para una imagen en Storage.
+        
+        El contador evita colisiones entre subidas paralelas del mismo instante.
+        
+        Args:
+            filename_prefix: Prefijo para el nombre del archivo
+            folder: Carpeta en Storage
+        
+        Returns:
+            Ruta del blob (ej: "jobs/job_1700000000000000000_0.webp")
+        """
+        return f"{folder}/{filename_prefix}_{time.time_ns()}_{next(cls._upload_counter)}.webp"
+    
+    @staticmethod
+    def content_blob_path(
+        image_buffer: Union[bytes, BytesIO, None] = None,
+        folder: str = "jobs",
+        digest: Optional[bytes] = None
+    ) -> str:
+        """
+        Ruta de un blob nombrado por su contenido (BLAKE2b de los bytes), de
+        modo que la misma imagen siempre cae en el mismo blob.
+        
+        Args:
+            image_buffer: Bytes o BytesIO con la imagen
+            folder: Carpeta en Storage
+            digest: ImageConverter.content_digest ya calculado (evita recorrer
+                la imagen otra vez); si se indica, se ignora `image_buffer`
+        
+        Returns:
+            Ruta del blob (ej: "jobs/3f2a...c9.webp")
+        """
+        if digest is None:
+            digest = ImageConverter.content_digest(image_buffer)
+        return f"{folder}/{digest.hex()}.webp"
+    
+    def storage_url(self, blob_path: str, make_public: bool = True) -> str:
+        """
+        Calcula la URL de un blob sin hacer ninguna petición.
+        
+        Permite conocer la URL antes de que termine la subida.
+        
+        Args:
+            blob_path: Ruta del blob en Storage
+            make_public: Si True, URL pública HTTPS; si no, URI gs://
+        
+        Returns:
+            URL del blob
+        """
+        if make_public:
+            return f"{self._public_base}/{quote(blob_path, safe='/~')}"
+        return f"gs://{self._bucket_name}/{blob_path}"
     
     def upload_image_to_storage(
         self,
-        image_buffer: BytesIO,
+        image_buffer: Union[bytes, BytesIO],
         filename_prefix: str = "job",
         folder: str = "jobs",
-        make_public: bool = True
+        make_public: bool = True,
+        blob_path: Optional[str] = None,
+        content_addressed: bool = False
     ) -> str:
         """
         Sube una imagen a Firebase Storage desde memoria.
         
         Args:
-            image_buffer: BytesIO con la imagen
+            image_buffer: Bytes o BytesIO con la imagen (los bytes se suben sin copiarlos)
             filename_prefix: Prefijo para el nombre del archivo
             folder: Carpeta en Storage donde se guardará
             make_public: Si True, hace la imagen públicamente accesible
+            blob_path: Ruta ya reservada con new_blob_path o content_blob_path
+                (opcional); si se indica se ignoran `filename_prefix` y `folder`
+            content_addressed: Si True, el blob se nombra por su contenido
+                (content_blob_path) y no se vuelve a subir si ya existe
         
         Returns:
             URL pública de la imagen
         """
-        # Generar nombre único con timestamp
-        timestamp = int(datetime.now().timestamp() * 1000)
-        filename = f"{filename_prefix}_{timestamp}.webp"
-        blob_path = f"{folder}/{filename}"
+        # Generar nombre: por contenido, o único con timestamp
+        if blob_path is None:
+            if content_addressed:
+                blob_path = self.content_blob_path(image_buffer, folder)
+            else:
+                blob_path = self.new_blob_path(filename_prefix, folder)
         
-        # Subir desde memoria
+        # Subir desde memoria: una sola petición si cabe en un bloque,
+        # si no, subida reanudable en bloques grandes
+        data = image_buffer if isinstance(image_buffer, bytes) else image_buffer.getvalue()
         blob = self.bucket.blob(blob_path)
-        image_buffer.seek(0)
-        blob.upload_from_file(image_buffer, content_type='image/webp')
+        if len(data) > STORAGE_CHUNK_SIZE:
+            blob.chunk_size = STORAGE_CHUNK_SIZE
+        if content_addressed:
+            # Precondición "el blob no existe": la comprobación y la subida son
+            # la misma petición, sin carrera entre subidas simultáneas
+            try:
+                blob.upload_from_string(data, content_type='image/webp', timeout=60, if_generation_match=0)
+            except PreconditionFailed:
+                log.info("♻️  Imagen ya presente en Storage, se reutiliza: path=%s", blob_path)
+        else:
+            blob.upload_from_string(data, content_type='image/webp', timeout=60)
         
-        # Hacer público si se solicita
-        if make_public:
+        # Hacer público si se solicita (una petición extra, salvo que el bucket ya lo sea)
+        if make_public and not self.uniform_public_bucket:
             blob.make_public()
-            public_url = blob.public_url
-        else:
-            public_url = f"gs://{self.bucket.name}/{blob_path}"
+        public_url = self.storage_url(blob_path, make_public)
         
-        print(f"✓ Imagen subida a Firebase Storage:")
-        print(f"  Path: {blob_path}")
-        print(f"  URL: {public_url}")
+        log.info("✓ Imagen subida a Firebase Storage: path=%s url=%s", blob_path, public_url)
         
         return public_url
     
+    def convert_and_upload(
+        self,
+        image_data: Union[str, bytes, BytesIO],
+        quality: int = 95,
+        filename_prefix: str = "job",
+        folder: str = "jobs",
+        make_public: bool = True,
+        max_side: Optional[int] = None,
+        blob_path: Optional[str] = None
+    ) -> str:
+        """
+        Convierte una imagen a WebP y la sube a Firebase Storage en un solo paso.
+        
+        Args:
+            image_data: Ruta del archivo, bytes o BytesIO de la imagen original
+            quality: Calidad WebP (0-100)
+            filename_prefix: Prefijo para el nombre del archivo
+            folder: Carpeta en Storage donde se guardará
+            make_public: Si True, hace la imagen públicamente accesible
+            max_side: Lado mayor máximo de la imagen subida (opcional)
+            blob_path: Ruta ya reservada con new_blob_path (opcional)
+        
+        Returns:
+            URL pública de la imagen
+        """
+        # Sin estadísticas (verbose=False) y con el buffer devuelto al pool
+        # en cuanto se ha subido
+        webp_buffer = ImageConverter.convert_to_webp(
+            image_data, quality=quality, verbose=False, max_side=max_side
+        )
+        try:
+            return self.upload_image_to_storage(
+                webp_buffer, filename_prefix, folder, make_public, blob_path
+            )
+        finally:
+            ImageConverter.release(webp_buffer)
+    
+    def upload_images_to_storage(
+        self,
+        image_buffers: List[BytesIO],
+        filename_prefix: str = "job",
+        folder: str = "jobs",
+        make_public: bool = True,
+        max_workers: int = STORAGE_UPLOAD_WORKERS
+    ) -> List[str]:
+        """
+        Sube varias imágenes a Firebase Storage en paralelo.
+        
+        Args:
+            image_buffers: Lista de BytesIO con las imágenes
+            filename_prefix: Prefijo para el nombre de los archivos
+            folder: Carpeta en Storage donde se guardarán
+            make_public: Si True, hace las imágenes públicamente accesibles
+            max_workers: Número de subidas simultáneas
+        
+        Returns:
+            Lista con la URL de cada imagen, en el mismo orden
+        """
+        if not image_buffers:
+            return []
+        
+        # El índice en el prefijo evita colisiones de nombre dentro del mismo milisegundo
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(image_buffers))) as executor:
+            return list(executor.map(
+                lambda item: self.upload_image_to_storage(
+                    item[1], f"{filename_prefix}_{item[0]}", folder, make_public
+                ),
+                enumerate(image_buffers)
+            ))
+    
     def delete_image_from_storage(
         self,
         blob_path: str
@@ -143,10 +493,10 @@ class FirebaseManager:
         try:
             blob = self.bucket.blob(blob_path)
             blob.delete()
-            print(f"✓ Imagen eliminada de Storage: {blob_path}")
+            log.info("✓ Imagen eliminada de Storage: %s", blob_path)
             return True
         except Exception as e:
-            print(f"❌ Error al eliminar imagen: {str(e)}")
+            log.error("❌ Error al eliminar imagen: %s", e)
             return False
     
     def upload_to_firestore(
@@ -168,28 +518,225 @@ class FirebaseManager:
         Returns:
             ID del documento creado
         """
-        # Añadir timestamps si se solicita
+        # Añadir timestamps si se solicita (respetando un createdAt ya presente)
         if auto_timestamps:
-            data['createdAt'] = firestore.SERVER_TIMESTAMP
-            data['updatedAt'] = firestore.SERVER_TIMESTAMP
+            data.setdefault('createdAt', _SERVER_TS)
+            data['updatedAt'] = _SERVER_TS
         
         # Generar ID automático si no se proporciona
         if doc_id is None:
-            city = data.get('city', 'unknown').lower().replace(' ', '_')
-            position = data.get('position', 'job').lower().replace(' ', '_')
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            doc_id = f"{position}_{city}_{timestamp}"
+            doc_id = self._build_doc_id(data)
         
         # Crear el documento
-        doc_ref = self.db.collection(collection).document(doc_id)
+        doc_ref = self._col(collection).document(doc_id)
         doc_ref.set(data)
         
-        print(f"✓ Documento creado en Firestore:")
-        print(f"  ID: {doc_id}")
-        print(f"  Colección: {collection}")
+        log.info("✓ Documento creado en Firestore: id=%s colección=%s", doc_id, collection)
         
         return doc_id
     
+    async def upload_image_to_storage_async(
+        self,
+        image_buffer: Union[bytes, BytesIO],
+        filename_prefix: str = "job",
+        folder: str = "jobs",
+        make_public: bool = True,
+        blob_path: Optional[str] = None,
+        content_addressed: bool = False
+    ) -> str:
+        """
+        Versión asíncrona de upload_image_to_storage.
+        
+        El SDK de Storage es síncrono: la subida corre en un hilo para no
+        bloquear el bucle de eventos.
+        
+        Returns:
+            URL pública de la imagen
+        """
+        return await asyncio.to_thread(
+            self.upload_image_to_storage, image_buffer, filename_prefix, folder, make_public, blob_path,
+            content_addressed
+        )
+    
+    async def upload_to_firestore_async(
+        self,
+        data: Dict[str, Any],
+        collection: str = 'jobs',
+        doc_id: Optional[str] = None,
+        auto_timestamps: bool = True
+    ) -> str:
+        """
+        Versión asíncrona de upload_to_firestore (usa el AsyncClient de Firestore).
+        
+        Args:
+            data: Diccionario con los datos a guardar
+            collection: Nombre de la colección
+            doc_id: ID personalizado del documento (opcional)
+            auto_timestamps: Si True, añade createdAt y updatedAt automáticamente
+        
+        Returns:
+            ID del documento creado
+        """
+        if auto_timestamps:
+            data.setdefault('createdAt', _SERVER_TS)
+            data['updatedAt'] = _SERVER_TS
+        
+        if doc_id is None:
+            doc_id = self._build_doc_id(data)
+        
+        await get_async_db().collection(collection).document(doc_id).set(data)
+        
+        log.info("✓ Documento creado en Firestore: id=%s colección=%s", doc_id, collection)
+        
+        return doc_id
+    
+    @staticmethod
+    def _build_doc_id(data: Dict[str, Any], timestamp: Optional[str] = None) -> str:
+        """
+        Genera el ID de un documento a partir del puesto, la ciudad y la hora.
+        
+        Args:
+            data: Diccionario con los datos del anuncio
+            timestamp: Marca de tiempo ya formateada; si no se indica se usa la hora actual
+        
+        Returns:
+            ID del documento
+        """
+        city = data.get('city', 'unknown').lower().translate(_SLUG_TABLE)
+        position = data.get('position', 'job').lower().translate(_SLUG_TABLE)
+        if timestamp is None:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return f"{position}_{city}_{timestamp}"
+    
+    def upload_many_to_firestore(
+        self,
+        items: List[Dict[str, Any]],
+        collection: str = 'jobs',
+        auto_timestamps: bool = True,
+        batch_size: int = FIRESTORE_BATCH_LIMIT,
+        max_retries: int = 3
+    ) -> List[str]:
+        """
+        Sube varios documentos a Firestore agrupando las escrituras.
+        
+        Usa BulkWriter si el cliente lo soporta (agrupa y controla la concurrencia
+        internamente, con hasta `max_retries` intentos por documento); si no,
+        confirma WriteBatch de hasta `batch_size` operaciones reintentando ante
+        Aborted/DeadlineExceeded.
+        
+        Args:
+            items: Lista de diccionarios con los datos a guardar
+            collection: Nombre de la colección
+            auto_timestamps: Si True, añade createdAt y updatedAt automáticamente
+            batch_size: Operaciones por WriteBatch (máximo 500; BulkWriter agrupa por su cuenta)
+            max_retries: Intentos por WriteBatch (o por documento con BulkWriter)
+        
+        Returns:
+            Lista con los IDs de los documentos, en el mismo orden que `items`
+        
+        Raises:
+            FirestoreWriteError: Si algún documento no se pudo escribir (los
+                que no figuran en `failed` sí quedaron guardados)
+        """
+        collection_ref = self._col(collection)
+        # Una sola lectura del reloj por tanda; los IDs repetidos se
+        # desambiguan con un contador
+        ts_str = datetime.now().strftime('%Y%m%d_%H%M%S')
+        
+        # Preparar referencias con IDs únicos dentro del lote
+        doc_ids = []
+        usados = set()
+        for data in items:
+            if auto_timestamps:
+                data.setdefault('createdAt', _SERVER_TS)
+                data['updatedAt'] = _SERVER_TS
+            
+            base_id = doc_id = self._build_doc_id(data, ts_str)
+            n = 1
+            while doc_id in usados:
+                n += 1
+                doc_id = f"{base_id}_{n}"
+            usados.add(doc_id)
+            doc_ids.append(doc_id)
+        
+        try:
+            self._write_many(collection_ref, list(zip(doc_ids, items)), False, batch_size, max_retries)
+        except FirestoreWriteError as e:
+            e.doc_ids = doc_ids  # Para que el llamador sepa cuáles sí se guardaron
+            raise
+        
+        log.info("✓ %d documentos creados en Firestore (colección: %s)", len(doc_ids), collection)
+        
+        return doc_ids
+    
+    def _write_many(
+        self,
+        collection_ref,
+        writes: List[Tuple[str, Dict[str, Any]]],
+        merge: bool,
+        batch_size: int,
+        max_retries: int
+    ):
+        """
+        Escribe pares (doc_id, datos) con BulkWriter o, si no está disponible,
+        en WriteBatch de hasta `batch_size` operaciones con reintentos.
+        
+        Raises:
+            FirestoreWriteError: Con los documentos no escritos: los que BulkWriter
+                descarta tras `max_retries` intentos o, con WriteBatch, los del
+                lote que falla y los siguientes
+        """
+        if hasattr(self.db, 'bulk_writer'):
+            # BulkWriter: control de flujo incluido. close() no avisa de las
+            # escrituras que fallan, así que se recogen en su callback
+            fallidas: Dict[str, str] = {}
+            
+            def on_error(error, _writer) -> bool:
+                if error.attempts < max_retries:
+                    return True  # Reintentar
+                fallidas[error.operation.reference.id] = error.message
+                return False
+            
+            writer = self.db.bulk_writer()
+            writer.on_write_error(on_error)
+            for doc_id, data in writes:
+                writer.set(collection_ref.document(doc_id), data, merge=merge)
+            writer.close()
+            
+            if fallidas:
+                raise FirestoreWriteError(fallidas)
+            return
+        
+        batch_size = max(1, min(batch_size, FIRESTORE_BATCH_LIMIT))
+        for start in range(0, len(writes), batch_size):
+            try:
+                self._commit_batch(collection_ref, writes[start:start + batch_size], merge, max_retries)
+            except Exception as e:
+                # Los lotes anteriores ya están confirmados: solo este y los
+                # siguientes quedan sin escribir
+                raise FirestoreWriteError({doc_id: str(e) for doc_id, _ in writes[start:]}) from e
+    
+    def _commit_batch(
+        self,
+        collection_ref,
+        writes: List[Tuple[str, Dict[str, Any]]],
+        merge: bool,
+        max_retries: int
+    ):
+        """Confirma un WriteBatch reintentando ante Aborted/DeadlineExceeded."""
+        for intento in range(1, max_retries + 1):
+            batch = self.db.batch()
+            for doc_id, data in writes:
+                batch.set(collection_ref.document(doc_id), data, merge=merge)
+            try:
+                batch.commit()
+                return
+            except (Aborted, DeadlineExceeded) as e:
+                if intento == max_retries:
+                    raise
+                log.warning("⚠️  Reintentando lote de Firestore (%d/%d): %s", intento, max_retries, e)
+                time.sleep(2 ** (intento - 1))
+    
     def update_firestore_document(
         self,
         doc_id: str,
@@ -210,20 +757,53 @@ class FirebaseManager:
             True si se actualizó correctamente
         """
         try:
-            data['updatedAt'] = firestore.SERVER_TIMESTAMP
-            doc_ref = self.db.collection(collection).document(doc_id)
+            data['updatedAt'] = _SERVER_TS
+            doc_ref = self._col(collection).document(doc_id)
             
             if merge:
                 doc_ref.set(data, merge=True)
             else:
                 doc_ref.set(data)
             
-            print(f"✓ Documento actualizado en Firestore:")
-            print(f"  ID: {doc_id}")
-            print(f"  Colección: {collection}")
+            log.info("✓ Documento actualizado en Firestore: id=%s colección=%s", doc_id, collection)
+            return True
+        except Exception as e:
+            log.error("❌ Error al actualizar documento: %s", e)
+            return False
+    
+    def update_many_firestore_documents(
+        self,
+        updates: Dict[str, Dict[str, Any]],
+        collection: str = 'jobs',
+        merge: bool = True,
+        batch_size: int = FIRESTORE_BATCH_LIMIT,
+        max_retries: int = 3
+    ) -> bool:
+        """
+        Actualiza varios documentos de Firestore agrupando las escrituras.
+        
+        Args:
+            updates: Diccionario {doc_id: datos a actualizar}
+            collection: Nombre de la colección
+            merge: Si True, combina con datos existentes. Si False, sobrescribe
+            batch_size: Operaciones por WriteBatch (máximo 500; BulkWriter agrupa por su cuenta)
+            max_retries: Intentos por WriteBatch (o por documento con BulkWriter)
+        
+        Returns:
+            True si se actualizaron correctamente
+        """
+        try:
+            for data in updates.values():
+                data['updatedAt'] = _SERVER_TS
+            
+            self._write_many(
+                self._col(collection), list(updates.items()), merge, batch_size, max_retries
+            )
+            
+            log.info("✓ %d documentos actualizados en Firestore (colección: %s)", len(updates), collection)
             return True
         except Exception as e:
-            print(f"❌ Error al actualizar documento: {str(e)}")
+            log.error("❌ Error al actualizar documentos: %s", e)
             return False
     
     def get_firestore_document(
@@ -242,16 +822,16 @@ class FirebaseManager:
             Diccionario con los datos del documento o None si no existe
         """
         try:
-            doc_ref = self.db.collection(collection).document(doc_id)
+            doc_ref = self._col(collection).document(doc_id)
             doc = doc_ref.get()
             
             if doc.exists:
                 return doc.to_dict()
             else:
-                print(f"⚠️  Documento no encontrado: {doc_id}")
+                log.info("⚠️  Documento no encontrado: %s", doc_id)
                 return None
         except Exception as e:
-            print(f"❌ Error al obtener documento: {str(e)}")
+            log.error("❌ Error al obtener documento: %s", e)
             return None
     
     def delete_firestore_document(
@@ -270,14 +850,91 @@ class FirebaseManager:
             True si se eliminó correctamente
         """
         try:
-            doc_ref = self.db.collection(collection).document(doc_id)
+            doc_ref = self._col(collection).document(doc_id)
             doc_ref.delete()
-            print(f"✓ Documento eliminado de Firestore: {doc_id}")
+            log.info("✓ Documento eliminado de Firestore: %s", doc_id)
             return True
         except Exception as e:
-            print(f"❌ Error al eliminar documento: {str(e)}")
+            log.error("❌ Error al eliminar documento: %s", e)
             return False
     
+    def iter_firestore(
+        self,
+        collection: str = 'jobs',
+        filters: Optional[list] = None,
+        order_by: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre los resultados de una consulta a medida que llegan de Firestore,
+        sin acumularlos en memoria.
+        
+        Args:
+            collection: Nombre de la colección
+            filters: Lista de tuplas (campo, operador, valor)
+                    Ej: [('city', '==', 'Asunción'), ('salary', '>', 1000)]
+            order_by: Campo por el cual ordenar
+            limit: Número máximo de resultados
+        
+        Yields:
+            Diccionario de cada documento, con su ID en la clave 'id'
+        
+        Raises:
+            google.api_core.exceptions.GoogleAPICallError: Si falla la consulta
+        """
+        query = self._build_query(collection, filters, order_by, limit)
+        
+        for doc in query.stream():
+            data = doc.to_dict()
+            data['id'] = doc.id
+            yield data
+    
+    def _build_query(
+        self,
+        collection: str,
+        filters: Optional[list],
+        order_by: Optional[str],
+        limit: Optional[int]
+    ):
+        """
+        Construye la consulta o reutiliza una igual ya construida.
+        
+        Las consultas de Firestore son inmutables, así que se pueden compartir;
+        solo se cachean si todos los valores de los filtros son hashables.
+        """
+        key = (collection, tuple(map(tuple, filters or ())), order_by, limit)
+        try:
+            query = self._queries.get(key)
+        except TypeError:  # Algún valor no hashable (p. ej. una lista para 'in')
+            key = None
+            query = None
+        
+        if query is not None:
+            self._queries.move_to_end(key)
+            return query
+        
+        query = self._col(collection)
+        
+        # Aplicar filtros
+        if filters:
+            for field, operator, value in filters:
+                query = query.where(filter=FieldFilter(field, operator, value))
+        
+        # Aplicar ordenamiento
+        if order_by:
+            query = query.order_by(order_by)
+        
+        # Aplicar límite
+        if limit:
+            query = query.limit(limit)
+        
+        if key is not None:
+            self._queries[key] = query
+            if len(self._queries) > QUERY_CACHE_SIZE:
+                self._queries.popitem(last=False)
+        
+        return query
+    
     def query_firestore(
         self,
         collection: str = 'jobs',
@@ -288,6 +945,8 @@ class FirebaseManager:
         """
         Realiza una consulta en Firestore.
         
+        Para resultados grandes conviene iter_firestore, que no los acumula.
+        
         Args:
             collection: Nombre de la colección
             filters: Lista de tuplas (campo, operador, valor)
@@ -299,33 +958,33 @@ class FirebaseManager:
             Lista de diccionarios con los documentos encontrados
         """
         try:
-            query = self.db.collection(collection)
-            
-            # Aplicar filtros
-            if filters:
-                for field, operator, value in filters:
-                    query = query.where(field, operator, value)
-            
-            # Aplicar ordenamiento
-            if order_by:
-                query = query.order_by(order_by)
-            
-            # Aplicar límite
-            if limit:
-                query = query.limit(limit)
-            
-            # Ejecutar consulta
-            docs = query.stream()
-            results = []
-            
-            for doc in docs:
-                data = doc.to_dict()
-                data['id'] = doc.id
-                results.append(data)
-            
-            print(f"✓ Consulta ejecutada: {len(results)} documentos encontrados")
+            results = list(self.iter_firestore(collection, filters, order_by, limit))
+            log.info("✓ Consulta ejecutada: %d documentos encontrados", len(results))
             return results
-            
+        
         except Exception as e:
-            print(f"❌ Error en consulta: {str(e)}")
-            return []
\ No newline at end of file
+            log.error("❌ Error en consulta: %s", e)
+            return []
+
+
+# Instancia compartida por todo el proceso
+_instance: Optional[FirebaseManager] = None
+
+
+def get_firebase_manager(service_account_path: Union[str, dict] = 'serviceAccountKey.json') -> FirebaseManager:
+    """
+    Devuelve el FirebaseManager compartido, creándolo la primera vez.
+    
+    Las llamadas posteriores ignoran `service_account_path`: Firebase solo se
+    inicializa una vez por proceso.
+    
+    Args:
+        service_account_path: Ruta al archivo de credenciales O diccionario con credenciales
+    
+    Returns:
+        Instancia compartida de FirebaseManager
+    """
+    global _instance
+    if _instance is None:
+        _instance = FirebaseManager(service_account_path)
+    return _instance
@@ -1,12 +1,35 @@
 """
 Módulo para conversión de imágenes a formato WebP.
 Realiza todas las operaciones en memoria sin guardar archivos locales.
+
+Si pyvips (libvips) está instalado se usa para codificar; si no, Pillow.
+Con Pillow, instalar pillow-simd en su lugar acelera las conversiones de
+color y los redimensionados sin cambiar el código.
 """
 
 from PIL import Image
-from typing import Union
+from typing import Optional, Tuple, Union
 from io import BytesIO
+import hashlib
+import logging
 import os
+import queue
+
+# Backend opcional: libvips procesa la imagen por bloques con menos copias
+try:
+    import pyvips
+except ImportError:
+    pyvips = None
+
+log = logging.getLogger(__name__)
+
+# Esfuerzo por defecto del codificador WebP (0 = más rápido, 6 = más compacto).
+# Ajustable con WEBP_METHOD sin tocar el código
+WEBP_METHOD = min(6, max(0, int(os.getenv('WEBP_METHOD', '4'))))
+
+# Buffers de salida reutilizables entre conversiones (ver ImageConverter.release)
+BUFFER_POOL_SIZE = 8
+_BUF_POOL: "queue.LifoQueue[BytesIO]" = queue.LifoQueue(maxsize=BUFFER_POOL_SIZE)
 
 
 class ImageConverter:
@@ -16,61 +39,234 @@ class ImageConverter:
     def convert_to_webp(
         image_data: Union[str, bytes, BytesIO],
         quality: int = 95,
-        verbose: bool = True
+        verbose: bool = False,
+        method: int = WEBP_METHOD,
+        max_side: Optional[int] = None
     ) -> BytesIO:
         """
         Convierte una imagen a formato WebP en memoria (sin guardar archivo).
+        Si la entrada ya es WebP se devuelve tal cual, sin recodificarla.
         
         Args:
             image_data: Ruta del archivo, bytes o BytesIO de la imagen
             quality: Calidad de conversión (0-100)
-            verbose: Si True, muestra información del proceso
+            verbose: Si True, registra (nivel INFO) los tamaños y la reducción obtenida
+            method: Esfuerzo del codificador WebP (0-6; por defecto WEBP_METHOD). 4 da
+                casi el mismo tamaño que 6 en una fracción del tiempo; 0 codifica
+                aún más rápido a cambio de archivos algo mayores
+            max_side: Si se indica, reduce la imagen para que su lado mayor no lo
+                supere (conservando la proporción)
+        
+        Returns:
+            BytesIO con la imagen WebP (puede devolverse al pool con release)
+        """
+        passthrough = ImageConverter._webp_passthrough(image_data, max_side)
+        if passthrough is not None:
+            output, original_size = passthrough
+        elif pyvips is not None:
+            output, original_size = ImageConverter._convert_with_vips(image_data, quality, method, max_side)
+        else:
+            output, original_size = ImageConverter._convert_with_pillow(image_data, quality, method, max_side)
+        
+        # Mostrar estadísticas si verbose está activado
+        if verbose:
+            compressed_size = output.getbuffer().nbytes
+            compression_ratio = (1 - compressed_size / original_size) * 100
+            
+            log.info(
+                "✓ Imagen convertida a WebP en memoria: %.2f KB → %.2f KB (reducción: %.2f%%)",
+                original_size / 1024, compressed_size / 1024, compression_ratio
+            )
+        
+        return output
+    
+    @staticmethod
+    def _webp_passthrough(
+        image_data: Union[str, bytes, BytesIO],
+        max_side: Optional[int] = None
+    ) -> Optional[Tuple[BytesIO, int]]:
+        """
+        Si la entrada ya es WebP (y no hay que reducirla), la devuelve sin
+        recodificar. Devuelve (BytesIO con los mismos bytes, tamaño) o None.
+        """
+        # Cabecera RIFF de 12 bytes: 'RIFF' <tamaño> 'WEBP'
+        if isinstance(image_data, str):
+            with open(image_data, 'rb') as f:
+                header = f.read(12)
+                if not ImageConverter._is_webp(header):
+                    return None
+                data = header + f.read()
+        elif isinstance(image_data, bytes):
+            if not ImageConverter._is_webp(image_data[:12]):
+                return None
+            data = image_data
+        else:
+            if not ImageConverter._is_webp(image_data.getbuffer()[:12].tobytes()):
+                return None
+            data = image_data.getvalue()
+        
+        # Con max_side, solo se pasa tal cual si ya cabe (Image.open lee solo la cabecera)
+        if max_side and max(Image.open(BytesIO(data)).size) > max_side:
+            return None
+        
+        return BytesIO(data), len(data)
+    
+    @staticmethod
+    def _is_webp(header: bytes) -> bool:
+        """True si los 12 primeros bytes corresponden a un contenedor WebP."""
+        return header[0:4] == b'RIFF' and header[8:12] == b'WEBP'
+    
+    @staticmethod
+    def content_digest(image_data: Union[bytes, BytesIO]) -> bytes:
+        """
+        Huella del contenido (BLAKE2b de 16 bytes). Se calcula una vez por imagen
+        y sirve tanto para la caché del análisis como para el nombre del blob.
+        
+        Args:
+            image_data: Bytes o BytesIO de la imagen
+        
+        Returns:
+            Digest de 16 bytes
+        """
+        if isinstance(image_data, bytes):
+            return hashlib.blake2b(image_data, digest_size=16).digest()
+        with image_data.getbuffer() as view:  # Sin copiar el BytesIO
+            return hashlib.blake2b(view, digest_size=16).digest()
+    
+    @staticmethod
+    def sniff_format(header: bytes) -> Optional[str]:
+        """
+        Identifica el formato por su firma en los primeros bytes, sin decodificar.
+        
+        Args:
+            header: Al menos los 12 primeros bytes del archivo
         
         Returns:
-            BytesIO con la imagen WebP
+            'png', 'jpeg', 'gif' o 'webp'; None si no es ninguno de ellos
         """
+        if header.startswith(b'\x89PNG\r\n\x1a\n'):
+            return 'png'
+        if header.startswith(b'\xff\xd8\xff'):
+            return 'jpeg'
+        if header.startswith((b'GIF87a', b'GIF89a')):
+            return 'gif'
+        if ImageConverter._is_webp(header):
+            return 'webp'
+        return None
+    
+    @staticmethod
+    def _convert_with_vips(
+        image_data: Union[str, bytes, BytesIO],
+        quality: int,
+        method: int,
+        max_side: Optional[int] = None
+    ) -> Tuple[BytesIO, int]:
+        """Codifica con libvips. Devuelve (BytesIO con el WebP, tamaño original en bytes)."""
+        # thumbnail decodifica ya reducido (shrink-on-load) y nunca amplía
+        if isinstance(image_data, str):
+            if max_side:
+                img = pyvips.Image.thumbnail(image_data, max_side, height=max_side, size='down')
+            else:
+                img = pyvips.Image.new_from_file(image_data, access='sequential')
+            original_size = os.path.getsize(image_data)
+        else:
+            data = image_data if isinstance(image_data, bytes) else image_data.getvalue()
+            if max_side:
+                img = pyvips.Image.thumbnail_buffer(data, max_side, height=max_side, size='down')
+            else:
+                img = pyvips.Image.new_from_buffer(data, "", access='sequential')
+            original_size = len(data)
+        
+        webp = img.webpsave_buffer(Q=quality, effort=method, alpha_q=quality)
+        return BytesIO(webp), original_size
+    
+    @staticmethod
+    def _convert_with_pillow(
+        image_data: Union[str, bytes, BytesIO],
+        quality: int,
+        method: int,
+        max_side: Optional[int] = None
+    ) -> Tuple[BytesIO, int]:
+        """Codifica con Pillow. Devuelve (BytesIO con el WebP, tamaño original en bytes)."""
         # Cargar imagen según el tipo de entrada
         if isinstance(image_data, str):
             with open(image_data, 'rb') as f:
                 img = Image.open(f)
+                ImageConverter._draft(img, max_side)
                 img.load()  # Cargar completamente antes de cerrar el archivo
             original_size = os.path.getsize(image_data)
         elif isinstance(image_data, bytes):
             img = Image.open(BytesIO(image_data))
+            ImageConverter._draft(img, max_side)
             original_size = len(image_data)
         else:
             img = Image.open(image_data)
+            ImageConverter._draft(img, max_side)
             image_data.seek(0)
-            original_size = len(image_data.getvalue())
+            original_size = image_data.getbuffer().nbytes  # Sin copiar el contenido
         
-        # Convertir modo de color si es necesario
-        if img.mode in ('RGBA', 'LA', 'P'):
-            if img.mode == 'P':
-                img = img.convert('RGBA')
+        # Convertir modo de color si es necesario. Las paletas sin transparencia
+        # pasan a RGB: un canal alfa vacío solo añade trabajo al codificador
+        if img.mode == 'P':
+            img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+        elif img.mode == 'LA':
+            img = img.convert('RGBA')
         elif img.mode not in ('RGB', 'RGBA'):
             img = img.convert('RGB')
         
-        # Guardar en memoria
-        output = BytesIO()
+        if max_side and max(img.size) > max_side:
+            img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        
+        # Guardar en memoria (el canal alfa, si lo hay, con la misma calidad).
+        # El buffer sale del pool si hay alguno libre
+        output = ImageConverter._acquire_buffer()
+        extra = {'alpha_quality': quality} if img.mode == 'RGBA' else {}
         img.save(
             output, 
             format='WEBP', 
             quality=quality, 
-            method=6, 
-            lossless=False
+            method=method, 
+            lossless=False,
+            exact=False,
+            **extra
         )
+        output.truncate()  # Un buffer reutilizado puede traer datos más largos
         output.seek(0)
         
-        # Mostrar estadísticas si verbose está activado
-        if verbose:
-            compressed_size = len(output.getvalue())
-            compression_ratio = (1 - compressed_size / original_size) * 100
-            
-            print(f"✓ Imagen convertida a WebP en memoria:")
-            print(f"  Original: {original_size / 1024:.2f} KB → WebP: {compressed_size / 1024:.2f} KB")
-            print(f"  Reducción: {compression_ratio:.2f}%")
+        return output, original_size
+    
+    @staticmethod
+    def _acquire_buffer() -> BytesIO:
+        """
+        Toma un buffer del pool o crea uno vacío. No se reserva de antemano:
+        BytesIO(bytes(n)) comparte esos bytes y la primera escritura los copia
+        enteros, así que costaría una reserva y una copia más.
+        """
+        try:
+            buffer = _BUF_POOL.get_nowait()
+        except queue.Empty:
+            return BytesIO()
+        buffer.seek(0)
+        return buffer
+    
+    @staticmethod
+    def release(buffer: BytesIO):
+        """
+        Devuelve al pool un buffer de convert_to_webp que ya no se va a usar.
         
-        return output
+        Args:
+            buffer: BytesIO devuelto por convert_to_webp
+        """
+        try:
+            _BUF_POOL.put_nowait(buffer)
+        except queue.Full:
+            pass
+    
+    @staticmethod
+    def _draft(img: Image.Image, max_side: Optional[int]):
+        """En JPEG, pide a libjpeg decodificar ya a escala reducida (1/2, 1/4, 1/8)."""
+        if max_side and img.format == 'JPEG' and max(img.size) > max_side:
+            img.draft('RGB', (max_side, max_side))
     
     @staticmethod
     def get_image_info(image_data: Union[str, bytes, BytesIO]) -> dict:
@@ -83,15 +279,21 @@ class ImageConverter:
         Returns:
             Diccionario con información de la imagen
         """
+        # Image.open solo lee la cabecera: formato, modo y tamaño ya están
+        # disponibles sin decodificar los píxeles
         if isinstance(image_data, str):
             with open(image_data, 'rb') as f:
-                img = Image.open(f)
-                img.load()
+                return ImageConverter._header_info(Image.open(f))
         elif isinstance(image_data, bytes):
             img = Image.open(BytesIO(image_data))
         else:
             img = Image.open(image_data)
         
+        return ImageConverter._header_info(img)
+    
+    @staticmethod
+    def _header_info(img: Image.Image) -> dict:
+        """Diccionario de get_image_info a partir de una imagen recién abierta."""
         return {
             'format': img.format,
             'mode': img.mode,
@@ -103,10 +305,11 @@ class ImageConverter:
 
 # Ejemplo de uso
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     converter = ImageConverter()
     
     # Convertir una imagen
-    webp_buffer = converter.convert_to_webp("ejemplo.jpg", quality=90)
+    webp_buffer = converter.convert_to_webp("ejemplo.jpg", quality=90, verbose=True)
     
     # Obtener información de la imagen
     info = converter.get_image_info("ejemplo.jpg")
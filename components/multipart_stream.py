@@ -0,0 +1,110 @@
+"""
+Módulo para parsear cuerpos multipart/form-data por bloques.
+Escribe el archivo subido directo a disco (o a un BytesIO) sin pasar por el
+formparser de werkzeug.
+"""
+
+import os
+from io import BytesIO
+from typing import AsyncIterable, Callable, Dict, IO, Iterable, Optional, Tuple, Union
+
+from multipart import PushMultipartParser, MultipartSegment, MultipartError
+from werkzeug.exceptions import RequestEntityTooLarge
+
+MAX_TEXT_FIELD_SIZE = 1 * 1024 * 1024  # 1MB max para campos de texto
+
+
+async def parse_multipart_stream(
+    body: AsyncIterable[bytes],
+    boundary: Optional[str],
+    file_factory: Callable[[str], Optional[IO[bytes]]],
+    max_size: int,
+    file_field: str = 'file',
+    text_fields: Iterable[str] = (),
+    max_text_size: int = MAX_TEXT_FIELD_SIZE
+) -> Tuple[Union[str, BytesIO, None], Optional[str], Dict[str, str]]:
+    """
+    Parsea un cuerpo multipart/form-data a medida que llega.
+    
+    El primer archivo del campo `file_field` se escribe en el archivo que
+    devuelva `file_factory`; los campos de `text_fields` se acumulan en
+    memoria con un límite de `max_text_size` bytes cada uno.
+    
+    Args:
+        body: Iterable asíncrono con los bloques del cuerpo de la petición
+        boundary: Boundary del Content-Type
+        file_factory: Recibe el nombre original del archivo y devuelve un archivo
+            abierto en modo binario ('wb') o un BytesIO, o None para descartarlo
+        max_size: Tamaño máximo del cuerpo en bytes
+        file_field: Nombre del campo del archivo
+        text_fields: Nombres de los campos de texto a conservar
+        max_text_size: Tamaño máximo de cada campo de texto en bytes
+    
+    Returns:
+        Tupla (file, filename, fields). file es la ruta del archivo escrito, o el
+        BytesIO rebobinado si file_factory devolvió uno; es None si no se envió
+        archivo o si file_factory lo descartó. filename es el nombre original.
+    
+    Raises:
+        MultipartError: Si el cuerpo multipart es inválido
+        RequestEntityTooLarge: Si el cuerpo o un campo de texto exceden los límites
+    """
+    if not boundary:
+        raise MultipartError("Falta el boundary en Content-Type")
+    
+    text_fields = set(text_fields)
+    parser = PushMultipartParser(boundary, max_segment_count=16)
+    received = 0
+    
+    out_file = None
+    filename = None
+    buffers: Dict[str, bytearray] = {}
+    target = None  # Destino de los bytes del segmento actual
+    
+    try:
+        async for chunk in body:
+            received += len(chunk)
+            if received > max_size:
+                raise RequestEntityTooLarge()
+            
+            for event in parser.parse(chunk):
+                if isinstance(event, MultipartSegment):
+                    target = None
+                    if event.name == file_field and event.filename and filename is None:
+                        filename = event.filename
+                        out_file = file_factory(filename)
+                        target = out_file
+                    elif event.name in text_fields and event.filename is None and event.name not in buffers:
+                        target = buffers[event.name] = bytearray()
+                elif event is None:
+                    target = None
+                elif target is None:
+                    continue
+                elif target is out_file:
+                    out_file.write(event)
+                else:
+                    if len(target) + len(event) > max_text_size:
+                        raise RequestEntityTooLarge()
+                    target += event
+        
+        parser.close()
+    
+    except BaseException:
+        # Limpiar el archivo parcial ante cualquier error
+        if out_file is not None:
+            out_file.close()
+            if not isinstance(out_file, BytesIO):
+                os.unlink(out_file.name)
+        raise
+    
+    file_result = None
+    if isinstance(out_file, BytesIO):
+        out_file.seek(0)
+        file_result = out_file
+    elif out_file is not None:
+        out_file.close()
+        file_result = out_file.name
+    
+    fields = {name: data.decode('utf-8', errors='replace') for name, data in buffers.items()}
+    
+    return file_result, filename, fields
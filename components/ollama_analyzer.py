@@ -3,55 +3,133 @@ Módulo para análisis de imágenes y texto usando Ollama Cloud.
 Maneja la comunicación con la API de Ollama y el parseo de respuestas.
 """
 
+import asyncio
+import atexit
+import functools
 import json
+import logging
+import orjson
 import base64
+import hashlib
 import re
-from typing import Dict, Any, Union, Optional
+import sqlite3
+import threading
+import zlib
+from typing import Dict, Any, Iterator, List, Tuple, Union, Optional
 from io import BytesIO
+from PIL import Image
 import time
 import os
+import random
+import weakref
 from dotenv import load_dotenv
-import requests
+import httpx
+
+from components.image_converter import ImageConverter
+
+# HTTP/2 (varias peticiones multiplexadas en una conexión) requiere el
+# extra httpx[http2]; sin él se usa HTTP/1.1 con keep-alive
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 # Cargar variables de entorno
 load_dotenv()
 
+log = logging.getLogger(__name__)
 
-class OllamaAnalyzer:
-    """Analizador de imágenes y texto usando Ollama Cloud API."""
-    
-    # Prompt por defecto para análisis de anuncios de empleo
-    DEFAULT_JOB_PROMPT = """Analiza la imagen adjunta y determina si es un anuncio de empleo.
+# Peticiones simultáneas de los lotes asíncronos. En un servidor Ollama propio
+# conviene que coincida con su OLLAMA_NUM_PARALLEL; por encima, las peticiones
+# sobrantes solo esperan en la cola del servidor
+OLLAMA_NUM_PARALLEL = int(os.getenv('OLLAMA_NUM_PARALLEL', '8'))
 
-Si NO es un anuncio de empleo, responde ÚNICAMENTE:
-{
-  "es_anuncio_empleo": false,
-  "razon": "Explicación breve de por qué no es un anuncio de empleo"
-}
+# Estados HTTP transitorios que merecen reintento (el resto de 4xx no)
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504, 529})
 
-Si SÍ es un anuncio de empleo, responde en el siguiente formato JSON (si algún dato no está presente, deja el campo vacío ""):
-{
-  "source": "aiGenerated",
-  "es_anuncio_empleo": true,
-  "position": "nombre del puesto",
-  "title": "título completo incluyendo el puesto",
-  "description": "descripción breve sintetizando todos los datos disponibles del anuncio",
-  "city": "ciudad",
-  "direction": "dirección completa",
-  "company": "nombre de la empresa",
-  "vacancies": "número de vacantes",
-  "requeriments": "requisitos del puesto",
-  "salary_range": "rango salarial",
-  "phoneNumber": "teléfono de contacto",
-  "email": "correo electrónico",
-  "website": "sitio web",
-  "workingHours": "horario de trabajo"
-}
+# Caché de respuestas ya parseadas (SQLite); vacío para desactivarla
+OLLAMA_CACHE_PATH = os.getenv('OLLAMA_CACHE_PATH', 'ollama_cache.sqlite3')
+# Vigencia de cada entrada en segundos (0 = sin caducidad) y máximo de filas
+# (0 = sin límite); al superarlo se borran las más antiguas
+OLLAMA_CACHE_TTL = int(os.getenv('OLLAMA_CACHE_TTL', str(30 * 24 * 3600)))
+OLLAMA_CACHE_MAX_ROWS = int(os.getenv('OLLAMA_CACHE_MAX_ROWS', '100000'))
+# Cada cuántas inserciones se purgan las filas caducadas o sobrantes
+_CACHE_PRUNE_EVERY = 256
 
-Responde SOLO con el JSON, sin texto adicional."""
+# Lado mayor con el que se envían las imágenes al modelo: los VLM las reducen
+# por debajo de esto internamente, así que más píxeles solo cuestan ancho de banda
+IMAGE_MAX_DIM = 1600
+
+# Analizadores vivos del proceso, para rehacer sus conexiones tras un fork
+_instances: "weakref.WeakSet[OllamaAnalyzer]" = weakref.WeakSet()
 
-    # Prompt para análisis solo de texto
-    DEFAULT_TEXT_JOB_PROMPT = """Analiza el texto adjunto y determina si es un anuncio de empleo.
+
+def _reset_clients_after_fork():
+    """
+    Rehace en el proceso hijo las conexiones de los analizadores creados antes
+    del fork (p. ej. con preload_app de gunicorn + PRELOAD_ANALYZER): ni el
+    socket TLS del cliente HTTP ni la conexión SQLite pueden compartirse entre
+    procesos. Las del padre no se cierran, solo se abandonan: cerrarlas aquí
+    afectaría también al proceso padre.
+    """
+    for analyzer in list(_instances):
+        analyzer._reset_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_clients_after_fork)
+
+# Marcador que ocupa el lugar de la imagen en el JSON preserializado
+_IMAGE_PLACEHOLDER = "__IMAGEN_BASE64__"
+
+# Caracteres que importan al buscar objetos JSON; el resto se salta en C
+_JSON_TOKEN_RE = re.compile(r'[{}"\\]')
+
+
+def iter_json_objects(texto: str) -> Iterator[str]:
+    """
+    Recorre `texto` una sola vez y devuelve cada objeto {...} de primer nivel
+    con las llaves balanceadas, a cualquier profundidad de anidación.
+    
+    Ignora las llaves dentro de cadenas (respetando los escapes). Es lineal en
+    el tamaño del texto: no hay backtracking como con una regex anidada. Un
+    objeto que no se cierra (respuesta truncada) no se devuelve.
+    """
+    profundidad = 0
+    inicio = 0
+    en_cadena = False
+    escapado = -1  # Posición del carácter escapado con una barra invertida
+    
+    for match in _JSON_TOKEN_RE.finditer(texto):
+        i = match.start()
+        if i == escapado:
+            continue
+        c = match.group()
+        
+        if en_cadena:
+            if c == '\\':
+                escapado = i + 1
+            elif c == '"':
+                en_cadena = False
+        elif c == '"':
+            # Las comillas fuera de un objeto son texto libre
+            en_cadena = profundidad > 0
+        elif c == '{':
+            if profundidad == 0:
+                inicio = i
+            profundidad += 1
+        elif c == '}' and profundidad:
+            profundidad -= 1
+            if profundidad == 0:
+                yield texto[inicio:i + 1]
+
+
+class OllamaAnalyzer:
+    """Analizador de imágenes y texto usando Ollama Cloud API."""
+    
+    # Instrucciones y esquema JSON comunes a los prompts de imagen y de texto
+    _SCHEMA_BLOCK = """
 
 Si NO es un anuncio de empleo, responde ÚNICAMENTE:
 {
@@ -80,13 +158,32 @@ Si SÍ es un anuncio de empleo, responde en el siguiente formato JSON (si algún
 
 Responde SOLO con el JSON, sin texto adicional."""
     
-    def __init__(self, api_key: str = None, api_url: str = "https://ollama.com/api/chat"):
+    # Prompt por defecto para análisis de anuncios de empleo
+    DEFAULT_JOB_PROMPT = "Analiza la imagen adjunta y determina si es un anuncio de empleo." + _SCHEMA_BLOCK
+    
+    # Prompt para análisis solo de texto
+    DEFAULT_TEXT_JOB_PROMPT = "Analiza el texto adjunto y determina si es un anuncio de empleo." + _SCHEMA_BLOCK
+    
+    def __init__(
+        self,
+        api_key: str = None,
+        api_url: str = "https://ollama.com/api/chat",
+        client: Optional[httpx.Client] = None,
+        cache_path: Optional[str] = OLLAMA_CACHE_PATH,
+        prewarm: bool = True
+    ):
         """
         Inicializa el analizador de Ollama Cloud.
         
         Args:
             api_key: API Key de Ollama Cloud (si no se proporciona, busca en .env)
             api_url: URL de la API de Ollama Cloud
+            client: Cliente HTTP compartido; si None, se crea uno propio. Reutilizarlo
+                mantiene las conexiones TLS abiertas entre llamadas
+            cache_path: Archivo SQLite donde guardar las respuestas ya analizadas
+                (None o vacío para no usar caché)
+            prewarm: Si True, abre en segundo plano la conexión con la API para
+                que la primera petición real no pague el handshake TLS
         """
         self.api_key = api_key or os.getenv('OLLAMA_API_KEY')
         self.api_url = api_url
@@ -94,28 +191,351 @@ Responde SOLO con el JSON, sin texto adicional."""
         if not self.api_key:
             raise ValueError("❌ OLLAMA_API_KEY no encontrada. Proporciona api_key o configura .env")
         
-        print(f"✅ Ollama Cloud configurado")
-        print(f"   API URL: {self.api_url}")
-        print(f"   API Key: {self.api_key[:20]}...")
+        # Cliente propio con pool de conexiones (los reintentos los gestiona esta clase)
+        self._owns_client = client is None
+        self.client = client if client is not None else self._new_client()
+        self._async_client = None  # (bucle de eventos, cliente); ver _get_async_client
+        self._semaforo = None  # (bucle de eventos, semáforo); ver _get_semaforo
+        
+        # Headers construidos una sola vez (no se tocan los de un cliente compartido)
+        self._headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "Accept-Encoding": "gzip, deflate"
+        }
+        
+        # Cuerpos JSON del prompt por defecto, partidos donde va la imagen (por modelo)
+        self._default_image_parts: Dict[str, Tuple[bytes, bytes]] = {}
+        
+        # Caché por contenido: la misma imagen/texto con el mismo modelo y
+        # prompt no vuelve a pasar por el modelo
+        self._cache_path = cache_path
+        self._cache_lock = threading.Lock()
+        self._cache_inserts = 0  # La primera inserción ya purga (ver _cache_put)
+        self._cache = self._open_cache(cache_path) if cache_path else None
+        
+        _instances.add(self)
+        if prewarm:
+            threading.Thread(target=self.warmup, daemon=True).start()
+        
+        log.info("✅ Ollama Cloud configurado (API URL: %s)", self.api_url)
+        log.debug("   API Key: %s...", self.api_key[:20])
     
-    def _convert_to_base64(self, image_data: Union[str, bytes, BytesIO]) -> str:
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def get_default(cls) -> "OllamaAnalyzer":
+        """
+        Analizador compartido del proceso, configurado desde el entorno.
+        
+        Se crea en la primera llamada; las siguientes reutilizan su cliente HTTP
+        (con sus conexiones abiertas) y su caché en lugar de crear otros. Se
+        cierra al terminar el proceso.
+        
+        Returns:
+            Instancia única de OllamaAnalyzer
+        """
+        analyzer = cls()
+        atexit.register(analyzer.close)
+        return analyzer
+    
+    @staticmethod
+    def _new_client() -> httpx.Client:
+        """Cliente HTTP con el pool de conexiones por defecto del analizador."""
+        return httpx.Client(
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            limits=httpx.Limits(
+                max_keepalive_connections=40,
+                max_connections=100,
+                keepalive_expiry=30.0
+            )
+        )
+    
+    @staticmethod
+    def _open_cache(cache_path: str) -> sqlite3.Connection:
+        """Abre (o crea) la base SQLite de la caché."""
+        conn = sqlite3.connect(cache_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv "
+            "(key BLOB PRIMARY KEY, value BLOB, created_at REAL NOT NULL DEFAULT 0)"
+        )
+        # Bases anteriores sin fecha: sus filas cuentan como caducadas
+        columnas = {row[1] for row in conn.execute("PRAGMA table_info(kv)")}
+        if "created_at" not in columnas:
+            conn.execute("ALTER TABLE kv ADD COLUMN created_at REAL NOT NULL DEFAULT 0")
+        conn.execute("CREATE INDEX IF NOT EXISTS kv_created_at ON kv (created_at)")
+        conn.commit()
+        return conn
+    
+    def _reset_after_fork(self):
+        """Sustituye, en el proceso hijo, las conexiones heredadas del padre."""
+        if self._owns_client:
+            self.client = self._new_client()
+        self._async_client = None
+        self._semaforo = None
+        self._cache_lock = threading.Lock()  # Pudo quedar tomado por otro hilo del padre
+        if self._cache is not None:
+            self._cache = self._open_cache(self._cache_path)
+    
+    def warmup(self) -> bool:
+        """
+        Deja una conexión keep-alive abierta en el pool (la respuesta da igual).
+        
+        Returns:
+            True si el servidor respondió
+        """
+        try:
+            self.client.head(self.api_url, timeout=5)
+            return True
+        except httpx.HTTPError:
+            return False
+    
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """
+        Cliente asíncrono del bucle de eventos actual, con los mismos límites
+        que el síncrono. Se crea uno nuevo si cambia el bucle.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client[0] is not loop:
+            self._retire_async_client()
+            client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(30.0, connect=10.0),
+                limits=httpx.Limits(
+                    max_keepalive_connections=40,
+                    max_connections=100,
+                    keepalive_expiry=30.0
+                )
+            )
+            self._async_client = (loop, client)
+        return self._async_client[1]
+    
+    def _get_semaforo(self) -> asyncio.Semaphore:
+        """
+        Semáforo de OLLAMA_NUM_PARALLEL turnos compartido por todas las
+        peticiones asíncronas del bucle de eventos actual (uno nuevo si cambia).
+        """
+        loop = asyncio.get_running_loop()
+        if self._semaforo is None or self._semaforo[0] is not loop:
+            self._semaforo = (loop, asyncio.Semaphore(OLLAMA_NUM_PARALLEL))
+        return self._semaforo[1]
+    
+    def _retire_async_client(self):
+        """
+        Suelta el cliente asíncrono actual y lo cierra en su propio bucle: si
+        ese bucle sigue corriendo se programa allí aclose(); si está parado, se
+        ejecuta en él (salvo que ya haya otro bucle corriendo en este hilo).
+        Con el bucle ya cerrado no se puede: sus sockets se liberan cuando se
+        recolecta el cliente, por eso conviene llamar a aclose() antes.
+        """
+        if self._async_client is None:
+            return
+        loop, client = self._async_client
+        self._async_client = None
+        if loop.is_closed():
+            return
+        if loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            loop.run_until_complete(client.aclose())
+    
+    async def aclose(self):
+        """
+        Cierra el cliente asíncrono. Llamarlo desde su bucle antes de que este
+        termine (p. ej. al apagar el servidor).
+        """
+        if self._async_client is not None and self._async_client[0] is asyncio.get_running_loop():
+            client = self._async_client[1]
+            self._async_client = None
+            await client.aclose()
+        else:
+            self._retire_async_client()
+    
+    def close(self):
+        """Cierra los clientes HTTP (el síncrono, si lo creó este analizador) y la caché."""
+        if self._owns_client:
+            self.client.close()
+        self._retire_async_client()
+        if self._cache is not None:
+            self._cache.close()
+            self._cache = None
+    
+    @staticmethod
+    def _cache_key(model: str, prompt: str, data: Union[bytes, memoryview], extra: str = None) -> bytes:
+        """Clave de caché: BLAKE2b de modelo, prompt, contenido y texto adicional."""
+        h = hashlib.blake2b(digest_size=16)
+        for parte in (model.encode(), prompt.encode(), data, (extra or "").encode()):
+            h.update(parte)
+            h.update(b"|")
+        return h.digest()
+    
+    @classmethod
+    def _text_cache_key(cls, model: str, text: str) -> bytes:
+        """
+        Clave de caché de un texto: los espacios se normalizan para que el
+        mismo anuncio copiado con otros saltos de línea o sangrías coincida.
+        """
+        return cls._cache_key(model, cls.DEFAULT_TEXT_JOB_PROMPT, " ".join(text.split()).encode())
+    
+    def _cache_get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        """Devuelve el resultado guardado para `key` o None (también si caducó)."""
+        if self._cache is None:
+            return None
+        with self._cache_lock:
+            row = self._cache.execute(
+                "SELECT value FROM kv WHERE key = ? AND created_at >= ?",
+                (key, self._cache_cutoff())
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return orjson.loads(zlib.decompress(row[0]))
+        except (zlib.error, orjson.JSONDecodeError, TypeError) as e:
+            # Una fila dañada cuenta como fallo de caché y se descarta
+            log.warning("⚠️  Entrada de caché dañada, se descarta: %s", e)
+            with self._cache_lock:
+                self._cache.execute("DELETE FROM kv WHERE key = ?", (key,))
+                self._cache.commit()
+            return None
+    
+    def _cache_put(self, key: bytes, value: Dict[str, Any]):
+        """Guarda un resultado parseado (los errores de parseo no se guardan)."""
+        if self._cache is None or "error" in value:
+            return
+        blob = zlib.compress(orjson.dumps(value))
+        with self._cache_lock:
+            # REPLACE renueva una entrada caducada con el mismo key
+            self._cache.execute(
+                "INSERT OR REPLACE INTO kv (key, value, created_at) VALUES (?, ?, ?)",
+                (key, blob, time.time())
+            )
+            self._cache_inserts += 1
+            if self._cache_inserts % _CACHE_PRUNE_EVERY == 1:
+                self._cache_prune()
+            self._cache.commit()
+    
+    @staticmethod
+    def _cache_cutoff() -> float:
+        """Fecha mínima (epoch) de una entrada vigente; 0 si no hay caducidad."""
+        return time.time() - OLLAMA_CACHE_TTL if OLLAMA_CACHE_TTL > 0 else 0.0
+    
+    def _cache_prune(self):
+        """Borra las filas caducadas y, por encima de OLLAMA_CACHE_MAX_ROWS, las más antiguas."""
+        if OLLAMA_CACHE_TTL > 0:
+            self._cache.execute("DELETE FROM kv WHERE created_at < ?", (self._cache_cutoff(),))
+        if OLLAMA_CACHE_MAX_ROWS > 0:
+            self._cache.execute(
+                "DELETE FROM kv WHERE key IN "
+                "(SELECT key FROM kv ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (OLLAMA_CACHE_MAX_ROWS,)
+            )
+    
+    @staticmethod
+    def _backoff(error: Exception, intento: int, base: float, cap: float) -> Optional[float]:
+        """
+        Segundos de espera antes del siguiente intento, o None si no se debe reintentar.
+        
+        Backoff exponencial con jitter completo: los workers que fallan a la vez no
+        reintentan sincronizados. Se respeta Retry-After si el servidor lo envía.
+        """
+        if isinstance(error, httpx.HTTPStatusError):
+            if error.response.status_code not in RETRYABLE_STATUS:
+                return None
+            retry_after = error.response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return float(retry_after)
+        elif isinstance(error, httpx.HTTPError) and not isinstance(error, httpx.TransportError):
+            return None
+        
+        return random.uniform(0, min(cap, base * 2 ** min(intento - 1, 16)))
+    
+    def _convert_to_base64(
+        self,
+        image_data: Union[str, bytes, BytesIO],
+        max_dim: Optional[int] = None,
+        jpeg_quality: int = 85
+    ) -> bytes:
         """
         Convierte una imagen a base64.
         
         Args:
             image_data: Ruta del archivo, bytes o BytesIO
+            max_dim: Si se indica y la imagen lo supera, se reduce a este lado
+                mayor y se recomprime como JPEG antes de codificarla
+            jpeg_quality: Calidad JPEG de la imagen reducida
         
         Returns:
-            String en base64
+            Bytes ASCII en base64 (listos para insertar en el cuerpo JSON)
         """
+        if max_dim:
+            reducida = self._downscale(image_data, max_dim, jpeg_quality)
+            if reducida is not None:
+                image_data = reducida
+        
+        # Se devuelven bytes: el cuerpo JSON se arma con bytes y así no hay str intermedio
         if isinstance(image_data, str):
             with open(image_data, "rb") as f:
-                return base64.b64encode(f.read()).decode()
+                return base64.b64encode(f.read())
         elif isinstance(image_data, bytes):
-            return base64.b64encode(image_data).decode()
-        else:  # BytesIO
-            image_data.seek(0)
-            return base64.b64encode(image_data.read()).decode()
+            return base64.b64encode(image_data)
+        else:  # BytesIO: se codifica desde su buffer, sin la copia de read()
+            with image_data.getbuffer() as view:
+                return base64.b64encode(view)
+    
+    @staticmethod
+    def _downscale(
+        image_data: Union[str, bytes, BytesIO],
+        max_dim: int,
+        jpeg_quality: int
+    ) -> Optional[bytes]:
+        """JPEG reducido a `max_dim` de lado mayor, o None si la imagen ya cabe."""
+        fuente = BytesIO(image_data) if isinstance(image_data, bytes) else image_data
+        with Image.open(fuente) as img:
+            if max(img.size) <= max_dim:  # Solo se ha leído la cabecera
+                return None
+            
+            if img.format == 'JPEG':
+                img.draft('RGB', (max_dim, max_dim))
+            reducida = img.convert('RGB') if img.mode != 'RGB' else img.copy()
+        reducida.thumbnail((max_dim, max_dim), Image.Resampling.LANCZOS)
+        
+        buffer = BytesIO()
+        reducida.save(buffer, format='JPEG', quality=jpeg_quality, optimize=True, progressive=True)
+        return buffer.getvalue()
+    
+    def _image_payload_parts(self, model: str, prompt: str) -> Tuple[bytes, bytes]:
+        """
+        Cuerpo JSON de /api/chat partido donde va la imagen en base64.
+        
+        Con el prompt por defecto se calcula una vez por modelo: las llamadas
+        siguientes no vuelven a serializar el prompt.
+        """
+        cacheable = prompt is self.DEFAULT_JOB_PROMPT
+        if cacheable and model in self._default_image_parts:
+            return self._default_image_parts[model]
+        
+        payload = {
+            "model": model,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt,
+                    "images": [_IMAGE_PLACEHOLDER]
+                }
+            ],
+            "stream": False
+        }
+        # La imagen va después del texto: se parte por la última aparición, así
+        # un prompt (o additional_text) que contenga el marcador no rompe el cuerpo
+        antes, despues = orjson.dumps(payload).rsplit(_IMAGE_PLACEHOLDER.encode(), 1)
+        
+        if cacheable:
+            self._default_image_parts[model] = (antes, despues)
+        return antes, despues
     
     def analyze_image(
         self,
@@ -125,7 +545,9 @@ Responde SOLO con el JSON, sin texto adicional."""
         model: str = "qwen3-vl:235b-cloud",
         timeout: int = 30,
         max_retries: int = None,
-        retry_delay: int = 1
+        retry_delay: float = 1.0,
+        backoff_cap: float = 30.0,
+        max_dim: Optional[int] = IMAGE_MAX_DIM
     ) -> Dict[str, Any]:
         """
         Analiza una imagen usando Ollama Cloud, con texto adicional opcional.
@@ -137,7 +559,9 @@ Responde SOLO con el JSON, sin texto adicional."""
             model: Modelo de Ollama Cloud a usar
             timeout: Timeout en segundos por intento
             max_retries: Número máximo de reintentos (None = infinito)
-            retry_delay: Segundos de espera entre reintentos
+            retry_delay: Espera base en segundos; se duplica en cada intento (con jitter)
+            backoff_cap: Espera máxima en segundos entre reintentos
+            max_dim: Lado mayor con el que se envía la imagen (None = tamaño original)
         
         Returns:
             Respuesta completa de la API
@@ -150,26 +574,12 @@ Responde SOLO con el JSON, sin texto adicional."""
             prompt = f"{prompt}\n\nTexto adicional proporcionado:\n{additional_text}"
         
         # Convertir imagen a base64
-        img_base64 = self._convert_to_base64(image_data)
-        
-        # Preparar payload
-        payload = {
-            "model": model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt,
-                    "images": [img_base64]
-                }
-            ],
-            "stream": False
-        }
+        img_base64 = self._convert_to_base64(image_data, max_dim)
         
-        # Headers con autenticación
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        # Preparar payload insertando la imagen en el JSON ya serializado: se
+        # arma una sola vez y los reintentos reenvían los mismos bytes
+        antes, despues = self._image_payload_parts(model, prompt)
+        body = b''.join((antes, img_base64, despues))
         
         # Sistema de reintentos
         intento = 0
@@ -178,43 +588,52 @@ Responde SOLO con el JSON, sin texto adicional."""
         while max_retries is None or intento < max_retries:
             intento += 1
             try:
-                print(f"🔄 Intento {intento} - Consultando Ollama Cloud (timeout: {timeout}s)...")
+                log.debug("🔄 Intento %d - Consultando Ollama Cloud (timeout: %ss)...", intento, timeout)
                 
                 tiempo_inicio = time.time()
                 
-                response = requests.post(
+                response = self.client.post(
                     self.api_url,
-                    json=payload,
-                    headers=headers,
+                    content=body,
+                    headers=self._headers,
                     timeout=timeout
                 )
                 
                 tiempo_transcurrido = time.time() - tiempo_inicio
                 
-                print(f"   Status Code: {response.status_code} (Tiempo: {tiempo_transcurrido:.2f}s)")
+                log.debug("   Status Code: %d (Tiempo: %.2fs)", response.status_code, tiempo_transcurrido)
                 
+                # El cuerpo se toma una sola vez como bytes; solo se decodifica
+                # (y solo un trozo) si hay que mostrarlo en un error
+                datos = response.content
                 if response.status_code != 200:
-                    print(f"   Response Text: {response.text[:500]}")
-                    raise requests.exceptions.RequestException(f"Status code {response.status_code}")
+                    log.warning("   Response Text: %s", datos[:500].decode('utf-8', 'replace'))
+                    raise httpx.HTTPStatusError(
+                        f"Status code {response.status_code}",
+                        request=response.request,
+                        response=response
+                    )
                 
-                response.raise_for_status()
-                
-                if not response.text:
+                if not datos:
                     raise ValueError("Respuesta vacía del servidor")
                 
-                print(f"✅ Respuesta recibida exitosamente en intento {intento} ({tiempo_transcurrido:.2f}s)")
-                return response.json()
+                log.info("✅ Respuesta recibida exitosamente en intento %d (%.2fs)", intento, tiempo_transcurrido)
+                return orjson.loads(datos)
                 
-            except (requests.exceptions.Timeout, requests.exceptions.RequestException, ValueError) as e:
+            except (httpx.HTTPError, ValueError) as e:
                 tiempo_transcurrido = time.time() - tiempo_inicio
                 
-                print(f"\n❌ Error en intento {intento} ({tiempo_transcurrido:.2f}s): {str(e)}")
+                log.warning("❌ Error en intento %d (%.2fs): %s", intento, tiempo_transcurrido, e)
+                
+                espera = self._backoff(e, intento, retry_delay, backoff_cap)
+                if espera is None:
+                    raise Exception(f"Error no reintentable: {str(e)}")
                 
                 if max_retries is not None and intento >= max_retries:
                     raise Exception(f"Máximo de {max_retries} reintentos alcanzado")
                 
-                print(f"⚡ Reintentando en {retry_delay}s...")
-                time.sleep(retry_delay)
+                log.info("⚡ Reintentando en %.1fs...", espera)
+                time.sleep(espera)
     
     def analyze_text(
         self,
@@ -223,7 +642,8 @@ Responde SOLO con el JSON, sin texto adicional."""
         model: str = "qwen3-vl:235b-cloud",
         timeout: int = 30,
         max_retries: int = None,
-        retry_delay: int = 1
+        retry_delay: float = 1.0,
+        backoff_cap: float = 30.0
     ) -> Dict[str, Any]:
         """
         Analiza solo texto usando Ollama Cloud (sin imagen).
@@ -234,7 +654,8 @@ Responde SOLO con el JSON, sin texto adicional."""
             model: Modelo de Ollama Cloud a usar
             timeout: Timeout en segundos por intento
             max_retries: Número máximo de reintentos (None = infinito)
-            retry_delay: Segundos de espera entre reintentos
+            retry_delay: Espera base en segundos; se duplica en cada intento (con jitter)
+            backoff_cap: Espera máxima en segundos entre reintentos
         
         Returns:
             Respuesta completa de la API
@@ -257,11 +678,8 @@ Responde SOLO con el JSON, sin texto adicional."""
             "stream": False
         }
         
-        # Headers con autenticación
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        # Serializar una sola vez: los reintentos reenvían los mismos bytes
+        body = orjson.dumps(payload)
         
         # Sistema de reintentos
         intento = 0
@@ -270,43 +688,52 @@ Responde SOLO con el JSON, sin texto adicional."""
         while max_retries is None or intento < max_retries:
             intento += 1
             try:
-                print(f"🔄 Intento {intento} - Consultando Ollama Cloud para texto (timeout: {timeout}s)...")
+                log.debug("🔄 Intento %d - Consultando Ollama Cloud para texto (timeout: %ss)...", intento, timeout)
                 
                 tiempo_inicio = time.time()
                 
-                response = requests.post(
+                response = self.client.post(
                     self.api_url,
-                    json=payload,
-                    headers=headers,
+                    content=body,
+                    headers=self._headers,
                     timeout=timeout
                 )
                 
                 tiempo_transcurrido = time.time() - tiempo_inicio
                 
-                print(f"   Status Code: {response.status_code} (Tiempo: {tiempo_transcurrido:.2f}s)")
+                log.debug("   Status Code: %d (Tiempo: %.2fs)", response.status_code, tiempo_transcurrido)
                 
+                # El cuerpo se toma una sola vez como bytes; solo se decodifica
+                # (y solo un trozo) si hay que mostrarlo en un error
+                datos = response.content
                 if response.status_code != 200:
-                    print(f"   Response Text: {response.text[:500]}")
-                    raise requests.exceptions.RequestException(f"Status code {response.status_code}")
+                    log.warning("   Response Text: %s", datos[:500].decode('utf-8', 'replace'))
+                    raise httpx.HTTPStatusError(
+                        f"Status code {response.status_code}",
+                        request=response.request,
+                        response=response
+                    )
                 
-                response.raise_for_status()
-                
-                if not response.text:
+                if not datos:
                     raise ValueError("Respuesta vacía del servidor")
                 
-                print(f"✅ Respuesta recibida exitosamente en intento {intento} ({tiempo_transcurrido:.2f}s)")
-                return response.json()
+                log.info("✅ Respuesta recibida exitosamente en intento %d (%.2fs)", intento, tiempo_transcurrido)
+                return orjson.loads(datos)
                 
-            except (requests.exceptions.Timeout, requests.exceptions.RequestException, ValueError) as e:
+            except (httpx.HTTPError, ValueError) as e:
                 tiempo_transcurrido = time.time() - tiempo_inicio
                 
-                print(f"\n❌ Error en intento {intento} ({tiempo_transcurrido:.2f}s): {str(e)}")
+                log.warning("❌ Error en intento %d (%.2fs): %s", intento, tiempo_transcurrido, e)
+                
+                espera = self._backoff(e, intento, retry_delay, backoff_cap)
+                if espera is None:
+                    raise Exception(f"Error no reintentable: {str(e)}")
                 
                 if max_retries is not None and intento >= max_retries:
                     raise Exception(f"Máximo de {max_retries} reintentos alcanzado")
                 
-                print(f"⚡ Reintentando en {retry_delay}s...")
-                time.sleep(retry_delay)
+                log.info("⚡ Reintentando en %.1fs...", espera)
+                time.sleep(espera)
     
     def parse_json_response(self, content: str) -> Dict[str, Any]:
         """
@@ -324,13 +751,18 @@ Responde SOLO con el JSON, sin texto adicional."""
         except json.JSONDecodeError:
             pass
         
-        # Buscar JSON en el texto usando regex
-        json_pattern = r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}'
-        matches = re.findall(json_pattern, content, re.DOTALL)
+        # Camino rápido: del primer '{' al último '}' (JSON con texto alrededor)
+        inicio, fin = content.find('{'), content.rfind('}')
+        if inicio != -1 and fin > inicio:
+            try:
+                return json.loads(content[inicio:fin + 1])
+            except json.JSONDecodeError:
+                pass
         
-        for match in matches:
+        # Recorrer los objetos balanceados del texto, parando en el primero válido
+        for candidato in iter_json_objects(content):
             try:
-                return json.loads(match)
+                return json.loads(candidato)
             except json.JSONDecodeError:
                 continue
         
@@ -345,7 +777,10 @@ Responde SOLO con el JSON, sin texto adicional."""
         image_data: Union[str, bytes, BytesIO],
         additional_text: str = None,
         model: str = "qwen3-vl:235b-cloud",
-        timeout: int = 30
+        timeout: int = 30,
+        cache: bool = True,
+        max_dim: Optional[int] = IMAGE_MAX_DIM,
+        content_digest: Optional[bytes] = None
     ) -> Dict[str, Any]:
         """
         Método simplificado para analizar anuncios de empleo desde imagen.
@@ -356,30 +791,55 @@ Responde SOLO con el JSON, sin texto adicional."""
             additional_text: Texto adicional para complementar el análisis
             model: Modelo de Ollama Cloud
             timeout: Timeout en segundos
+            cache: Si True, reutiliza el resultado de una imagen ya analizada
+            max_dim: Lado mayor con el que se envía la imagen (None = tamaño original)
+            content_digest: ImageConverter.content_digest de la imagen, si ya se
+                calculó (así los bytes no se recorren otra vez para la clave)
         
         Returns:
             Diccionario con los datos del anuncio parseados
         """
+        key = None
+        if cache and self._cache is not None:
+            # El archivo se lee una sola vez: los mismos bytes sirven para la clave y el envío
+            if isinstance(image_data, str):
+                with open(image_data, "rb") as f:
+                    image_data = f.read()
+            # El tamaño de envío forma parte de la clave: cambia lo que ve el modelo
+            extra = f"{additional_text or ''}|{max_dim}"
+            # La clave se deriva de la huella del contenido, no de los bytes
+            if content_digest is None:
+                content_digest = ImageConverter.content_digest(image_data)
+            key = self._cache_key(model, self.DEFAULT_JOB_PROMPT, content_digest, extra)
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+        
         # Analizar imagen
         resultado = self.analyze_image(
             image_data=image_data,
             additional_text=additional_text,
             model=model,
             timeout=timeout,
-            max_retries=None  # Reintentos infinitos
+            max_retries=None,  # Reintentos infinitos
+            max_dim=max_dim
         )
         
         # Extraer contenido
         contenido = resultado.get("message", {}).get("content", "No hay respuesta")
         
         # Parsear JSON
-        return self.parse_json_response(contenido)
+        datos = self.parse_json_response(contenido)
+        if key is not None:
+            self._cache_put(key, datos)
+        return datos
     
     def analyze_job_text(
         self,
         text: str,
         model: str = "qwen3-vl:235b-cloud",
-        timeout: int = 30
+        timeout: int = 30,
+        cache: bool = True
     ) -> Dict[str, Any]:
         """
         Método simplificado para analizar anuncios de empleo desde texto puro.
@@ -389,10 +849,18 @@ Responde SOLO con el JSON, sin texto adicional."""
             text: Texto del anuncio a analizar
             model: Modelo de Ollama Cloud
             timeout: Timeout en segundos
+            cache: Si True, reutiliza el resultado de un texto ya analizado
         
         Returns:
             Diccionario con los datos del anuncio parseados
         """
+        key = None
+        if cache and self._cache is not None:
+            key = self._text_cache_key(model, text)
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+        
         # Analizar texto
         resultado = self.analyze_text(
             text=text,
@@ -405,13 +873,221 @@ Responde SOLO con el JSON, sin texto adicional."""
         contenido = resultado.get("message", {}).get("content", "No hay respuesta")
         
         # Parsear JSON
-        return self.parse_json_response(contenido)
+        datos = self.parse_json_response(contenido)
+        if key is not None:
+            self._cache_put(key, datos)
+        return datos
+    
+    async def analyze_text_async(
+        self,
+        client: httpx.AsyncClient,
+        text: str,
+        prompt: str = None,
+        model: str = "qwen3-vl:235b-cloud",
+        timeout: int = 30,
+        max_retries: Optional[int] = 3,
+        retry_delay: float = 1.0,
+        backoff_cap: float = 30.0,
+        semaforo: Optional[asyncio.Semaphore] = None
+    ) -> Dict[str, Any]:
+        """
+        Versión asíncrona de analyze_text sobre un cliente compartido.
+        
+        Args:
+            client: Cliente HTTP asíncrono compartido entre las peticiones del lote
+            text: Texto a analizar
+            prompt: Prompt personalizado (usa DEFAULT_TEXT_JOB_PROMPT si no se proporciona)
+            model: Modelo de Ollama Cloud a usar
+            timeout: Timeout en segundos por intento
+            max_retries: Número máximo de reintentos (None = infinito)
+            retry_delay: Espera base en segundos; se duplica en cada intento (con jitter)
+            backoff_cap: Espera máxima en segundos entre reintentos
+            semaforo: Limita las peticiones en vuelo; por defecto, el semáforo
+                compartido del bucle (OLLAMA_NUM_PARALLEL turnos)
+        
+        Returns:
+            Respuesta completa de la API
+        """
+        prompt = prompt or self.DEFAULT_TEXT_JOB_PROMPT
+        payload = {
+            "model": model,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": f"{prompt}\n\nTexto a analizar:\n{text}"
+                }
+            ],
+            "stream": False
+        }
+        body = orjson.dumps(payload)
+        if semaforo is None:
+            semaforo = self._get_semaforo()
+        
+        intento = 0
+        while max_retries is None or intento < max_retries:
+            intento += 1
+            try:
+                # El turno se libera durante la espera entre reintentos
+                async with semaforo:
+                    response = await client.post(
+                        self.api_url,
+                        content=body,
+                        headers=self._headers,
+                        timeout=timeout
+                    )
+                
+                if response.status_code != 200:
+                    raise httpx.HTTPStatusError(
+                        f"Status code {response.status_code}",
+                        request=response.request,
+                        response=response
+                    )
+                
+                datos = response.content
+                if not datos:
+                    raise ValueError("Respuesta vacía del servidor")
+                
+                return orjson.loads(datos)
+            
+            except (httpx.HTTPError, ValueError) as e:
+                log.warning("❌ Error en intento %d: %s", intento, e)
+                
+                espera = self._backoff(e, intento, retry_delay, backoff_cap)
+                if espera is None:
+                    raise Exception(f"Error no reintentable: {str(e)}")
+                
+                if max_retries is not None and intento >= max_retries:
+                    raise Exception(f"Máximo de {max_retries} reintentos alcanzado")
+                
+                await asyncio.sleep(espera)
+    
+    async def analyze_job_text_async(
+        self,
+        text: str,
+        model: str = "qwen3-vl:235b-cloud",
+        timeout: int = 30,
+        cache: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Versión asíncrona de analyze_job_text. Las esperas entre reintentos
+        usan asyncio.sleep, así que no ocupan ningún hilo.
+        
+        Args:
+            text: Texto del anuncio a analizar
+            model: Modelo de Ollama Cloud
+            timeout: Timeout en segundos
+            cache: Si True, reutiliza el resultado de un texto ya analizado
+        
+        Returns:
+            Diccionario con los datos del anuncio parseados
+        """
+        key = None
+        if cache and self._cache is not None:
+            key = self._text_cache_key(model, text)
+            # SQLite y su lock bloquean: fuera del bucle de eventos
+            cached = await asyncio.to_thread(self._cache_get, key)
+            if cached is not None:
+                return cached
+        
+        resultado = await self.analyze_text_async(
+            self._get_async_client(),
+            text,
+            model=model,
+            timeout=timeout,
+            max_retries=None  # Reintentos infinitos
+        )
+        
+        contenido = resultado.get("message", {}).get("content", "No hay respuesta")
+        datos = self.parse_json_response(contenido)
+        if key is not None:
+            await asyncio.to_thread(self._cache_put, key, datos)
+        return datos
+    
+    async def analyze_job_texts(
+        self,
+        texts: List[str],
+        model: str = "qwen3-vl:235b-cloud",
+        timeout: int = 30,
+        max_retries: Optional[int] = 3
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Analiza varios anuncios de texto de forma concurrente.
+        
+        Todas las peticiones comparten un cliente asíncrono y el semáforo de
+        OLLAMA_NUM_PARALLEL turnos del bucle (el mismo que el resto de
+        llamadas), así el tiempo total se acerca al de la petición más lenta
+        en vez de a la suma de todas.
+        
+        Args:
+            texts: Lista de textos de anuncios
+            model: Modelo de Ollama Cloud
+            timeout: Timeout en segundos por intento
+            max_retries: Número máximo de reintentos por texto (None = infinito)
+        
+        Returns:
+            Lista con los datos parseados (o la excepción) de cada texto, en orden
+        """
+        limits = httpx.Limits(
+            max_connections=OLLAMA_NUM_PARALLEL,
+            max_keepalive_connections=OLLAMA_NUM_PARALLEL
+        )
+        
+        async def analizar(text: str, key: bytes) -> Dict[str, Any]:
+            # SQLite y su lock bloquean: fuera del bucle de eventos
+            cached = await asyncio.to_thread(self._cache_get, key)
+            if cached is not None:
+                return cached
+            
+            resultado = await self.analyze_text_async(
+                client, text, model=model, timeout=timeout,
+                max_retries=max_retries
+            )
+            contenido = resultado.get("message", {}).get("content", "No hay respuesta")
+            datos = self.parse_json_response(contenido)
+            await asyncio.to_thread(self._cache_put, key, datos)
+            return datos
+        
+        # Los textos repetidos dentro del lote se analizan una sola vez
+        keys = [self._text_cache_key(model, text) for text in texts]
+        unicos = dict(zip(keys, texts))
+        
+        async with httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=limits) as client:
+            resultados = await asyncio.gather(
+                *[analizar(text, key) for key, text in unicos.items()],
+                return_exceptions=True
+            )
+        
+        # Cada posición recibe su propia copia para poder modificarla por separado
+        por_clave = dict(zip(unicos, resultados))
+        return [
+            dict(por_clave[key]) if isinstance(por_clave[key], dict) else por_clave[key]
+            for key in keys
+        ]
+    
+    def analyze_job_texts_sync(
+        self,
+        texts: List[str],
+        **kwargs
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Envoltorio bloqueante de analyze_job_texts (no usar dentro de un bucle asyncio).
+        
+        Args:
+            texts: Lista de textos de anuncios
+            **kwargs: Mismos parámetros que analyze_job_texts
+        
+        Returns:
+            Lista con los datos parseados (o la excepción) de cada texto, en orden
+        """
+        return asyncio.run(self.analyze_job_texts(texts, **kwargs))
 
 
 # Ejemplo de uso
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
     # Inicializar analizador
-    analyzer = OllamaAnalyzer()
+    analyzer = OllamaAnalyzer.get_default()
     
     print("\n" + "="*80)
     print("EJEMPLO 1: Analizar imagen")
@@ -1,55 +1,87 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-import os
-import time
-
-html = '''
-<html>
-<head>
-    <style>
-        body {
-            width: 800px;
-            height: 1200px;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-family: Arial, sans-serif;
-            margin: 0;
-        }
-        h1 {
-            color: white;
-            font-size: 80px;
-            text-align: center;
-            text-shadow: 3px 3px 6px rgba(0,0,0,0.3);
-        }
-    </style>
-</head>
-<body>
-    <h1>DESARROLLADOR WEB</h1>
-</body>
-</html>
-'''
-
-# Guardar HTML temporalmente
-with open('temp.html', 'w', encoding='utf-8') as f:
-    f.write(html)
-
-# Configurar Chrome en modo headless
-chrome_options = Options()
-chrome_options.add_argument('--headless')
-chrome_options.add_argument('--window-size=800,1200')
-
-# Crear driver
-driver = webdriver.Chrome(options=chrome_options)
-driver.get('file://' + os.path.abspath('temp.html'))
-time.sleep(1)  # Esperar a que cargue
-
-# Tomar screenshot
-driver.save_screenshot('flyer.png')
-driver.quit()
-
-# Limpiar
-os.remove('temp.html')
-
-print("Flyer creado exitosamente!")
\ No newline at end of file
+from PIL import Image, ImageChops, ImageDraw, ImageFilter, ImageFont
+
+# Flyer: degradado a 135° (#667eea → #764ba2) con el título centrado en blanco
+ANCHO, ALTO = 800, 1200
+COLOR_INICIO = (0x66, 0x7e, 0xea)
+COLOR_FIN = (0x76, 0x4b, 0xa2)
+TAMANO_FUENTE = 80
+
+# Fuentes en negrita a probar (Arial en Windows, DejaVu en Linux)
+FUENTES = ('arialbd.ttf', 'Arial Bold.ttf', 'DejaVuSans-Bold.ttf')
+
+
+def _fuente(tamano: int) -> ImageFont.FreeTypeFont:
+    """Primera fuente en negrita disponible, o la de Pillow por defecto."""
+    for nombre in FUENTES:
+        try:
+            return ImageFont.truetype(nombre, tamano)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=tamano)
+
+
+def _degradado(ancho: int, alto: int) -> Image.Image:
+    """
+    Degradado lineal a 135° como el `linear-gradient(135deg, ...)` de CSS.
+    
+    En ese ángulo la posición de cada píxel es (x + y) / (ancho + alto): se
+    construye sumando una rampa horizontal y una vertical, sin bucles en Python.
+    """
+    rampa = Image.linear_gradient('L')  # 256x256, de 0 (arriba) a 255 (abajo)
+    total = ancho + alto
+    rampa_x = rampa.transpose(Image.Transpose.ROTATE_90).resize((ancho, alto))
+    rampa_y = rampa.resize((ancho, alto))
+    mascara = ImageChops.add(
+        rampa_x.point(lambda v: v * ancho // total),
+        rampa_y.point(lambda v: v * alto // total)
+    )
+    return Image.composite(
+        Image.new('RGB', (ancho, alto), COLOR_FIN),
+        Image.new('RGB', (ancho, alto), COLOR_INICIO),
+        mascara
+    )
+
+
+def _partir_lineas(draw: ImageDraw.ImageDraw, texto: str, fuente, ancho_max: int) -> str:
+    """Reparte las palabras en líneas que quepan en `ancho_max` (como el h1 del HTML)."""
+    lineas = []
+    for palabra in texto.split():
+        if lineas and draw.textlength(f"{lineas[-1]} {palabra}", font=fuente) <= ancho_max:
+            lineas[-1] = f"{lineas[-1]} {palabra}"
+        else:
+            lineas.append(palabra)
+    return "\n".join(lineas)
+
+
+def crear_flyer(titulo: str, salida: str = 'flyer.png'):
+    """
+    Dibuja el flyer directamente con Pillow (sin navegador) y lo guarda como PNG.
+    
+    Args:
+        titulo: Texto principal del flyer
+        salida: Ruta del PNG resultante
+    """
+    img = _degradado(ANCHO, ALTO)
+    fuente = _fuente(TAMANO_FUENTE)
+    
+    texto = _partir_lineas(ImageDraw.Draw(img), titulo, fuente, ANCHO)
+    centro = (ANCHO // 2, ALTO // 2)
+    
+    # Sombra: el texto desplazado 3px, desenfocado y negro al 30 %
+    sombra = Image.new('L', img.size, 0)
+    ImageDraw.Draw(sombra).multiline_text(
+        (centro[0] + 3, centro[1] + 3), texto, fill=int(255 * 0.3),
+        font=fuente, anchor='mm', align='center'
+    )
+    sombra = sombra.filter(ImageFilter.GaussianBlur(3))
+    img.paste((0, 0, 0), mask=sombra)
+    
+    ImageDraw.Draw(img).multiline_text(
+        centro, texto, fill='white', font=fuente, anchor='mm', align='center'
+    )
+    img.save(salida, format='PNG')
+
+
+if __name__ == "__main__":
+    crear_flyer("DESARROLLADOR WEB")
+    print("Flyer creado exitosamente!")
@@ -1,24 +1,29 @@
 import requests
 import base64
+import orjson
 import time
+from pathlib import Path
+
+from components.ollama_analyzer import iter_json_objects
 
 # Configuración
 IMAGEN = "job.jpg"  # 👈 Cambia esto por tu imagen
 MODELO = "gemma3:latest"
 
-print("\n🤖 Probando Ollama con Gemma3...\n")
+# Si tras estos fragmentos el modelo no ha abierto ningún '{', no va a
+# responder con JSON: se corta la generación
+MAX_FRAGMENTOS_SIN_JSON = 32
 
-# Leer imagen y convertir a base64
-with open(IMAGEN, "rb") as f:
-    img_base64 = base64.b64encode(f.read()).decode()
+print("\n🤖 Probando Ollama con Gemma3...\n")
 
-# Iniciar el timer
-tiempo_inicio = time.time()
+# Leer imagen y convertir a base64 (medido aparte de la petición)
+t_encode = time.perf_counter()
+img_base64 = base64.b64encode(Path(IMAGEN).read_bytes()).decode("ascii")
+t_encode = time.perf_counter() - t_encode
 
-# Petición a Ollama
-response = requests.post(
-    "http://localhost:11434/api/chat",
-    json={
+# Cuerpo de la petición, serializado antes de empezar a medir
+body = orjson.dumps(
+    {
         "model": MODELO,
         "messages": [{
             "role": "user",
@@ -52,20 +57,56 @@ response = requests.post(
     Responde SOLO con el JSON, sin texto adicional.""",
             "images": [img_base64]
         }],
-        "stream": False
+        "stream": True
     }
 )
 
+# Iniciar el timer: red + inferencia
+tiempo_inicio = time.perf_counter()
+
+# Petición a Ollama en streaming: se deja de leer (y el servidor deja de
+# generar) en cuanto hay un objeto JSON completo o el modelo se desvía
+response = requests.post(
+    "http://localhost:11434/api/chat",
+    data=body,
+    headers={"Content-Type": "application/json"},
+    stream=True
+)
+
+contenido = ""
+json_completo = None
+if response.status_code == 200:
+    with response:  # Al salir se cierra la conexión y se aborta la generación
+        for n, linea in enumerate(response.iter_lines(), 1):
+            if not linea:
+                continue
+            fragmento = orjson.loads(linea)  # Cada línea NDJSON, directo desde bytes
+            texto = fragmento.get("message", {}).get("content", "")
+            contenido += texto
+            
+            # Solo hace falta buscar cuando puede haberse cerrado un objeto
+            if "}" in texto:
+                json_completo = next(iter_json_objects(contenido), None)
+                if json_completo is not None:
+                    break
+            
+            if fragmento.get("done") or (n >= MAX_FRAGMENTOS_SIN_JSON and "{" not in contenido):
+                break
+
 # Detener el timer
-tiempo_fin = time.time()
+tiempo_fin = time.perf_counter()
 tiempo_total = tiempo_fin - tiempo_inicio
 
 # Mostrar respuesta
-if response.status_code == 200:
-    contenido = response.json()["message"]["content"]
+if response.status_code == 200 and json_completo is not None:
     print("✅ RESPUESTA:\n")
+    print(json_completo)
+    print(f"\n⏱️  Tiempo de respuesta (red + inferencia): {tiempo_total:.2f} segundos")
+    print(f"⏱️  Codificación base64: {t_encode * 1000:.1f} ms")
+elif response.status_code == 200:
+    print("❌ El modelo no respondió con JSON:\n")
     print(contenido)
-    print(f"\n⏱️  Tiempo de respuesta: {tiempo_total:.2f} segundos")
+    print(f"\n⏱️  Tiempo hasta el corte: {tiempo_total:.2f} segundos")
 else:
     print(f"❌ Error: {response.status_code}")
     print(response.text)
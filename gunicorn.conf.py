@@ -0,0 +1,23 @@
+"""
+Configuración de gunicorn para producción (Railway).
+Uso: gunicorn -c gunicorn.conf.py app:app
+"""
+
+import os
+
+# La app es ASGI (Quart): cada worker corre un event loop con uvicorn.
+# Las llamadas bloqueantes al analyzer se ejecutan en un pool de hilos
+# cuyo tamaño se controla con ANALYZER_THREADS (ver app.py).
+worker_class = 'uvicorn_worker.UvicornWorker'
+workers = int(os.environ.get('WEB_CONCURRENCY', max(2, os.cpu_count() or 1)))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+timeout = 300
+
+# Importar la app una sola vez en el maestro y compartirla con los workers por
+# fork. Los clientes de Firestore/Storage (gRPC) no se crean al importar: cada
+# worker abre los suyos al primer uso (ver components/firebase_manager.py)
+preload_app = True
+
+# Heartbeat de los workers en memoria (evita bloqueos en discos lentos)
+worker_tmp_dir = '/dev/shm'
@@ -3,14 +3,21 @@ Analizador de anuncios de empleo usando Ollama Cloud y Firebase.
 Versión refactorizada completamente modular con soporte para imágenes y texto.
 """
 
-from typing import Dict, Any, Optional, Union
+import asyncio
+import functools
+import logging
+from typing import Dict, Any, List, Optional, Union
 from io import BytesIO
 
+import httpx
+
 # Importar todos los componentes modulares
 from components.image_converter import ImageConverter
-from components.firebase_manager import FirebaseManager
+from components.firebase_manager import FirestoreWriteError, get_firebase_manager
 from components.ollama_analyzer import OllamaAnalyzer
 
+log = logging.getLogger(__name__)
+
 
 class JobAnalyzerFirebase:
     """
@@ -19,24 +26,33 @@ class JobAnalyzerFirebase:
     Soporta análisis de imágenes, texto o combinación de ambos.
     """
     
-    def __init__(self, service_account_path: str = 'serviceAccountKey.json'):
+    def __init__(
+        self,
+        service_account_path: Union[str, dict] = 'serviceAccountKey.json',
+        http_client: Optional[httpx.Client] = None
+    ):
         """
         Inicializa todos los componentes necesarios.
         
         Args:
-            service_account_path: Ruta al archivo de credenciales de Firebase
+            service_account_path: Ruta al archivo de credenciales de Firebase O diccionario con credenciales
+            http_client: Cliente HTTP compartido para las llamadas a la IA (opcional)
         """
         # Inicializar componentes modulares
         self.image_converter = ImageConverter()
-        self.ollama_analyzer = OllamaAnalyzer()
-        self.firebase_manager = FirebaseManager(service_account_path)
+        self.ollama_analyzer = (
+            OllamaAnalyzer(client=http_client) if http_client is not None
+            else OllamaAnalyzer.get_default()
+        )
+        self.firebase_manager = get_firebase_manager(service_account_path)
         
-        print("✅ JobAnalyzerFirebase inicializado con todos los componentes")
+        log.info("✅ JobAnalyzerFirebase inicializado con todos los componentes")
     
     def process_job_image(
         self,
-        image_path: str,
+        image_path: Union[str, bytes, BytesIO] = None,
         additional_text: str = None,
+        image_bytes: Optional[bytes] = None,
         quality: int = 95,
         upload_to_storage: bool = True,
         upload_to_firestore: bool = True,
@@ -47,8 +63,10 @@ class JobAnalyzerFirebase:
         NO guarda archivos locales.
         
         Args:
-            image_path: Ruta de la imagen original
+            image_path: Ruta de la imagen original (o sus bytes / BytesIO)
             additional_text: Texto adicional para complementar el análisis de la imagen
+            image_bytes: Imagen ya convertida a WebP (ver preprocess_image); si se
+                proporciona, se omite la lectura y conversión de image_path
             quality: Calidad de conversión WebP (0-100)
             upload_to_storage: Si True, sube la imagen a Firebase Storage
             upload_to_firestore: Si True, guarda los datos en Firestore
@@ -57,52 +75,104 @@ class JobAnalyzerFirebase:
         Returns:
             Diccionario con todos los datos procesados
         """
-        print(f"\n{'='*70}")
-        print("🚀 PROCESAMIENTO COMPLETO DE ANUNCIO DE EMPLEO (IMAGEN)")
-        if additional_text:
-            print("   + Texto adicional incluido")
-        print(f"{'='*70}\n")
+        log.info(
+            "🚀 PROCESAMIENTO COMPLETO DE ANUNCIO DE EMPLEO (IMAGEN)%s",
+            " + texto adicional" if additional_text else ""
+        )
         
         # PASO 1: Convertir imagen a WebP en memoria
-        print("📸 PASO 1: Convirtiendo imagen a WebP en memoria...")
-        webp_buffer = self.image_converter.convert_to_webp(
-            image_path, 
-            quality=quality,
-            verbose=True
+        if image_bytes is not None:
+            log.info("📸 PASO 1: Usando imagen ya convertida a WebP...")
+        else:
+            log.info("📸 PASO 1: Convirtiendo imagen a WebP en memoria...")
+        webp = self._webp_bytes(image_path, image_bytes, quality, log.isEnabledFor(logging.DEBUG))
+        
+        return self._analyze_and_upload(
+            webp, additional_text, upload_to_storage, upload_to_firestore, timeout_ia
         )
+    
+    def _webp_bytes(
+        self,
+        image_path: Union[str, bytes, BytesIO, None],
+        image_bytes: Optional[bytes],
+        quality: int,
+        verbose: bool = False
+    ) -> bytes:
+        """
+        Bytes WebP de la imagen, materializados una sola vez: el análisis, el
+        nombre por contenido y la subida usan el mismo objeto sin volver a
+        copiar el buffer. El buffer de conversión vuelve al pool enseguida.
+        """
+        if image_bytes is not None:
+            return image_bytes
+        webp_buffer = self.image_converter.convert_to_webp(image_path, quality=quality, verbose=verbose)
+        try:
+            return webp_buffer.getvalue()
+        finally:
+            self.image_converter.release(webp_buffer)
+    
+    def process_job_image_buffer(
+        self,
+        image_buffer: BytesIO,
+        additional_text: str = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Procesa una imagen que ya está en memoria (por ejemplo, recibida en una
+        petición HTTP), sin escribirla antes a un archivo temporal.
+        
+        Args:
+            image_buffer: BytesIO con la imagen original
+            additional_text: Texto adicional para complementar el análisis de la imagen
+            **kwargs: Opciones de process_job_image
         
+        Returns:
+            Diccionario con todos los datos procesados
+        """
+        return self.process_job_image(image_path=image_buffer, additional_text=additional_text, **kwargs)
+    
+    def _analyze_and_upload(
+        self,
+        webp: bytes,
+        additional_text: Optional[str],
+        upload_to_storage: bool,
+        upload_to_firestore: bool,
+        timeout_ia: int
+    ) -> Dict[str, Any]:
+        """Pasos 2 a 4 de process_job_image: analizar, subir imagen y guardar datos."""
         # PASO 2: Analizar con Ollama Cloud
-        print(f"\n🤖 PASO 2: Analizando imagen con Ollama Cloud...")
+        log.info("🤖 PASO 2: Analizando imagen con Ollama Cloud...")
+        digest = self.image_converter.content_digest(webp)  # Una sola pasada de hash
         datos = self.ollama_analyzer.analyze_job_image(
-            webp_buffer,
+            webp,
             additional_text=additional_text,
-            timeout=timeout_ia
+            timeout=timeout_ia,
+            content_digest=digest
         )
         
         # Verificar si es un anuncio de empleo
         if not datos.get("es_anuncio_empleo", False):
-            print("\n⚠️  La imagen NO es un anuncio de empleo")
-            print(f"   Razón: {datos.get('razon', 'No especificada')}")
+            log.info("⚠️  La imagen NO es un anuncio de empleo: %s", datos.get('razon', 'No especificada'))
             return datos
         
-        print("✓ Anuncio de empleo detectado correctamente")
+        log.info("✓ Anuncio de empleo detectado correctamente")
         
         # PASO 3: Subir imagen a Firebase Storage
         if upload_to_storage:
-            print("\n☁️  PASO 3: Subiendo imagen a Firebase Storage...")
+            log.info("☁️  PASO 3: Subiendo imagen a Firebase Storage...")
             image_url = self.firebase_manager.upload_image_to_storage(
-                webp_buffer,
-                filename_prefix="job",
-                folder="jobs",
-                make_public=True
+                webp,
+                make_public=True,
+                blob_path=self.firebase_manager.content_blob_path(folder="jobs", digest=digest),
+                content_addressed=True  # Una imagen repetida reutiliza su blob
             )
             datos['url'] = image_url
         else:
-            print("\n⏭️  PASO 3: Omitiendo subida a Storage")
+            log.info("⏭️  PASO 3: Omitiendo subida a Storage")
         
         # PASO 4: Subir datos a Firestore
         if upload_to_firestore:
-            print("\n📝 PASO 4: Guardando datos en Firestore...")
+            log.info("📝 PASO 4: Guardando datos en Firestore...")
             doc_id = self.firebase_manager.upload_to_firestore(
                 datos,
                 collection='jobs',
@@ -110,14 +180,130 @@ class JobAnalyzerFirebase:
             )
             datos['firestoreDocId'] = doc_id
         else:
-            print("\n⏭️  PASO 4: Omitiendo subida a Firestore")
+            log.info("⏭️  PASO 4: Omitiendo subida a Firestore")
         
-        print(f"\n{'='*70}")
-        print("✅ PROCESAMIENTO COMPLETADO EXITOSAMENTE")
-        print(f"{'='*70}\n")
+        log.info("✅ PROCESAMIENTO COMPLETADO EXITOSAMENTE")
         
         return datos
     
+    async def process_job_image_async(
+        self,
+        image_path: Union[str, bytes, BytesIO] = None,
+        additional_text: str = None,
+        image_bytes: Optional[bytes] = None,
+        quality: int = 95,
+        upload_to_storage: bool = True,
+        upload_to_firestore: bool = True,
+        timeout_ia: int = 30
+    ) -> Dict[str, Any]:
+        """
+        Versión asíncrona de process_job_image.
+        
+        La conversión y el análisis corren en hilos para no bloquear el bucle
+        de eventos. La URL de la imagen se calcula antes de subirla, así que la
+        subida a Storage y la escritura en Firestore se lanzan a la vez.
+        
+        Args:
+            image_path: Ruta de la imagen original (o sus bytes / BytesIO)
+            additional_text: Texto adicional para complementar el análisis de la imagen
+            image_bytes: Imagen ya convertida a WebP (ver preprocess_image)
+            quality: Calidad de conversión WebP (0-100)
+            upload_to_storage: Si True, sube la imagen a Firebase Storage
+            upload_to_firestore: Si True, guarda los datos en Firestore
+            timeout_ia: Timeout en segundos por cada intento de la IA
+        
+        Returns:
+            Diccionario con todos los datos procesados
+        """
+        if image_bytes is not None:
+            webp = image_bytes
+        else:
+            webp = await asyncio.to_thread(self._webp_bytes, image_path, None, quality)
+        
+        digest = self.image_converter.content_digest(webp)  # Una sola pasada de hash
+        datos = await asyncio.to_thread(
+            self.ollama_analyzer.analyze_job_image,
+            webp,
+            additional_text=additional_text,
+            timeout=timeout_ia,
+            content_digest=digest
+        )
+        
+        if not datos.get("es_anuncio_empleo", False):
+            log.info("⚠️  La imagen NO es un anuncio de empleo: %s", datos.get('razon', 'No especificada'))
+            return datos
+        
+        # Lanzar subida de imagen y escritura del documento en paralelo
+        fm = self.firebase_manager
+        tareas = {}
+        if upload_to_storage:
+            # Blob nombrado por contenido: una imagen repetida reutiliza el suyo
+            blob_path = fm.content_blob_path(folder="jobs", digest=digest)
+            datos['url'] = fm.storage_url(blob_path)
+            tareas['url'] = fm.upload_image_to_storage_async(
+                webp, blob_path=blob_path, content_addressed=True
+            )
+        if upload_to_firestore:
+            tareas['doc_id'] = fm.upload_to_firestore_async(datos, collection='jobs')
+        
+        resultados = dict(zip(tareas, await asyncio.gather(*tareas.values(), return_exceptions=True)))
+        
+        doc_id = resultados.get('doc_id')
+        if isinstance(doc_id, str):
+            datos['firestoreDocId'] = doc_id
+        
+        # Si la subida falló, no dejar un documento apuntando a una imagen
+        # inexistente. La imagen no se borra si falla Firestore: su blob es
+        # por contenido y puede estar referenciado por otros documentos
+        error = next((r for r in resultados.values() if isinstance(r, BaseException)), None)
+        if error is not None:
+            if isinstance(doc_id, str):
+                await asyncio.to_thread(fm.delete_firestore_document, doc_id)
+            raise error
+        
+        return datos
+    
+    async def process_job_image_buffer_async(
+        self,
+        image_buffer: BytesIO,
+        additional_text: str = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Versión asíncrona de process_job_image_buffer.
+        
+        Args:
+            image_buffer: BytesIO con la imagen original
+            additional_text: Texto adicional para complementar el análisis de la imagen
+            **kwargs: Opciones de process_job_image_async
+        
+        Returns:
+            Diccionario con todos los datos procesados
+        """
+        return await self.process_job_image_async(
+            image_path=image_buffer, additional_text=additional_text, **kwargs
+        )
+    
+    async def process_job_images_async(
+        self,
+        image_paths: List[str],
+        **kwargs
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Procesa varias imágenes a la vez con process_job_image_async.
+        
+        Args:
+            image_paths: Rutas de las imágenes
+            **kwargs: Opciones de process_job_image_async
+        
+        Returns:
+            Lista con los datos (o la excepción) de cada imagen, en el mismo orden
+        """
+        return await asyncio.gather(
+            *[self.process_job_image_async(image_path=path, **kwargs) for path in image_paths],
+            return_exceptions=True
+        )
+    
     def process_job_text(
         self,
         text: str,
@@ -135,12 +321,10 @@ class JobAnalyzerFirebase:
         Returns:
             Diccionario con todos los datos procesados
         """
-        print(f"\n{'='*70}")
-        print("🚀 PROCESAMIENTO COMPLETO DE ANUNCIO DE EMPLEO (TEXTO)")
-        print(f"{'='*70}\n")
+        log.info("🚀 PROCESAMIENTO COMPLETO DE ANUNCIO DE EMPLEO (TEXTO)")
         
         # PASO 1: Analizar texto con Ollama Cloud
-        print(f"🤖 PASO 1: Analizando texto con Ollama Cloud...")
+        log.info("🤖 PASO 1: Analizando texto con Ollama Cloud...")
         datos = self.ollama_analyzer.analyze_job_text(
             text,
             timeout=timeout_ia
@@ -148,15 +332,14 @@ class JobAnalyzerFirebase:
         
         # Verificar si es un anuncio de empleo
         if not datos.get("es_anuncio_empleo", False):
-            print("\n⚠️  El texto NO es un anuncio de empleo")
-            print(f"   Razón: {datos.get('razon', 'No especificada')}")
+            log.info("⚠️  El texto NO es un anuncio de empleo: %s", datos.get('razon', 'No especificada'))
             return datos
         
-        print("✓ Anuncio de empleo detectado correctamente")
+        log.info("✓ Anuncio de empleo detectado correctamente")
         
         # PASO 2: Subir datos a Firestore
         if upload_to_firestore:
-            print("\n📝 PASO 2: Guardando datos en Firestore...")
+            log.info("📝 PASO 2: Guardando datos en Firestore...")
             doc_id = self.firebase_manager.upload_to_firestore(
                 datos,
                 collection='jobs',
@@ -164,14 +347,116 @@ class JobAnalyzerFirebase:
             )
             datos['firestoreDocId'] = doc_id
         else:
-            print("\n⏭️  PASO 2: Omitiendo subida a Firestore")
+            log.info("⏭️  PASO 2: Omitiendo subida a Firestore")
+        
+        log.info("✅ PROCESAMIENTO COMPLETADO EXITOSAMENTE")
+        
+        return datos
+    
+    async def process_job_text_async(
+        self,
+        text: str,
+        upload_to_firestore: bool = True,
+        timeout_ia: int = 30
+    ) -> Dict[str, Any]:
+        """
+        Versión asíncrona de process_job_text.
         
-        print(f"\n{'='*70}")
-        print("✅ PROCESAMIENTO COMPLETADO EXITOSAMENTE")
-        print(f"{'='*70}\n")
+        Args:
+            text: Texto del anuncio de empleo
+            upload_to_firestore: Si True, guarda los datos en Firestore
+            timeout_ia: Timeout en segundos por cada intento de la IA
+        
+        Returns:
+            Diccionario con todos los datos procesados
+        """
+        datos = await self.ollama_analyzer.analyze_job_text_async(text, timeout=timeout_ia)
+        
+        if not datos.get("es_anuncio_empleo", False):
+            log.info("⚠️  El texto NO es un anuncio de empleo: %s", datos.get('razon', 'No especificada'))
+            return datos
+        
+        if upload_to_firestore:
+            datos['firestoreDocId'] = await self.firebase_manager.upload_to_firestore_async(
+                datos, collection='jobs'
+            )
         
         return datos
     
+    async def process_job_batch_async(
+        self,
+        texts: List[str],
+        upload_to_firestore: bool = True,
+        timeout_ia: int = 30
+    ) -> List[Dict[str, Any]]:
+        """
+        Procesa varios anuncios de texto: los analiza en paralelo y guarda los
+        que son anuncios de empleo en Firestore con una sola escritura agrupada.
+        
+        Args:
+            texts: Textos de los anuncios
+            upload_to_firestore: Si True, guarda los anuncios detectados en Firestore
+            timeout_ia: Timeout en segundos por cada intento de la IA
+        
+        Returns:
+            Lista con los datos de cada texto, en el mismo orden. Si el análisis
+            de un texto falla, su entrada es {"error": "..."}; si falla su
+            escritura en Firestore, conserva los datos y añade "error"
+        """
+        resultados = await self.ollama_analyzer.analyze_job_texts(texts, timeout=timeout_ia)
+        datos = [
+            {"error": str(r)} if isinstance(r, Exception) else r
+            for r in resultados
+        ]
+        
+        anuncios = [d for d in datos if d.get("es_anuncio_empleo", False)]
+        if upload_to_firestore and anuncios:
+            try:
+                doc_ids = await asyncio.to_thread(
+                    self.firebase_manager.upload_many_to_firestore, anuncios, collection='jobs'
+                )
+                fallidos = {}
+            except FirestoreWriteError as e:
+                # El resto de la tanda sí se guardó: solo se marcan los que fallaron
+                log.error("❌ %s", e)
+                doc_ids, fallidos = e.doc_ids, e.failed
+            for d, doc_id in zip(anuncios, doc_ids):
+                if doc_id in fallidos:
+                    d['error'] = f"Firestore: {fallidos[doc_id]}"
+                else:
+                    d['firestoreDocId'] = doc_id
+        
+        return datos
+    
+    def process_job_batch(
+        self,
+        texts: List[str],
+        **kwargs
+    ) -> List[Dict[str, Any]]:
+        """
+        Envoltorio bloqueante de process_job_batch_async (no usar dentro de un bucle asyncio).
+        
+        Args:
+            texts: Textos de los anuncios
+            **kwargs: Opciones de process_job_batch_async
+        
+        Returns:
+            Lista con los datos de cada texto, en el mismo orden
+        """
+        return asyncio.run(self.process_job_batch_async(texts, **kwargs))
+    
+    def warmup(self) -> Dict[str, bool]:
+        """
+        Abre las conexiones con Firestore, Storage y Ollama Cloud antes de la
+        primera petición real (p. ej. desde la sonda de arranque).
+        
+        Returns:
+            Diccionario con el resultado de cada servicio (True si respondió)
+        """
+        estado = self.firebase_manager.warmup()
+        estado['ollama'] = self.ollama_analyzer.warmup()
+        return estado
+    
     def process_job(
         self,
         image_path: str = None,
@@ -232,6 +517,30 @@ class JobAnalyzerFirebase:
 
 
 # Funciones auxiliares para uso rápido
+@functools.lru_cache(maxsize=4)
+def _get_analyzer(service_account: str = 'serviceAccountKey.json') -> JobAnalyzerFirebase:
+    """Analizador compartido por las funciones procesar_* (uno por archivo de credenciales)."""
+    return JobAnalyzerFirebase(service_account)
+
+
+def preprocess_image(image_path: str, quality: int = 95) -> bytes:
+    """
+    Convierte una imagen a WebP por adelantado, para pasarla luego a
+    process_job_image(image_bytes=...) sin volver a leerla ni decodificarla.
+    
+    Args:
+        image_path: Ruta de la imagen
+        quality: Calidad de conversión WebP (0-100)
+    
+    Returns:
+        Bytes de la imagen WebP
+    """
+    buffer = ImageConverter.convert_to_webp(image_path, quality=quality, verbose=False)
+    data = buffer.getvalue()
+    ImageConverter.release(buffer)
+    return data
+
+
 def procesar_anuncio_simple(
     image_path: str = None,
     text: str = None,
@@ -248,8 +557,7 @@ def procesar_anuncio_simple(
     Returns:
         Diccionario con los datos procesados
     """
-    analyzer = JobAnalyzerFirebase(service_account)
-    return analyzer.process_job(image_path=image_path, text=text)
+    return _get_analyzer(service_account).process_job(image_path=image_path, text=text)
 
 
 def procesar_imagen(
@@ -266,8 +574,7 @@ def procesar_imagen(
     Returns:
         Diccionario con los datos procesados
     """
-    analyzer = JobAnalyzerFirebase(service_account)
-    return analyzer.process_job_image(image_path)
+    return _get_analyzer(service_account).process_job_image(image_path)
 
 
 def procesar_texto(
@@ -284,12 +591,13 @@ def procesar_texto(
     Returns:
         Diccionario con los datos procesados
     """
-    analyzer = JobAnalyzerFirebase(service_account)
-    return analyzer.process_job_text(text)
+    return _get_analyzer(service_account).process_job_text(text)
 
 
 # Ejemplo de uso
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
     print("\n" + "="*70)
     print("EJEMPLO 1: Procesar solo imagen")
     print("="*70)
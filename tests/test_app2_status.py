@@ -0,0 +1,174 @@
+"""
+Estado incremental de app2.py: /status (ETag, 304, deltas con ?since=) y /events.
+Uso: python -m unittest discover tests
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+from collections import Counter, deque
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# app2 crea sus carpetas de trabajo al importarse: que sea en un directorio temporal
+_tmp = tempfile.TemporaryDirectory()
+_cwd = os.getcwd()
+os.chdir(_tmp.name)
+try:
+    import app2
+finally:
+    os.chdir(_cwd)
+
+
+def reset_state():
+    """Estado vacío, como recién arrancado (sin workers ni analizador)."""
+    app2.app_state.update({
+        'queue': asyncio.Queue(),
+        'subscribers': [],
+        'version': 0,
+        'reset_version': 0,
+        'changes': deque(maxlen=1024),
+        'files_by_id': {},
+        'payloads': {},
+        'queued_ids': {},
+        'processing_ids': {},
+        'completed_ids': {},
+        'stats': Counter()
+    })
+
+
+def add_file(file_id, status='queued'):
+    """Registra un archivo en la cola, como hace /upload."""
+    app2.app_state['files_by_id'][file_id] = {
+        'id': file_id,
+        'name': f'{file_id}.png',
+        'type': 'image',
+        'status': status,
+        'uploaded_at': time.time(),
+        'started_at': None,
+        'completed_at': None
+    }
+    app2.app_state[f'{status}_ids'][file_id] = None
+    app2.app_state['stats']['total'] += 1
+    app2.mark_changed(file_id)
+
+
+def complete_file(file_id):
+    """Pasa un archivo de la cola a completados."""
+    app2.app_state['queued_ids'].pop(file_id, None)
+    app2.app_state['completed_ids'][file_id] = None
+    data = app2.app_state['files_by_id'][file_id]
+    data['status'] = 'completed'
+    data['completed_at'] = time.time()
+    app2.mark_changed(file_id)
+
+
+class StatusTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        reset_state()
+        self.client = app2.app.test_client()
+    
+    async def get_status(self, query='', headers=None):
+        response = await self.client.get(f'/status{query}', headers=headers or {})
+        data = await response.get_json() if response.status_code == 200 else None
+        return response, data
+    
+    async def test_full_snapshot(self):
+        add_file('a')
+        add_file('b')
+        complete_file('a')
+        
+        response, data = await self.get_status()
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['ETag'], '"3"')
+        self.assertTrue(data['full'])
+        self.assertEqual(data['version'], 3)
+        self.assertEqual([f['id'] for f in data['files']['queued']], ['b'])
+        self.assertEqual([f['id'] for f in data['files']['completed']], ['a'])
+        self.assertIsInstance(data['files']['completed'][0]['completed_at'], str)
+    
+    async def test_delta_after_since(self):
+        add_file('a')
+        add_file('b')
+        _, first = await self.get_status()
+        
+        complete_file('a')
+        add_file('c')
+        response, data = await self.get_status(f"?since={first['version']}")
+        
+        self.assertFalse(data['full'])
+        self.assertNotIn('files', data)
+        self.assertEqual([f['id'] for f in data['changed']], ['a', 'c'])
+        self.assertEqual(data['changed'][0]['status'], 'completed')
+        
+        # Sin cambios desde la versión actual: delta vacío
+        _, empty = await self.get_status(f"?since={data['version']}")
+        self.assertFalse(empty['full'])
+        self.assertEqual(empty['changed'], [])
+    
+    async def test_full_snapshot_after_clear(self):
+        add_file('a')
+        add_file('b')
+        _, before = await self.get_status()
+        
+        response = await self.client.post('/clear')
+        self.assertEqual(response.status_code, 200)
+        
+        _, data = await self.get_status(f"?since={before['version']}")
+        self.assertTrue(data['full'])
+        self.assertEqual(data['files'], {'queued': [], 'processing': [], 'completed': []})
+        self.assertEqual(data['stats']['total'], 0)
+        
+        # Los cambios posteriores al /clear vuelven a ir como delta
+        add_file('c')
+        _, delta = await self.get_status(f"?since={data['version']}")
+        self.assertFalse(delta['full'])
+        self.assertEqual([f['id'] for f in delta['changed']], ['c'])
+    
+    async def test_since_older_than_history_gets_full_snapshot(self):
+        app2.app_state['changes'] = deque(maxlen=2)
+        for file_id in 'abcd':
+            add_file(file_id)
+        
+        _, data = await self.get_status('?since=1')
+        self.assertTrue(data['full'])
+    
+    async def test_not_modified_with_matching_etag(self):
+        add_file('a')
+        response, _ = await self.get_status()
+        etag = response.headers['ETag']
+        
+        response, _ = await self.get_status(headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], etag)
+        self.assertEqual(await response.get_data(), b'')
+        
+        add_file('b')
+        response, data = await self.get_status(headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+    
+    async def test_events_sends_snapshot_then_delta(self):
+        add_file('a')
+        
+        async with self.client.request('/events') as connection:
+            await connection.send_complete()
+            first = await asyncio.wait_for(connection.receive(), 5)
+            self.assertTrue(first.startswith(b'data: '))
+            self.assertIn(b'"full":true', first)
+            
+            complete_file('a')
+            second = await asyncio.wait_for(connection.receive(), 5)
+            self.assertIn(b'"full":false', second)
+            self.assertIn(b'"status":"completed"', second)
+            await connection.disconnect()
+
+
+if __name__ == "__main__":
+    unittest.main()
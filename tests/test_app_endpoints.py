@@ -0,0 +1,146 @@
+"""
+Errores de /analyze/batch, /analyze/image/async y /analyze/status (app.py),
+con el analizador sustituido por uno falso.
+Uso: python -m unittest discover tests
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as api
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+
+
+def multipart(fields, files, boundary='XBOUNDARYX'):
+    """Cuerpo multipart/form-data y sus headers."""
+    body = b''
+    for name, value in fields.items():
+        body += f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+    for name, (filename, data) in files.items():
+        body += (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'
+        ).encode() + data + b'\r\n'
+    body += f'--{boundary}--\r\n'.encode()
+    return body, {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+
+
+class FakeFirebaseManager:
+    """Documentos de Firestore en un dict {(colección, id): datos}."""
+    
+    def __init__(self):
+        self.docs = {}
+    
+    async def upload_to_firestore_async(self, data, collection='jobs', doc_id=None, auto_timestamps=True):
+        self.docs[(collection, doc_id)] = dict(data)
+        return doc_id
+    
+    def get_firestore_document(self, doc_id, collection='jobs'):
+        return self.docs.get((collection, doc_id))
+
+
+class FakeAnalyzer:
+    """Analizador cuyo pipeline de imagen falla siempre (cuando se libera `release`)."""
+    
+    def __init__(self):
+        self.firebase_manager = FakeFirebaseManager()
+        self.calls = []
+        self.release = asyncio.Event()
+    
+    async def process_job_image_buffer_async(self, **kwargs):
+        self.calls.append(kwargs)
+        await self.release.wait()
+        raise RuntimeError("Ollama no responde")
+    
+    async def process_job_batch_async(self, **kwargs):
+        self.calls.append(kwargs)
+        return []
+
+
+class EndpointErrorsTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.analyzer = FakeAnalyzer()
+        patches = [
+            mock.patch.object(api, 'get_analyzer', lambda: self.analyzer),
+            mock.patch.object(api, 'ANALYZER_PROCESSES', 0)
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.client = api.app.test_client()
+    
+    async def upload(self, filename, data, **fields):
+        body, headers = multipart(fields, {'file': (filename, data)})
+        return await self.client.post('/analyze/image/async', data=body, headers=headers)
+    
+    async def test_empty_batch(self):
+        for body in (b'', b'[]', b'{}', b'no es json'):
+            response = await self.client.post('/analyze/batch', data=body)
+            self.assertEqual(response.status_code, 400, body)
+            self.assertEqual((await response.get_json())['error'], "Se requiere una lista de textos")
+        
+        response = await self.client.post('/analyze/batch', json=["ok", {"text": "  "}])
+        self.assertEqual(response.status_code, 400)
+        
+        with mock.patch.object(api, 'BATCH_MAX_ITEMS', 2):
+            response = await self.client.post('/analyze/batch', json=["a", "b", "c"])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.analyzer.calls, [])
+    
+    async def test_bad_upload_is_rejected(self):
+        response = await self.upload('a.exe', PNG)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual((await response.get_json())['error'], "Tipo de archivo no permitido")
+        
+        # Extensión permitida pero el contenido no es una imagen
+        response = await self.upload('a.png', b'MZ' + b'\x00' * 64)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("no es una imagen válida", (await response.get_json())['error'])
+        
+        body, headers = multipart({'additional_text': 'x'}, {})
+        response = await self.client.post('/analyze/image/async', data=body, headers=headers)
+        self.assertEqual(response.status_code, 400)
+        
+        self.assertEqual(self.analyzer.firebase_manager.docs, {})
+        self.assertEqual(api._background_tasks, set())
+    
+    async def test_unknown_task_id(self):
+        for task_id in ('no-existe', 'A' * 32, '0' * 31, 'f' * 32):
+            response = await self.client.get(f'/analyze/status/{task_id}')
+            self.assertEqual(response.status_code, 404, task_id)
+            self.assertEqual((await response.get_json())['error'], "Tarea no encontrada")
+    
+    async def test_task_records_analyzer_error(self):
+        with self.assertLogs(api.log, 'ERROR'):
+            response = await self.upload('a.png', PNG, additional_text='Se busca cocinero')
+            self.assertEqual(response.status_code, 202)
+            data = await response.get_json()
+            task_id = data['task_id']
+            self.assertEqual(data['status'], 'pending')
+            self.assertEqual(response.headers['Location'], f'/analyze/status/{task_id}')
+            
+            # Pendiente desde el primer momento
+            response = await self.client.get(data['status_url'])
+            self.assertEqual((await response.get_json())['status'], 'pending')
+            
+            self.analyzer.release.set()
+            await asyncio.gather(*api._background_tasks)
+        
+        response = await self.client.get(data['status_url'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(await response.get_json(), {
+            "task_id": task_id, "status": "error", "error": "Ollama no responde"
+        })
+        self.assertEqual(self.analyzer.calls[0]['image_buffer'].getvalue(), PNG)
+        self.assertEqual(self.analyzer.calls[0]['additional_text'], 'Se busca cocinero')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Subidas multipart de la API (app.py): el archivo se reutiliza sin copiarlo.
+Uso: python -m unittest discover tests
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as api
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+
+
+def multipart(fields, files, boundary='XBOUNDARYX'):
+    """Cuerpo multipart/form-data y sus headers."""
+    body = b''
+    for name, value in fields.items():
+        body += f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+    for name, (filename, data) in files.items():
+        body += (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'
+        ).encode() + data + b'\r\n'
+    body += f'--{boundary}--\r\n'.encode()
+    return body, {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+
+
+class UploadBufferTest(unittest.TestCase):
+
+    def test_upload_is_reused_without_copy(self):
+        # Mayor que el umbral de 500 KB del SpooledTemporaryFile de werkzeug
+        data = PNG + b'\x00' * (600 * 1024)
+        body, headers = multipart({}, {'file': ('a.png', data)})
+        
+        async def run():
+            async with api.app.test_request_context('/analyze/image', method='POST', data=body, headers=headers):
+                files = await api.request.files
+                file = files['file']
+                self.assertIsInstance(file.stream, BytesIO)
+                
+                buffer = api.upload_to_buffer(file)
+                self.assertIs(buffer, file.stream)
+                self.assertEqual(buffer.tell(), 0)
+                self.assertEqual(buffer.getbuffer().nbytes, len(data))
+        
+        asyncio.run(run())
+    
+    def test_other_streams_are_read_once(self):
+        class FakeFile:
+            stream = open(os.devnull, 'rb')
+        
+        try:
+            buffer = api.upload_to_buffer(FakeFile())
+            self.assertIsInstance(buffer, BytesIO)
+            self.assertEqual(buffer.getvalue(), b'')
+        finally:
+            FakeFile.stream.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
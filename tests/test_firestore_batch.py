@@ -0,0 +1,161 @@
+"""
+Escrituras agrupadas en Firestore cuando un documento falla.
+Uso: python -m unittest discover tests
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import components.firebase_manager as firebase_manager
+from components.firebase_manager import FirebaseManager, FirestoreWriteError
+from main import JobAnalyzerFirebase
+
+
+class FakeBulkWriter:
+    """BulkWriter que rechaza siempre los documentos cuyo ID empieza por 'bad'."""
+    
+    def __init__(self):
+        self.on_error = None
+        self.pending = []
+        self.written = []
+        self.attempts = {}
+    
+    def on_write_error(self, callback):
+        self.on_error = callback
+    
+    def set(self, reference, data, merge=False):
+        self.pending.append(reference.id)
+    
+    def close(self):
+        for doc_id in self.pending:
+            if not doc_id.startswith('bad'):
+                self.written.append(doc_id)
+                continue
+            operation = SimpleNamespace(reference=SimpleNamespace(id=doc_id), attempts=0)
+            while True:
+                operation.attempts += 1
+                self.attempts[doc_id] = operation.attempts
+                error = SimpleNamespace(operation=operation, attempts=operation.attempts, message="PERMISSION_DENIED")
+                if not self.on_error(error, self):
+                    break
+
+
+class FakeCollection:
+    def document(self, doc_id):
+        return SimpleNamespace(id=doc_id)
+
+
+class FakeDb:
+    def __init__(self):
+        self.writer = FakeBulkWriter()
+    
+    def bulk_writer(self):
+        return self.writer
+    
+    def collection(self, name):
+        return FakeCollection()
+
+
+class FakeWriteBatch:
+    def __init__(self, db):
+        self.db = db
+        self.doc_ids = []
+    
+    def set(self, reference, data, merge=False):
+        self.doc_ids.append(reference.id)
+    
+    def commit(self):
+        if any(doc_id.startswith('bad') for doc_id in self.doc_ids):
+            raise RuntimeError("INVALID_ARGUMENT")
+        self.db.committed.extend(self.doc_ids)
+
+
+class FakeBatchDb:
+    """Cliente sin BulkWriter: escribe con WriteBatch."""
+    
+    def __init__(self):
+        self.committed = []
+    
+    def batch(self):
+        return FakeWriteBatch(self)
+    
+    def collection(self, name):
+        return FakeCollection()
+
+
+class FakeOllama:
+    """Devuelve un anuncio con el texto como puesto."""
+    
+    async def analyze_job_texts(self, texts, timeout=30):
+        return [{"es_anuncio_empleo": True, "position": text, "city": "x"} for text in texts]
+
+
+def make_manager() -> FirebaseManager:
+    """FirebaseManager sin credenciales, sobre el cliente falso."""
+    manager = FirebaseManager.__new__(FirebaseManager)
+    manager._collections = {}
+    manager._queries = {}
+    return manager
+
+
+class FirestoreBatchFailureTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = FakeDb()
+        self._saved_db = firebase_manager._db
+        firebase_manager._db = self.db
+    
+    def tearDown(self):
+        firebase_manager._db = self._saved_db
+    
+    def test_upload_many_raises_with_failed_ids(self):
+        manager = make_manager()
+        
+        with self.assertRaises(FirestoreWriteError) as ctx:
+            manager.upload_many_to_firestore(
+                [{"position": "ok", "city": "x"}, {"position": "bad", "city": "x"}],
+                max_retries=3
+            )
+        
+        error = ctx.exception
+        self.assertEqual(len(error.doc_ids), 2)
+        self.assertEqual(list(error.failed), [error.doc_ids[1]])
+        self.assertEqual(self.db.writer.written, [error.doc_ids[0]])
+        self.assertEqual(self.db.writer.attempts[error.doc_ids[1]], 3)
+    
+    def test_write_batch_reports_uncommitted_chunks(self):
+        db = FakeBatchDb()
+        firebase_manager._db = db
+        manager = make_manager()
+        
+        with self.assertRaises(FirestoreWriteError) as ctx:
+            manager.upload_many_to_firestore(
+                [{"position": p, "city": "x"} for p in ("a", "b", "bad", "c")],
+                batch_size=2
+            )
+        
+        error = ctx.exception
+        # El primer lote ya estaba confirmado; fallan el suyo y los siguientes
+        self.assertEqual(db.committed, error.doc_ids[:2])
+        self.assertEqual(list(error.failed), error.doc_ids[2:])
+    
+    def test_batch_marks_only_failed_job(self):
+        analyzer = JobAnalyzerFirebase.__new__(JobAnalyzerFirebase)
+        analyzer.firebase_manager = make_manager()
+        analyzer.ollama_analyzer = FakeOllama()
+        
+        datos = asyncio.run(analyzer.process_job_batch_async(["ok", "bad"]))
+        
+        self.assertIn("firestoreDocId", datos[0])
+        self.assertNotIn("error", datos[0])
+        self.assertNotIn("firestoreDocId", datos[1])
+        self.assertEqual(datos[1]["error"], "Firestore: PERMISSION_DENIED")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Parser multipart por bloques (components/multipart_stream.py).
+Uso: python -m unittest discover tests
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from multipart import MultipartError
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from components.multipart_stream import parse_multipart_stream
+
+BOUNDARY = 'XBOUNDARYX'
+
+
+def multipart(fields, files):
+    """Cuerpo multipart/form-data con los campos y archivos indicados."""
+    body = b''
+    for name, value in fields.items():
+        body += f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'.encode() + value + b'\r\n'
+    for name, (filename, data) in files.items():
+        body += (
+            f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'
+        ).encode() + data + b'\r\n'
+    return body + f'--{BOUNDARY}--\r\n'.encode()
+
+
+async def chunks(body: bytes, size: int):
+    """Entrega `body` en bloques de `size` bytes, como request.body."""
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def parse(body, chunk_size=64 * 1024, boundary=BOUNDARY, factory=lambda name: BytesIO(), **kwargs):
+    kwargs.setdefault('max_size', 1024 * 1024)
+    kwargs.setdefault('text_fields', ('text',))
+    return asyncio.run(parse_multipart_stream(chunks(body, chunk_size), boundary, factory, **kwargs))
+
+
+class MultipartStreamTest(unittest.TestCase):
+
+    def test_file_and_text(self):
+        body = multipart({'text': 'Se busca cocinero'.encode()}, {'file': ('a.png', b'PNGDATA')})
+        file, filename, fields = parse(body)
+        
+        self.assertIsInstance(file, BytesIO)
+        self.assertEqual(file.tell(), 0)
+        self.assertEqual(file.read(), b'PNGDATA')
+        self.assertEqual(filename, 'a.png')
+        self.assertEqual(fields, {'text': 'Se busca cocinero'})
+    
+    def test_fields_split_across_chunks(self):
+        texto = 'Vacante: cocinero en Quito — horario completo'.encode()
+        data = bytes(range(256)) * 8
+        body = multipart({'text': texto}, {'file': ('a.png', data)})
+        
+        # Bloques de 1 y 7 bytes: cabeceras, boundary y datos quedan partidos
+        for size in (1, 7):
+            file, filename, fields = parse(body, chunk_size=size)
+            self.assertEqual(file.getvalue(), data)
+            self.assertEqual(fields['text'], texto.decode())
+    
+    def test_missing_boundary(self):
+        body = multipart({}, {'file': ('a.png', b'x')})
+        for boundary in (None, ''):
+            with self.assertRaises(MultipartError):
+                parse(body, boundary=boundary)
+    
+    def test_oversized_file_removes_partial_file(self):
+        paths = []
+        
+        def to_disk(name):
+            f = tempfile.NamedTemporaryFile(delete=False)
+            paths.append(f.name)
+            return f
+        
+        body = multipart({}, {'file': ('a.png', b'x' * 4096)})
+        with self.assertRaises(RequestEntityTooLarge):
+            parse(body, chunk_size=512, factory=to_disk, max_size=2048)
+        
+        self.assertEqual(len(paths), 1)
+        self.assertFalse(os.path.exists(paths[0]))
+    
+    def test_oversized_text_field(self):
+        body = multipart({'text': b'a' * 200}, {})
+        with self.assertRaises(RequestEntityTooLarge):
+            parse(body, chunk_size=16, max_text_size=100)
+    
+    def test_file_written_to_disk_and_unknown_fields_ignored(self):
+        def to_disk(name):
+            return tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(name)[1])
+        
+        body = multipart({'otro': b'ignorado'}, {'file': ('a.png', b'PNGDATA')})
+        path, filename, fields = parse(body, factory=to_disk)
+        try:
+            self.assertTrue(path.endswith('.png'))
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), b'PNGDATA')
+            self.assertEqual(fields, {})
+        finally:
+            os.unlink(path)
+    
+    def test_discarded_file(self):
+        body = multipart({}, {'file': ('a.exe', b'MZ')})
+        file, filename, fields = parse(body, factory=lambda name: None)
+        self.assertIsNone(file)
+        self.assertEqual(filename, 'a.exe')
+
+
+if __name__ == "__main__":
+    unittest.main()
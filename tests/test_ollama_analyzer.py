@@ -0,0 +1,148 @@
+"""
+OllamaAnalyzer sin red: cuerpo de las peticiones de imagen y caché SQLite.
+Uso: python -m unittest discover tests
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import unittest
+import zlib
+from unittest import mock
+
+import orjson
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import components.ollama_analyzer as ollama_analyzer
+from components.ollama_analyzer import OllamaAnalyzer, _IMAGE_PLACEHOLDER
+
+
+def make_analyzer(**kwargs) -> OllamaAnalyzer:
+    """Analizador sin caché ni prewarm (no abre conexiones)."""
+    kwargs.setdefault('cache_path', None)
+    return OllamaAnalyzer(api_key='test', prewarm=False, **kwargs)
+
+
+class ImagePayloadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.analyzer = make_analyzer()
+    
+    def tearDown(self):
+        self.analyzer.close()
+    
+    def body(self, prompt: str) -> dict:
+        antes, despues = self.analyzer._image_payload_parts("modelo", prompt)
+        return orjson.loads(b''.join((antes, b'QUJD', despues)))
+    
+    def test_image_goes_in_images(self):
+        payload = self.body("prompt")
+        self.assertEqual(payload["messages"][0]["content"], "prompt")
+        self.assertEqual(payload["messages"][0]["images"], ["QUJD"])
+    
+    def test_placeholder_in_prompt_is_kept(self):
+        prompt = f"Texto adicional proporcionado:\n{_IMAGE_PLACEHOLDER} y \"{_IMAGE_PLACEHOLDER}\""
+        payload = self.body(prompt)
+        self.assertEqual(payload["messages"][0]["content"], prompt)
+        self.assertEqual(payload["messages"][0]["images"], ["QUJD"])
+
+
+
+class ResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'cache.sqlite3')
+        self.analyzer = make_analyzer(cache_path=self.path)
+    
+    def tearDown(self):
+        self.analyzer.close()
+        self.tmp.cleanup()
+    
+    def age(self, key: bytes, seconds: float):
+        """Hace que la entrada `key` parezca guardada hace `seconds` segundos."""
+        self.analyzer._cache.execute(
+            "UPDATE kv SET created_at = ? WHERE key = ?", (time.time() - seconds, key)
+        )
+        self.analyzer._cache.commit()
+    
+    def keys(self) -> set:
+        return {row[0] for row in self.analyzer._cache.execute("SELECT key FROM kv")}
+    
+    def test_hit_and_miss(self):
+        key = self.analyzer._text_cache_key("modelo", "Se busca  cocinero\n")
+        self.assertIsNone(self.analyzer._cache_get(key))
+        
+        self.analyzer._cache_put(key, {"es_anuncio_empleo": True, "position": "cocinero"})
+        
+        # Mismo texto con otros espacios: misma clave
+        same = self.analyzer._text_cache_key("modelo", "Se busca cocinero")
+        self.assertEqual(self.analyzer._cache_get(same), {"es_anuncio_empleo": True, "position": "cocinero"})
+        self.assertIsNone(self.analyzer._cache_get(self.analyzer._text_cache_key("otro", "Se busca cocinero")))
+    
+    def test_stored_as_compressed_json_in_wal(self):
+        self.analyzer._cache_put(b'k', {"a": 1})
+        blob = self.analyzer._cache.execute("SELECT value FROM kv WHERE key = ?", (b'k',)).fetchone()[0]
+        self.assertEqual(orjson.loads(zlib.decompress(blob)), {"a": 1})
+        self.assertEqual(self.analyzer._cache.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+    
+    def test_parse_errors_are_not_stored(self):
+        self.analyzer._cache_put(b'k', {"error": "No se pudo parsear"})
+        self.assertIsNone(self.analyzer._cache_get(b'k'))
+    
+    def test_expired_entry_is_a_miss_and_is_refreshed(self):
+        self.analyzer._cache_put(b'k', {"v": 1})
+        with mock.patch.object(ollama_analyzer, 'OLLAMA_CACHE_TTL', 60):
+            self.age(b'k', 120)
+            self.assertIsNone(self.analyzer._cache_get(b'k'))
+            
+            self.analyzer._cache_put(b'k', {"v": 2})
+            self.assertEqual(self.analyzer._cache_get(b'k'), {"v": 2})
+        
+        with mock.patch.object(ollama_analyzer, 'OLLAMA_CACHE_TTL', 0):
+            self.age(b'k', 10 ** 9)
+            self.assertEqual(self.analyzer._cache_get(b'k'), {"v": 2})
+    
+    def test_eviction_keeps_newest_rows(self):
+        for i in range(5):
+            self.analyzer._cache_put(bytes([i]), {"i": i})
+            self.age(bytes([i]), 100 - i)  # 0 es la más antigua
+        
+        with mock.patch.object(ollama_analyzer, 'OLLAMA_CACHE_MAX_ROWS', 3), \
+                mock.patch.object(ollama_analyzer, 'OLLAMA_CACHE_TTL', 500):
+            self.age(bytes([4]), 1000)  # Caducada: se borra aunque quepa
+            self.analyzer._cache_inserts = 0  # La próxima inserción purga
+            self.analyzer._cache_put(b'nueva', {"i": 5})
+        
+        self.assertEqual(self.keys(), {bytes([2]), bytes([3]), b'nueva'})
+    
+    def test_corrupt_row_is_a_miss_and_is_removed(self):
+        self.analyzer._cache_put(b'k', {"v": 1})
+        self.analyzer._cache.execute("UPDATE kv SET value = ? WHERE key = ?", (b'no es zlib', b'k'))
+        self.analyzer._cache.commit()
+        
+        with self.assertLogs(ollama_analyzer.log, 'WARNING'):
+            self.assertIsNone(self.analyzer._cache_get(b'k'))
+        self.assertNotIn(b'k', self.keys())
+    
+    def test_old_table_without_created_at_is_migrated(self):
+        self.analyzer.close()
+        os.remove(self.path)
+        conn = sqlite3.connect(self.path)
+        conn.execute("CREATE TABLE kv (key BLOB PRIMARY KEY, value BLOB)")
+        conn.execute("INSERT INTO kv VALUES (?, ?)", (b'k', zlib.compress(orjson.dumps({"v": 1}))))
+        conn.commit()
+        conn.close()
+        
+        self.analyzer = make_analyzer(cache_path=self.path)
+        # Las filas sin fecha cuentan como caducadas
+        self.assertIsNone(self.analyzer._cache_get(b'k'))
+        self.analyzer._cache_put(b'k2', {"v": 2})
+        self.assertEqual(self.analyzer._cache_get(b'k2'), {"v": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
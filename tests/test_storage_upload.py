@@ -0,0 +1,122 @@
+"""
+Subidas a Storage con blobs nombrados por contenido (content_addressed).
+Uso: python -m unittest discover tests
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.api_core.exceptions import PreconditionFailed, ServiceUnavailable
+
+import components.firebase_manager as firebase_manager
+from components.firebase_manager import FirebaseManager
+from components.image_converter import ImageConverter
+
+
+class FakeBlob:
+    def __init__(self, bucket, path):
+        self.bucket = bucket
+        self.path = path
+        self.chunk_size = None
+    
+    def upload_from_string(self, data, content_type=None, timeout=None, if_generation_match=None):
+        self.bucket.calls.append((self.path, if_generation_match))
+        if self.bucket.error is not None:
+            raise self.bucket.error
+        # Misma semántica que GCS: generación 0 = "solo si no existe"
+        if if_generation_match == 0 and self.path in self.bucket.blobs:
+            raise PreconditionFailed("At least one of the pre-conditions you specified did not hold.")
+        self.bucket.blobs[self.path] = bytes(data)
+    
+    def make_public(self):
+        self.bucket.public.append(self.path)
+
+
+class FakeBucket:
+    def __init__(self):
+        self.blobs = {}
+        self.calls = []
+        self.public = []
+        self.error = None
+    
+    def blob(self, path):
+        return FakeBlob(self, path)
+
+
+def make_manager() -> FirebaseManager:
+    """FirebaseManager sin credenciales, sobre el bucket falso."""
+    manager = FirebaseManager.__new__(FirebaseManager)
+    manager._bucket_name = 'test-bucket'
+    manager._public_base = 'https://storage.googleapis.com/test-bucket'
+    manager.uniform_public_bucket = False
+    return manager
+
+
+class ContentAddressedUploadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.bucket = FakeBucket()
+        self._saved_bucket = firebase_manager._bucket
+        firebase_manager._bucket = self.bucket
+        self.manager = make_manager()
+    
+    def tearDown(self):
+        firebase_manager._bucket = self._saved_bucket
+    
+    def test_blob_path_depends_only_on_content(self):
+        path = FirebaseManager.content_blob_path(b'imagen', 'jobs')
+        
+        self.assertEqual(path, FirebaseManager.content_blob_path(BytesIO(b'imagen'), 'jobs'))
+        self.assertEqual(
+            path, FirebaseManager.content_blob_path(folder='jobs', digest=ImageConverter.content_digest(b'imagen'))
+        )
+        self.assertNotEqual(path, FirebaseManager.content_blob_path(b'otra', 'jobs'))
+        self.assertRegex(path, r'^jobs/[0-9a-f]{32}\.webp$')
+    
+    def test_duplicate_blob_is_reused(self):
+        first = self.manager.upload_image_to_storage(BytesIO(b'imagen'), content_addressed=True)
+        
+        with self.assertLogs(firebase_manager.log, 'INFO') as logs:
+            second = self.manager.upload_image_to_storage(b'imagen', content_addressed=True)
+        
+        path = FirebaseManager.content_blob_path(b'imagen', 'jobs')
+        self.assertEqual(first, second)
+        self.assertEqual(second, self.manager.storage_url(path))
+        self.assertEqual(self.bucket.calls, [(path, 0), (path, 0)])
+        self.assertEqual(list(self.bucket.blobs), [path])
+        self.assertEqual(self.bucket.public, [path, path])
+        self.assertTrue(any('ya presente' in line for line in logs.output))
+    
+    def test_reserved_path_with_async_upload(self):
+        digest = ImageConverter.content_digest(b'imagen')
+        path = self.manager.content_blob_path(folder='jobs', digest=digest)
+        self.bucket.blobs[path] = b'imagen'
+        
+        url = asyncio.run(self.manager.upload_image_to_storage_async(
+            BytesIO(b'imagen'), blob_path=path, content_addressed=True
+        ))
+        
+        self.assertEqual(url, self.manager.storage_url(path))
+        self.assertEqual(self.bucket.calls, [(path, 0)])
+    
+    def test_other_errors_are_raised(self):
+        self.bucket.error = ServiceUnavailable("backend")
+        with self.assertRaises(ServiceUnavailable):
+            self.manager.upload_image_to_storage(b'imagen', content_addressed=True)
+        self.assertEqual(self.bucket.public, [])
+    
+    def test_unique_paths_skip_precondition(self):
+        self.manager.upload_image_to_storage(b'imagen')
+        self.manager.upload_image_to_storage(b'imagen')
+        
+        self.assertEqual(len(self.bucket.blobs), 2)
+        self.assertEqual([generation for _, generation in self.bucket.calls], [None, None])
+
+
+if __name__ == "__main__":
+    unittest.main()